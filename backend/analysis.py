@@ -1,68 +1,222 @@
+import os
 
-def calculate_feature_to_fix_ratio(commit_history):
+import numpy as np
+
+from backend.instrumentation import span
+
+# Default point budget for health time series, and how they are reduced to it ("lttb" or "minmax")
+SERIES_POINT_BUDGET = int(os.getenv("GITGLYPH_SERIES_POINT_BUDGET", 500))
+SERIES_DOWNSAMPLING = os.getenv("GITGLYPH_SERIES_DOWNSAMPLING", "lttb")
+# Periods health series can be resampled to
+GRANULARITIES = ("day", "week", "month")
+
+def calculate_feature_to_fix_ratio(analysis_state):
     """
-    Placeholder for calculating feature-to-fix ratio.
-    Needs actual commit message parsing to identify feature vs. fix commits.
+    Calculates the feature-to-fix ratio from the accumulated commit message counts.
+    A commit counts as a feature if its message mentions "feat", otherwise as a fix if it mentions "fix".
     """
-    # Dummy implementation
-    features = 0
-    fixes = 0
-    for commit in commit_history:
-        if "feat" in commit.lower(): # Simplified check
-            features += 1
-        elif "fix" in commit.lower(): # Simplified check
-            fixes += 1
+    features = analysis_state["features"]
+    fixes = analysis_state["fixes"]
     return features / (fixes if fixes > 0 else 1)
 
-def calculate_code_churn_volatility(commit_history):
+def commit_columns(analysis_state):
+    """
+    Unpacks the daily cadence buckets of an analysis state into columnar arrays:
+    (days as datetime64[D], commits, lines_added, lines_deleted), sorted by day.
+    """
+    cadence = analysis_state["cadence"]
+    days = np.array(sorted(cadence), dtype="datetime64[D]")
+    counts = np.array([cadence[str(day)] for day in days], dtype=np.int64).reshape(-1, 3)
+    return days, counts[:, 0], counts[:, 1], counts[:, 2]
+
+def resample(days, values, granularity="week"):
+    """
+    Sums `values` into contiguous day/week/month periods spanning the first to the last active day.
+    Inactive periods are included as zeros so rolling windows see real gaps.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Unknown granularity '{granularity}', expected one of {GRANULARITIES}")
+    if len(days) == 0:
+        return np.zeros(0)
+    if granularity == "day":
+        periods = days.astype(np.int64)
+    elif granularity == "week":
+        periods = (days.astype(np.int64) + 3) // 7 # Weeks start on Monday (1970-01-01 was a Thursday)
+    else:
+        periods = days.astype("datetime64[M]").astype(np.int64)
+    return np.bincount(periods - periods[0], weights=values).astype(np.float64)
+
+def rolling_mean_std(values, window):
+    """
+    Trailing rolling mean and standard deviation via cumulative sums.
+    The first `window - 1` points use the shorter history available, so the output has the input's length.
+    """
+    window = max(1, int(window))
+    sums = np.cumsum(np.concatenate(([0.0], values)))
+    squares = np.cumsum(np.concatenate(([0.0], values * values)))
+    end = np.arange(1, len(values) + 1)
+    start = np.maximum(end - window, 0)
+    counts = end - start
+    mean = (sums[end] - sums[start]) / counts
+    variance = (squares[end] - squares[start]) / counts - mean * mean
+    return mean, np.sqrt(np.maximum(variance, 0.0))
+
+def calculate_code_churn_volatility(churn, window):
+    """
+    Calculates code churn volatility as the average rolling standard deviation of
+    per-period churn (lines added + deleted), relative to the average churn.
+    """
+    if len(churn) == 0 or churn.mean() == 0:
+        return 0.0
+    _, rolling_std = rolling_mean_std(churn, window)
+    return float(rolling_std.mean() / churn.mean())
+
+def calculate_commit_cadence(days, commits):
+    """
+    Calculates commit cadence (rhythm) as the average number of commits per calendar
+    month over the repository's active span, from its first commit to its last.
+    Months without commits inside that span count as zero.
+    """
+    monthly = resample(days, commits, "month")
+    return float(monthly.mean()) if len(monthly) else 0.0
+
+def stability_series(churn, window):
+    """
+    Stability per period on a 0-100 scale: 100 when churn is steady, falling as the
+    rolling coefficient of variation of churn grows.
+    """
+    rolling_mean, rolling_std = rolling_mean_std(churn, window)
+    variation = np.divide(rolling_std, rolling_mean, out=np.zeros_like(rolling_mean), where=rolling_mean > 0)
+    return 100.0 / (1.0 + variation)
+
+def tempo_series(commits, window):
+    """Development tempo per period: rolling mean of commits per period."""
+    rolling_mean, _ = rolling_mean_std(commits, window)
+    return rolling_mean
+
+def lttb_indices(values, max_points):
     """
-    Placeholder for calculating code churn volatility.
-    Needs access to diffs for each commit to determine lines added/deleted.
+    Largest-Triangle-Three-Buckets: picks `max_points` indices that preserve the visual shape of the series.
+    The first and last points are always kept; every bucket in between contributes the point forming
+    the largest triangle with the previously kept point and the mean of the next bucket.
     """
-    # Dummy implementation
-    return len(commit_history) * 0.1 # Placeholder value
+    n = len(values)
+    if max_points >= n:
+        return np.arange(n)
+    if max_points < 3:
+        return np.array([0, n - 1][:max(max_points, 1)])
 
-def calculate_commit_cadence(commit_history):
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    sums = np.concatenate(([0.0], np.cumsum(values)))
+    counts = np.maximum(edges[1:] - edges[:-1], 1)
+    bucket_x = (edges[:-1] + edges[1:] - 1) / 2.0
+    bucket_y = (sums[edges[1:]] - sums[edges[:-1]]) / counts
+    # The bucket after the last one is the final point itself
+    next_x = np.append(bucket_x[1:], n - 1)
+    next_y = np.append(bucket_y[1:], values[-1])
+
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(max_points - 2):
+        start, end = edges[bucket], max(edges[bucket + 1], edges[bucket] + 1)
+        x = np.arange(start, end)
+        area = np.abs((previous - next_x[bucket]) * (values[start:end] - values[previous])
+                      - (previous - x) * (next_y[bucket] - values[previous]))
+        previous = start + int(np.argmax(area))
+        selected[bucket + 1] = previous
+    return selected
+
+def minmax_indices(values, max_points):
+    """
+    Min/max bucketing: splits the series into max_points // 2 equal buckets and keeps the
+    lowest and highest point of each, so spikes always survive. Fully vectorized.
+    A budget below two points cannot hold a bucket's extremes, so only the first point is kept.
+    """
+    n = len(values)
+    if max_points >= n:
+        return np.arange(n)
+    if max_points < 2:
+        return np.array([0])
+    bucket_count = max_points // 2
+    bucket = np.arange(n) * bucket_count // n
+    starts = np.searchsorted(bucket, np.arange(bucket_count))
+    picks = []
+    for extreme in (np.minimum.reduceat(values, starts), np.maximum.reduceat(values, starts)):
+        hits = np.flatnonzero(values == extreme[bucket])
+        _, first = np.unique(bucket[hits], return_index=True)
+        picks.append(hits[first])
+    return np.unique(np.concatenate(picks))
+
+DOWNSAMPLERS = {"lttb": lttb_indices, "minmax": minmax_indices}
+
+def downsample(values, max_points, method=SERIES_DOWNSAMPLING):
     """
-    Placeholder for calculating commit cadence (rhythm).
-    Needs commit timestamps to determine frequency and patterns.
+    Reduces a series to at most `max_points` points.
+    Returns (indices, values), or (None, values) when the series already fits the budget.
     """
-    # Dummy implementation
-    return len(commit_history) / 30.0 # Placeholder: commits per month
+    if max_points is None or len(values) <= max_points:
+        return None, values
+    if method not in DOWNSAMPLERS:
+        raise ValueError(f"Unknown downsampling method '{method}', expected one of {tuple(DOWNSAMPLERS)}")
+    indices = DOWNSAMPLERS[method](values, max_points)
+    return indices, values[indices]
+
+def health_from_state(analysis_state, granularity="week", window=4, max_points=SERIES_POINT_BUDGET):
+    """Computes the health metrics and series of `analyze_glyph_health` from an analysis state."""
+    with span("health.series"):
+        days, commits, lines_added, lines_deleted = commit_columns(analysis_state)
+        commits_per_period = resample(days, commits, granularity)
+        churn_per_period = resample(days, lines_added + lines_deleted, granularity)
+
+        feature_to_fix = calculate_feature_to_fix_ratio(analysis_state)
+        churn_volatility = calculate_code_churn_volatility(churn_per_period, window)
+        commit_rhythm = calculate_commit_cadence(days, commits)
+
+        stability_index, stability = downsample(stability_series(churn_per_period, window), max_points)
+        tempo_index, tempo = downsample(tempo_series(commits_per_period, window), max_points)
+
+    return {
+        "feature_to_fix_ratio": feature_to_fix,
+        "code_churn_volatility": churn_volatility,
+        "commit_cadence": commit_rhythm,
+        "stability_graph_data": np.round(stability, 3).tolist(),
+        "development_tempo_data": np.round(tempo, 3).tolist(),
+        "stability_graph_index": stability_index.tolist() if stability_index is not None else None,
+        "development_tempo_index": tempo_index.tolist() if tempo_index is not None else None,
+    }
 
-def analyze_glyph_health(repo_path):
+def analyze_glyph_health(repo_path, granularity="week", window=4, max_points=SERIES_POINT_BUDGET):
     """
     Main function to analyze the health of a Glyph based on its repository.
-    This will eventually interact with GitPython to get actual commit data.
+    History is read from the repository's commit table, so repeated calls
+    only walk the commits that landed since the previous run.
+    Time series are bucketed by `granularity` (day/week/month) and smoothed
+    over a trailing `window` of periods. Series longer than `max_points` are
+    downsampled, with the period index of each kept point in `*_index`;
+    pass `max_points=None` for full resolution.
     """
     from git import Repo, exc
-    
-    commit_history = []
+    from backend.analysis_state import update_state
+
     try:
-        repo = Repo(repo_path)
-        for commit in repo.iter_commits():
-            commit_history.append(commit.message)
-    except exc.InvalidGitRepositoryError:
+        Repo(repo_path)
+        # Extends the commit table with new commits, then reduces its columns
+        with span("health.history"):
+            analysis_state = update_state(repo_path)
+    except (exc.InvalidGitRepositoryError, exc.NoSuchPathError):
         print(f"Error: {repo_path} is not a valid Git repository.")
         return {
             "feature_to_fix_ratio": 0.0,
             "code_churn_volatility": 0.0,
             "commit_cadence": 0.0,
             "stability_graph_data": [],
-            "development_tempo_data": []
+            "development_tempo_data": [],
+            "stability_graph_index": None,
+            "development_tempo_index": None,
         }
 
-    feature_to_fix = calculate_feature_to_fix_ratio(commit_history)
-    churn_volatility = calculate_code_churn_volatility(commit_history)
-    commit_rhythm = calculate_commit_cadence(commit_history)
-
-    return {
-        "feature_to_fix_ratio": feature_to_fix,
-        "code_churn_volatility": churn_volatility,
-        "commit_cadence": commit_rhythm,
-        "stability_graph_data": [10, 12, 15, 13, 16, 14], # Dummy data for a graph
-        "development_tempo_data": [5, 7, 6, 8, 7, 9] # Dummy data for a chart
-    }
+    return health_from_state(analysis_state, granularity, window, max_points)
 
 if __name__ == "__main__":
     # Example usage
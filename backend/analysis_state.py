@@ -0,0 +1,90 @@
+import numpy as np
+
+
+def new_state():
+    """
+    Returns an empty analysis state.
+    Every counter is an additive accumulator, so two states built over
+    disjoint commit ranges can be combined with `merge_states`.
+    """
+    return {
+        "last_sha": None,
+        "commit_count": 0,
+        "features": 0,
+        "fixes": 0,
+        "lines_added": 0,
+        "lines_deleted": 0,
+        # Cadence buckets: "YYYY-MM-DD" (UTC) -> [commits, lines_added, lines_deleted]
+        "cadence": {},
+    }
+
+
+# Commit message kinds, see `classify_message`
+OTHER = 0
+FEATURE = 1
+FIX = 2
+
+
+def classify_message(message):
+    """A commit is a feature if its message mentions "feat", otherwise a fix if it mentions "fix"."""
+    message = message.lower()
+    if "feat" in message:
+        return FEATURE
+    if "fix" in message:
+        return FIX
+    return OTHER
+
+
+def merge_states(base, delta):
+    """
+    Merges the accumulators of `delta` into a copy of `base`.
+    `last_sha` is taken from `delta`, which is expected to cover the newer range.
+    """
+    merged = new_state()
+    for key in ("commit_count", "features", "fixes", "lines_added", "lines_deleted"):
+        merged[key] = base[key] + delta[key]
+    for source in (base["cadence"], delta["cadence"]):
+        for day, (commits, added, deleted) in source.items():
+            bucket = merged["cadence"].setdefault(day, [0, 0, 0])
+            bucket[0] += commits
+            bucket[1] += added
+            bucket[2] += deleted
+    merged["last_sha"] = delta["last_sha"] or base["last_sha"]
+    return merged
+
+
+def state_from_table(table):
+    """Computes the state of a whole `CommitTable` with a few array reductions."""
+    state = new_state()
+    if table is None or len(table) == 0:
+        return state
+
+    kinds = table["kind"]
+    added = table["added"].astype(np.int64)
+    deleted = table["deleted"].astype(np.int64)
+    state["last_sha"] = table.head
+    state["commit_count"] = len(table)
+    state["features"] = int(np.count_nonzero(kinds == FEATURE))
+    state["fixes"] = int(np.count_nonzero(kinds == FIX))
+    state["lines_added"] = int(added.sum())
+    state["lines_deleted"] = int(deleted.sum())
+
+    days, day_ids = np.unique(table["timestamp"] // 86400, return_inverse=True)
+    commits = np.bincount(day_ids, minlength=len(days))
+    day_added = np.bincount(day_ids, weights=added, minlength=len(days)).astype(np.int64)
+    day_deleted = np.bincount(day_ids, weights=deleted, minlength=len(days)).astype(np.int64)
+    labels = days.astype("datetime64[D]").astype(str).tolist()
+    state["cadence"] = {
+        day: [c, a, d] for day, c, a, d in zip(labels, commits.tolist(), day_added.tolist(), day_deleted.tolist())
+    }
+    return state
+
+
+def update_state(repo_path):
+    """
+    Returns the state of `repo_path` at HEAD, read from its commit table
+    (which only walks the commits added since the previous table).
+    """
+    from backend.commit_table import get_table
+
+    return state_from_table(get_table(repo_path))
@@ -0,0 +1,86 @@
+import json
+import os
+import threading
+from concurrent.futures import Future
+
+from backend.git_history import resolve_revision
+from backend.instrumentation import COALESCE_METRIC, metrics
+
+COMPUTED = "computed"
+COALESCED = "coalesced"
+
+
+def analysis_key(kind, repo_path, params=None):
+    """
+    Identity of an analysis: its kind, the resolved repository path, the repository's
+    HEAD SHA and the call parameters. Two calls with the same key compute the same answer.
+    """
+    return (
+        kind,
+        os.path.realpath(repo_path),
+        resolve_revision(repo_path, "HEAD"),
+        json.dumps(params or {}, sort_keys=True, default=str),
+    )
+
+
+class SingleFlight:
+    """
+    Runs at most one computation per key at a time: callers arriving while it is in flight
+    share its outcome (result or exception) instead of starting their own. A key is
+    forgotten as soon as its computation finishes, so later calls compute again
+    (and can hit the persisted state and caches that computation filled).
+    Every call is counted under COALESCE_METRIC by kind (the first item of the key) and outcome.
+    """
+
+    def __init__(self):
+        self._flights = {} # key -> concurrent.futures.Future
+        self._lock = threading.Lock()
+
+    def _count(self, key, outcome):
+        metrics.increment(COALESCE_METRIC, {"kind": key[0], "outcome": outcome})
+
+    def _forget(self, key, future):
+        with self._lock:
+            if self._flights.get(key) is future:
+                del self._flights[key]
+
+    def submit(self, key, start):
+        """
+        Returns (future, computed): the in-flight future for `key`, or the future returned
+        by `start()` when there is none. `start` must return a concurrent.futures.Future
+        (e.g. from an executor); async callers can await it with `asyncio.wrap_future`.
+        """
+        with self._lock:
+            future = self._flights.get(key)
+            computed = future is None
+            if computed:
+                future = self._flights[key] = start()
+        self._count(key, COMPUTED if computed else COALESCED)
+        if computed:
+            future.add_done_callback(lambda done: self._forget(key, done))
+        return future, computed
+
+    def do(self, key, function, *args, **kwargs):
+        """Blocking form for threads: calls `function` unless an identical call is in flight, then returns its result."""
+        with self._lock:
+            future = self._flights.get(key)
+            computed = future is None
+            if computed:
+                future = self._flights[key] = Future()
+        self._count(key, COMPUTED if computed else COALESCED)
+        if not computed:
+            return future.result()
+
+        try:
+            result = function(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._forget(key, future)
+
+
+single_flight = SingleFlight()
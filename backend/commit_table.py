@@ -0,0 +1,437 @@
+import glob
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+from array import array
+
+import numpy as np
+
+from backend.analysis_state import classify_message
+from backend.git_history import is_ancestor, iter_commit_records, list_revisions, resolve_revision
+
+# Bump whenever the file layout or column contents change so existing tables are rebuilt.
+TABLE_VERSION = 1
+TABLE_DIR = os.getenv(
+    "GITGLYPH_TABLE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "gitglyph", "tables"),
+)
+# Tables kept per repository; the newest is extended when HEAD moves forward
+TABLES_PER_REPO = 2
+MAGIC = b"GGCT"
+ALIGNMENT = 64
+EMPTY_SHA = b"\0" * 40
+
+# Column dtypes. Per-commit columns have one row per commit, oldest first; `*_offsets` columns
+# have one more row and delimit each commit's slice of `messages` and the `file_*` columns.
+# Strings (author names and emails, file paths) are interned: commits store IDs into
+# `<name>_offsets` / `<name>` string tables.
+COLUMNS = {
+    "sha": "S40",
+    "timestamp": "<i8",
+    "author": "<i4",
+    "first_parent": "<i4", # Row index, -1 when absent or outside the table
+    "second_parent": "<i4",
+    "added": "<i4",
+    "deleted": "<i4",
+    "kind": "i1", # `classify_message` result
+    "message_offsets": "<i8",
+    "messages": "u1", # UTF-8
+    "file_offsets": "<i8",
+    "file_ids": "<i4",
+    "file_added": "<i4",
+    "file_deleted": "<i4",
+    "author_names_offsets": "<i8",
+    "author_names": "u1",
+    "author_emails_offsets": "<i8",
+    "author_emails": "u1",
+    "file_paths_offsets": "<i8",
+    "file_paths": "u1",
+}
+
+
+def resolve_indices(shas, targets):
+    """Vectorized SHA -> row index lookup via a sorted search; misses map to -1."""
+    if len(shas) == 0:
+        return np.full(len(targets), -1, dtype=np.int64)
+    order = np.argsort(shas)
+    sorted_shas = shas[order]
+    positions = np.clip(np.searchsorted(sorted_shas, targets), 0, len(shas) - 1)
+    found = sorted_shas[positions] == targets
+    return np.where(found, order[positions], -1).astype(np.int64)
+
+
+def _gather_segments(offsets, values, rows):
+    """
+    Reorders the segments `values[offsets[i]:offsets[i + 1]]` so that segment `rows[j]` comes j-th;
+    returns (offsets, values).
+    """
+    lengths = np.diff(offsets)[rows]
+    starts = offsets[:-1][rows]
+    new_offsets = np.concatenate(([0], np.cumsum(lengths))).astype(np.int64)
+    gather = np.repeat(starts - new_offsets[:-1], lengths) + np.arange(new_offsets[-1])
+    return new_offsets, values[gather]
+
+
+def _reverse_segments(offsets, values):
+    """Reverses the order of the segments `values[offsets[i]:offsets[i + 1]]`; returns (offsets, values)."""
+    return _gather_segments(offsets, values, np.arange(len(offsets) - 1)[::-1])
+
+
+def _first_appearance(ids, count):
+    """Permutation old ID -> new ID numbering IDs by their first appearance in `ids`."""
+    unique, first = np.unique(ids, return_index=True)
+    remap = np.full(count, -1, dtype=np.int64)
+    remap[unique[np.argsort(first, kind="stable")]] = np.arange(len(unique))
+    return remap
+
+
+def _pack_strings(strings):
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = np.concatenate(([0], np.cumsum([len(e) for e in encoded], dtype=np.int64))).astype(np.int64)
+    return offsets, np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+
+def _unpack_strings(offsets, blob):
+    data = blob.tobytes()
+    return [data[start:end].decode("utf-8") for start, end in zip(offsets[:-1].tolist(), offsets[1:].tolist())]
+
+
+class CommitTable:
+    """
+    Columnar, read-only commit history of one repository at `head` (see COLUMNS).
+    Tables opened with `open_table` are views over a memory-mapped file: every process that
+    opens the same table shares its pages, and nothing is parsed or copied up front.
+    """
+
+    def __init__(self, head, columns, buffer=None):
+        self.head = head
+        self.columns = columns
+        self._buffer = buffer # Keeps the mapping alive as long as the views are
+
+    def __len__(self):
+        return len(self.columns["timestamp"])
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def message(self, row):
+        offsets = self.columns["message_offsets"]
+        return self.columns["messages"][offsets[row]:offsets[row + 1]].tobytes().decode("utf-8")
+
+    def messages(self, newest_first=True):
+        """Yields every commit message, in `git log` order by default."""
+        rows = range(len(self) - 1, -1, -1) if newest_first else range(len(self))
+        for row in rows:
+            yield self.message(row)
+
+    def author_names(self):
+        return _unpack_strings(self.columns["author_names_offsets"], self.columns["author_names"])
+
+    def author_emails(self):
+        return _unpack_strings(self.columns["author_emails_offsets"], self.columns["author_emails"])
+
+    def file_paths(self):
+        return _unpack_strings(self.columns["file_paths_offsets"], self.columns["file_paths"])
+
+    def file_touches(self):
+        """(commit rows, file IDs) of every file touched by every commit."""
+        offsets = self.columns["file_offsets"]
+        return np.repeat(np.arange(len(self)), np.diff(offsets)), self.columns["file_ids"]
+
+    def commit_arrays(self, max_count=None, message_kinds=False):
+        """
+        The arrays `glyph_layout.load_commit_arrays` returns, as views where possible.
+        With `max_count`, only the newest `max_count` commits, with parents outside them set to -1.
+        """
+        start = max(len(self) - max_count, 0) if max_count is not None else 0
+        first_parent = self.columns["first_parent"][start:]
+        second_parent = self.columns["second_parent"][start:]
+        if start:
+            first_parent = np.where(first_parent >= start, first_parent - start, -1)
+            second_parent = np.where(second_parent >= start, second_parent - start, -1)
+        commits = {
+            "sha": self.columns["sha"][start:],
+            "timestamp": self.columns["timestamp"][start:],
+            "added": self.columns["added"][start:],
+            "deleted": self.columns["deleted"][start:],
+            "first_parent": first_parent,
+            "second_parent": second_parent,
+        }
+        if message_kinds:
+            commits["kind"] = self.columns["kind"][start:]
+        return commits
+
+
+def empty_table():
+    """The table of a repository without commits."""
+    return CommitTable(None, {name: np.zeros(1 if name.endswith("_offsets") else 0, dtype=dtype)
+                              for name, dtype in COLUMNS.items()})
+
+
+def build_columns(repo_path, head, base=None):
+    """
+    Walks `head` (or only `base.head..head` when extending `base`) once and returns
+    the table columns as lists of array parts, ready for `write_table`.
+    """
+    authors = {}
+    names = []
+    files = {}
+    if base is not None:
+        names = base.author_names()
+        authors = {email: i for i, email in enumerate(base.author_emails())}
+        files = {path: i for i, path in enumerate(base.file_paths())}
+    renamed = set() # Authors keep the name of their newest commit
+
+    shas = bytearray()
+    first_parents = bytearray()
+    second_parents = bytearray()
+    timestamps = array("q")
+    author_ids = array("i")
+    added = array("i")
+    deleted = array("i")
+    kinds = array("b")
+    messages = bytearray()
+    message_lengths = array("q")
+    file_counts = array("q")
+    file_ids = array("i")
+    file_added = array("i")
+    file_deleted = array("i")
+
+    rev_range = f"{base.head}..{head}" if base is not None else head
+    for record in iter_commit_records(repo_path, rev_range):
+        shas += record.sha.encode("ascii")
+        parents = record.parents
+        first_parents += parents[0].encode("ascii") if parents else EMPTY_SHA
+        second_parents += parents[1].encode("ascii") if len(parents) > 1 else EMPTY_SHA
+        timestamps.append(record.timestamp)
+
+        author_id = authors.get(record.author_email)
+        if author_id is None:
+            author_id = authors[record.author_email] = len(names)
+            names.append(record.author_name)
+        elif record.author_email not in renamed:
+            names[author_id] = record.author_name
+        renamed.add(record.author_email)
+        author_ids.append(author_id)
+
+        commit_added = commit_deleted = 0
+        for path, path_added, path_deleted in record.files:
+            file_id = files.get(path)
+            if file_id is None:
+                file_id = files[path] = len(files)
+            file_ids.append(file_id)
+            file_added.append(path_added)
+            file_deleted.append(path_deleted)
+            commit_added += path_added
+            commit_deleted += path_deleted
+        file_counts.append(len(record.files))
+        added.append(commit_added)
+        deleted.append(commit_deleted)
+        kinds.append(classify_message(record.message))
+
+        message = record.message.encode("utf-8")
+        messages += message
+        message_lengths.append(len(message))
+
+    # `git log` yields newest first; reverse everything into chronological order.
+    new_shas = np.frombuffer(bytes(shas), dtype="S40")[::-1]
+    all_shas = np.concatenate([base["sha"], new_shas]) if base is not None else new_shas
+    message_offsets, message_bytes = _reverse_segments(
+        np.concatenate(([0], np.cumsum(np.frombuffer(message_lengths, dtype=np.int64)))).astype(np.int64),
+        np.frombuffer(bytes(messages), dtype=np.uint8))
+    file_offsets = np.concatenate(([0], np.cumsum(np.frombuffer(file_counts, dtype=np.int64)))).astype(np.int64)
+    _, touched_ids = _reverse_segments(file_offsets, np.frombuffer(file_ids, dtype=np.int32))
+    _, touched_added = _reverse_segments(file_offsets, np.frombuffer(file_added, dtype=np.int32))
+    file_offsets, touched_deleted = _reverse_segments(file_offsets, np.frombuffer(file_deleted, dtype=np.int32))
+
+    new_columns = {
+        "sha": new_shas,
+        "timestamp": np.frombuffer(timestamps, dtype=np.int64)[::-1],
+        "author": np.frombuffer(author_ids, dtype=np.int32)[::-1],
+        "first_parent": resolve_indices(all_shas, np.frombuffer(bytes(first_parents), dtype="S40")[::-1]),
+        "second_parent": resolve_indices(all_shas, np.frombuffer(bytes(second_parents), dtype="S40")[::-1]),
+        "added": np.frombuffer(added, dtype=np.int32)[::-1],
+        "deleted": np.frombuffer(deleted, dtype=np.int32)[::-1],
+        "kind": np.frombuffer(kinds, dtype=np.int8)[::-1],
+        "messages": message_bytes,
+        "file_ids": touched_ids,
+        "file_added": touched_added,
+        "file_deleted": touched_deleted,
+    }
+    columns = {name: ([base[name]] if base is not None else []) + [values] for name, values in new_columns.items()}
+    # Offsets of the new rows continue where the base table's end
+    for name, offsets in (("message_offsets", message_offsets), ("file_offsets", file_offsets)):
+        if base is None:
+            columns[name] = [offsets]
+        else:
+            columns[name] = [base[name], offsets[1:] + base[name][-1]]
+
+    for name, strings in (("author_names", names), ("author_emails", list(authors)), ("file_paths", list(files))):
+        offsets, blob = _pack_strings(strings)
+        columns[f"{name}_offsets"] = [offsets]
+        columns[name] = [blob]
+    return columns
+
+
+def canonicalize_columns(columns, revisions=None):
+    """
+    Rewrites the columns of an extended table (as returned by `build_columns`) into the exact
+    row order and string interning a full build produces, so extended and cold tables are identical.
+    Appending `base.head..head` after the base rows keeps `git log` order only when the new commits
+    are a linear chain on top of the base head; otherwise pass `revisions`, the `git rev-list` of
+    the new head (newest first), to reorder the rows. Returns None if `revisions` does not cover
+    the table's rows, in which case the table has to be built from the full history.
+    """
+    column = {name: np.concatenate(parts) for name, parts in columns.items()}
+    shas = column["sha"]
+    if revisions is None:
+        order = np.arange(len(shas))
+    else:
+        if len(revisions) != len(shas):
+            return None
+        order = resolve_indices(shas, np.array(revisions[::-1], dtype="S40")) # New row -> current row
+        if (order < 0).any():
+            return None
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+
+    result = {}
+    for name in ("sha", "timestamp", "author", "added", "deleted", "kind"):
+        result[name] = column[name][order]
+    for name in ("first_parent", "second_parent"):
+        parents = column[name]
+        result[name] = np.where(parents >= 0, rank[np.maximum(parents, 0)], -1)[order]
+    result["message_offsets"], result["messages"] = _gather_segments(column["message_offsets"], column["messages"], order)
+    for name in ("file_ids", "file_added", "file_deleted"):
+        result["file_offsets"], result[name] = _gather_segments(column["file_offsets"], column[name], order)
+
+    # A full build interns strings in `git log` order: newest commit first, files in numstat order.
+    newest_first = np.arange(len(order))[::-1]
+    names = _unpack_strings(column["author_names_offsets"], column["author_names"])
+    emails = _unpack_strings(column["author_emails_offsets"], column["author_emails"])
+    author_ids = _first_appearance(result["author"][::-1], len(emails))
+    result["author"] = author_ids[result["author"]]
+    _, touched_newest_first = _gather_segments(result["file_offsets"], result["file_ids"], newest_first)
+    paths = _unpack_strings(column["file_paths_offsets"], column["file_paths"])
+    file_ids = _first_appearance(touched_newest_first, len(paths))
+    result["file_ids"] = file_ids[result["file_ids"]]
+
+    for name, strings, remap in (("author_names", names, author_ids), ("author_emails", emails, author_ids),
+                                 ("file_paths", paths, file_ids)):
+        ordered = [None] * int((remap >= 0).sum())
+        for old, new in enumerate(remap.tolist()):
+            if new >= 0:
+                ordered[new] = strings[old]
+        result[f"{name}_offsets"], result[name] = _pack_strings(ordered)
+    return {name: [values] for name, values in result.items()}
+
+
+def write_table(path, head, columns):
+    """
+    Atomically writes columns (name -> list of array parts, concatenated on disk) to `path`.
+    Layout: MAGIC, a little-endian uint32 header length, a JSON header mapping each column
+    to [dtype, length, offset], then every column's raw bytes aligned to ALIGNMENT.
+    """
+    layout = {}
+    offset = 0
+    for name, dtype in COLUMNS.items():
+        length = sum(len(part) for part in columns[name])
+        layout[name] = [dtype, length, offset]
+        offset += -(-length * np.dtype(dtype).itemsize // ALIGNMENT) * ALIGNMENT
+    header = json.dumps({"version": TABLE_VERSION, "head": head, "columns": layout}).encode("utf-8")
+    data_start = -(-(len(MAGIC) + 4 + len(header)) // ALIGNMENT) * ALIGNMENT
+
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC + struct.pack("<I", len(header)) + header)
+            for name, dtype in COLUMNS.items():
+                f.seek(data_start + layout[name][2])
+                for part in columns[name]:
+                    f.write(np.ascontiguousarray(part, dtype=dtype).tobytes())
+            f.truncate(data_start + offset)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def open_table(path):
+    """Maps the table at `path` read-only; returns None if it is missing, truncated or from another version."""
+    try:
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    try:
+        if buffer[:len(MAGIC)] != MAGIC:
+            return None
+        (header_length,) = struct.unpack_from("<I", buffer, len(MAGIC))
+        header = json.loads(buffer[len(MAGIC) + 4:len(MAGIC) + 4 + header_length])
+        if header.get("version") != TABLE_VERSION:
+            return None
+        data_start = -(-(len(MAGIC) + 4 + header_length) // ALIGNMENT) * ALIGNMENT
+        columns = {
+            name: np.frombuffer(buffer, dtype=dtype, count=length, offset=data_start + offset)
+            for name, (dtype, length, offset) in header["columns"].items()
+        }
+    except (ValueError, struct.error):
+        return None
+    return CommitTable(header["head"], columns, buffer)
+
+
+def _repo_key(repo_path):
+    return hashlib.sha1(os.path.realpath(repo_path).encode("utf-8")).hexdigest()
+
+
+def table_path(repo_path, head):
+    return os.path.join(TABLE_DIR, f"{_repo_key(repo_path)}-{head}.ggct")
+
+
+def _repo_tables(repo_path):
+    """Table files of `repo_path`, newest first."""
+    paths = glob.glob(os.path.join(TABLE_DIR, f"{_repo_key(repo_path)}-*.ggct"))
+    return sorted(paths, key=lambda path: os.path.getmtime(path), reverse=True)
+
+
+def get_table(repo_path, rev="HEAD"):
+    """
+    Returns the commit table of `repo_path` at `rev`, or None for an empty repository.
+    Tables are stored per repository and commit under TABLE_DIR. A missing table extends the
+    repository's newest table when that one's head is an ancestor (walking only the new commits,
+    then restoring full-build row order with `canonicalize_columns`), and is built from the
+    full history otherwise. Older tables beyond TABLES_PER_REPO are removed;
+    processes that still map them keep reading them safely.
+    """
+    head = resolve_revision(repo_path, rev)
+    if head is None:
+        return None
+    path = table_path(repo_path, head)
+    table = open_table(path)
+    if table is not None:
+        return table
+
+    existing = _repo_tables(repo_path)
+    base = open_table(existing[0]) if existing else None
+    if base is not None and not is_ancestor(repo_path, base.head, head):
+        base = None
+    columns = build_columns(repo_path, head, base)
+    if base is not None:
+        merged = (columns["second_parent"][-1] >= 0).any() # Parents of new commits are all in the table
+        columns = canonicalize_columns(columns, list_revisions(repo_path, head) if merged else None)
+        if columns is None:
+            columns = build_columns(repo_path, head)
+    write_table(path, head, columns)
+
+    for stale in _repo_tables(repo_path)[TABLES_PER_REPO:]:
+        try:
+            os.remove(stale)
+        except OSError:
+            pass
+    return open_table(path)
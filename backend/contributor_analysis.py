@@ -1,55 +1,122 @@
+import os
 
-import git
+import numpy as np
 
-def analyze_contributor_collaboration(repo_path):
+from backend.commit_table import get_table
+from backend.cooccurrence import collaboration_link_deltas, collaboration_links, incidence_from_touches, pair_weights, select_links
+from backend.instrumentation import span
+from backend.git_history import count_revisions, iter_commit_records, resolve_revision
+
+# Commits read between two frames of a streamed constellation
+STREAM_BATCH_COMMITS = int(os.getenv("GITGLYPH_STREAM_BATCH_COMMITS", 2000))
+
+def table_contributions(table):
+    """
+    Reads contributors and their touched files from a `CommitTable` without walking Git.
+    Returns (nodes, incidence): contributor nodes ordered by first appearance, newest first
+    (as in `git log`), and their author x file incidence matrix with rows in the same order.
+    """
+    authors = table["author"]
+    emails = table.author_emails()
+    names = table.author_names()
+    commits = np.bincount(authors, minlength=len(emails))
+    latest = np.full(len(emails), -1, dtype=np.int64)
+    np.maximum.at(latest, authors, np.arange(len(authors)))
+    order = np.argsort(-latest, kind="stable") # Every interned author has at least one commit
+    rank = np.empty(len(emails), dtype=np.int64)
+    rank[order] = np.arange(len(emails))
+
+    commit_rows, file_ids = table.file_touches()
+    incidence = incidence_from_touches(rank[authors[commit_rows]], file_ids,
+                                       shape=(len(emails), len(table["file_paths_offsets"]) - 1))
+    nodes = [{'id': emails[i], 'name': names[i], 'commits': int(commits[i])} for i in order.tolist()]
+    return nodes, incidence
+
+def analyze_contributor_collaboration(repo_path, min_weight=1, top_k=None):
     """
     Analyzes Git history to determine collaboration strength between contributors.
     Returns data suitable for a force-directed graph.
+    `min_weight` and `top_k` bound the number of links returned for large organizations.
     """
-    repo = git.Repo(repo_path)
+    with span("constellation.history"):
+        table = get_table(repo_path)
+        if table is None:
+            return {'nodes': [], 'links': []}
+        nodes, incidence = table_contributions(table)
+
+    # Collaboration strength is the number of files two authors share, computed
+    # for all pairs at once from the author x file incidence matrix.
+    with span("constellation.links"):
+        sources, targets, weights = pair_weights(incidence)
+        links = select_links([node['id'] for node in nodes], sources, targets, weights,
+                             min_weight=min_weight, top_k=top_k)
+
+    return {'nodes': nodes, 'links': links}
+
+def stream_contributor_collaboration(repo_path, min_weight=1, top_k=None, batch_commits=STREAM_BATCH_COMMITS):
+    """
+    Streams the contributor constellation as frames while the history is read.
+    Every `batch_commits` commits it yields:
+    - {'type': 'nodes', 'nodes': [...]}: new or updated authors (upsert by id)
+    - {'type': 'links', 'links': [...]}: link weight increases since the previous frame (add to existing values)
+    - {'type': 'progress', 'commits': n, 'total': total}
+    The final {'type': 'done', 'nodes': [...], 'links': [...]} frame is the same graph
+    `analyze_contributor_collaboration` returns (with `min_weight` and `top_k` applied)
+    and replaces everything streamed before it.
+    """
+    total = count_revisions(repo_path) if resolve_revision(repo_path, "HEAD") else 0
+    yield {'type': 'progress', 'commits': 0, 'total': total}
+
     contributors = {}
     file_contributions = {}
+    touched_authors = set()
+    new_authors = {} # file path -> authors that started touching it in this batch
+    processed = 0
 
-    for commit in repo.iter_commits():
-        author_email = commit.author.email
-        if author_email not in contributors:
-            contributors[author_email] = {'name': commit.author.name, 'email': author_email, 'commits': 0, 'files': set()}
-        contributors[author_email]['commits'] += 1
-
-        for file_path in commit.stats.files:
-            if file_path not in file_contributions:
-                file_contributions[file_path] = set()
-            file_contributions[file_path].add(author_email)
-            contributors[author_email]['files'].add(file_path)
-
-    nodes = []
-    for email, data in contributors.items():
-        nodes.append({'id': email, 'name': data['name'], 'commits': data['commits']})
-
-    links = []
-    processed_pairs = set()
-
-    for file_path, authors in file_contributions.items():
-        author_list = list(authors)
-        for i in range(len(author_list)):
-            for j in range(i + 1, len(author_list)):
-                author1 = author_list[i]
-                author2 = author_list[j]
-
-                # Ensure consistent order for pair processing
-                pair = tuple(sorted((author1, author2)))
-
-                if pair not in processed_pairs:
-                    collaboration_strength = 0
-                    # Calculate collaboration strength based on shared files
-                    shared_files = len(contributors[author1]['files'].intersection(contributors[author2]['files']))
-                    collaboration_strength = shared_files # Simple metric for now
-
-                    if collaboration_strength > 0:
-                        links.append({'source': author1, 'target': author2, 'value': collaboration_strength})
-                    processed_pairs.add(pair)
+    def flush():
+        if touched_authors:
+            yield {'type': 'nodes', 'nodes': [
+                {'id': email, 'name': contributors[email]['name'], 'commits': contributors[email]['commits']}
+                for email in contributors if email in touched_authors
+            ]}
+        if new_authors:
+            with span("constellation.link_deltas"):
+                links = collaboration_link_deltas(list(contributors), file_contributions, new_authors)
+            if links:
+                yield {'type': 'links', 'links': links}
+        yield {'type': 'progress', 'commits': processed, 'total': total}
+        touched_authors.clear()
+        new_authors.clear()
 
-    return {'nodes': nodes, 'links': links}
+    if total:
+        for record in iter_commit_records(repo_path):
+            author_email = record.author_email
+            if author_email not in contributors:
+                contributors[author_email] = {'name': record.author_name, 'email': author_email, 'commits': 0}
+            contributors[author_email]['commits'] += 1
+            touched_authors.add(author_email)
+
+            for file_path, _, _ in record.files:
+                if file_path not in file_contributions:
+                    file_contributions[file_path] = set()
+                authors = file_contributions[file_path]
+                if author_email not in authors:
+                    authors.add(author_email)
+                    new_authors.setdefault(file_path, set()).add(author_email)
+
+            processed += 1
+            if processed % batch_commits == 0:
+                yield from flush()
+        if processed % batch_commits:
+            yield from flush()
+
+    with span("constellation.links"):
+        links = collaboration_links(list(contributors), file_contributions, min_weight=min_weight, top_k=top_k)
+    yield {
+        'type': 'done',
+        'nodes': [{'id': email, 'name': data['name'], 'commits': data['commits']} for email, data in contributors.items()],
+        'links': links,
+    }
 
 if __name__ == '__main__':
     # Example usage (replace with actual repo path)
@@ -0,0 +1,124 @@
+import numpy as np
+from scipy import sparse
+
+
+def build_incidence(author_ids, file_contributions):
+    """
+    Builds a sparse author x file incidence matrix (CSR, int32).
+    `author_ids` maps author email -> row index; `file_contributions` maps
+    file path -> set of author emails (the inverted index from the history walk).
+    """
+    rows = []
+    cols = []
+    for col, authors in enumerate(file_contributions.values()):
+        for author in authors:
+            rows.append(author_ids[author])
+            cols.append(col)
+    return incidence_from_touches(rows, cols, shape=(len(author_ids), len(file_contributions)))
+
+
+def incidence_from_touches(rows, cols, shape):
+    """
+    Builds the binary author x file incidence matrix (CSR, int32) from parallel arrays
+    of (author row, file column) touches; repeated touches count once.
+    """
+    incidence = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.int32), (np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64))),
+        shape=shape,
+        dtype=np.int32,
+    )
+    incidence.data[:] = 1
+    return incidence
+
+
+def pair_weights(incidence):
+    """
+    Returns (sources, targets, weights) for every author pair sharing at least one file.
+    A single sparse product A @ A.T yields all shared-file counts; only the strict
+    upper triangle is kept, so each unordered pair appears once with source < target.
+    """
+    cooccurrence = sparse.triu(incidence @ incidence.T, k=1).tocoo()
+    return cooccurrence.row, cooccurrence.col, cooccurrence.data
+
+
+def top_k_mask(sources, targets, weights, top_k):
+    """
+    Boolean mask over edges keeping those that rank within the `top_k` heaviest
+    edges of either endpoint. Ties break on the lower neighbour index so the
+    selection is deterministic. Raises ValueError unless `top_k` is at least 1.
+    """
+    if top_k < 1:
+        raise ValueError(f"top_k must be at least 1, got {top_k}")
+    edge_count = len(weights)
+    if edge_count == 0:
+        return np.zeros(0, dtype=bool)
+
+    # Each undirected edge is considered once from each endpoint.
+    nodes = np.concatenate([sources, targets])
+    neighbours = np.concatenate([targets, sources])
+    edge_ids = np.concatenate([np.arange(edge_count), np.arange(edge_count)])
+    doubled_weights = np.concatenate([weights, weights])
+
+    order = np.lexsort((neighbours, -doubled_weights, nodes))
+    sorted_nodes = nodes[order]
+    group_starts = np.flatnonzero(np.r_[True, sorted_nodes[1:] != sorted_nodes[:-1]])
+    group_sizes = np.diff(np.r_[group_starts, len(sorted_nodes)])
+    ranks = np.arange(len(sorted_nodes)) - np.repeat(group_starts, group_sizes)
+
+    mask = np.zeros(edge_count, dtype=bool)
+    mask[edge_ids[order][ranks < top_k]] = True
+    return mask
+
+
+def collaboration_links(author_emails, file_contributions, min_weight=1, top_k=None):
+    """
+    Computes force-graph links between authors, weighted by the number of files they share.
+    Edges lighter than `min_weight` are dropped; with `top_k`, each author keeps at most
+    its `top_k` heaviest edges (an edge survives if either endpoint keeps it).
+    """
+    author_ids = {email: i for i, email in enumerate(author_emails)}
+    incidence = build_incidence(author_ids, file_contributions)
+    sources, targets, weights = pair_weights(incidence)
+    return select_links(author_emails, sources, targets, weights, min_weight=min_weight, top_k=top_k)
+
+
+def select_links(author_emails, sources, targets, weights, min_weight=1, top_k=None):
+    """
+    Applies `min_weight` and `top_k` (see `collaboration_links`) to weighted author pairs given
+    as index arrays with source < target, and returns them as links sorted by (source, target).
+    """
+    keep = weights >= max(min_weight, 1)
+    sources, targets, weights = sources[keep], targets[keep], weights[keep]
+    if top_k is not None:
+        keep = top_k_mask(sources, targets, weights, top_k)
+        sources, targets, weights = sources[keep], targets[keep], weights[keep]
+
+    order = np.lexsort((targets, sources))
+    return [
+        {'source': author_emails[s], 'target': author_emails[t], 'value': int(w)}
+        for s, t, w in zip(sources[order], targets[order], weights[order])
+    ]
+
+
+def collaboration_link_deltas(author_emails, file_contributions, new_authors):
+    """
+    Computes how link weights grew when `new_authors` (file path -> set of emails that
+    started touching the file) were added to `file_contributions`, which already includes them.
+    Only the files in `new_authors` are examined: a pair gains one shared file for every file
+    both now touch that they did not both touch before.
+    Returns links sorted like `collaboration_links`, with `value` holding the increase.
+    """
+    author_ids = {email: i for i, email in enumerate(author_emails)}
+    files = list(new_authors)
+    after = build_incidence(author_ids, {path: file_contributions[path] for path in files})
+    before = build_incidence(author_ids, {path: file_contributions[path] - new_authors[path] for path in files})
+    sources, targets, after_weights = pair_weights(after)
+    growth = after_weights - np.asarray(before[sources].multiply(before[targets]).sum(axis=1)).ravel()
+
+    keep = growth > 0
+    sources, targets, growth = sources[keep], targets[keep], growth[keep]
+    order = np.lexsort((targets, sources))
+    return [
+        {'source': author_emails[s], 'target': author_emails[t], 'value': int(w)}
+        for s, t, w in zip(sources[order], targets[order], growth[order])
+    ]
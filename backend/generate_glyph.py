@@ -1,30 +1,59 @@
 
 import os
 from backend.analysis import analyze_glyph_health
+from backend.git_history import resolve_revision
+from backend.glyph_cache import cache_key, glyph_cache
+from backend.instrumentation import span
+from backend.glyph_layout import DEFAULT_POINT_BUDGET, load_commit_arrays, compute_layout, render_svg
 
-def generate_glyph(repo_path, output_path):
+# Bump whenever the rendered output changes so cached glyphs are invalidated.
+RENDERER_VERSION = 2
+
+def generate_glyph(repo_path, output_path, max_points=DEFAULT_POINT_BUDGET):
     """
-    Placeholder function to simulate Glyph generation.
-    In a real scenario, this would interact with Git data
-    and render a complex visualization.
+    Generates a Glyph for a repository and writes it to `output_path`.
+    Branches become lanes, commit times and frequency drive position and color,
+    and change size drives radius. Histories longer than `max_points` commits
+    are aggregated into bins so the SVG stays bounded.
+    Results are cached by repository, HEAD SHA and render parameters.
     """
     print(f"Generating Glyph for repository: {repo_path}")
-    # Simulate creating a dummy SVG file
-    svg_content = '<svg width="100" height="100"><rect width="100" height="100" style="fill:rgb(0,0,255);" /></svg>'
+    head_sha = resolve_revision(repo_path, "HEAD")
+    key = cache_key("glyph", [repo_path], [head_sha], RENDERER_VERSION, {"max_points": max_points}) if head_sha else None
+    cached = glyph_cache.get(key) if key else None
+
+    if cached is not None:
+        svg_content, health_metrics = cached["svg_content"], cached["health_metrics"]
+    else:
+        with span("glyph.history"):
+            commits = load_commit_arrays(repo_path)
+        with span("glyph.layout"):
+            layout = compute_layout(commits, max_points=max_points)
+        with span("glyph.render"):
+            svg_content = render_svg(layout)
+
+        # Analyze glyph health
+        with span("glyph.health"):
+            health_metrics = analyze_glyph_health(repo_path)
+
+        if key:
+            glyph_cache.put(key, {"svg_content": svg_content, "health_metrics": health_metrics})
+
     with open(output_path, "w") as f:
         f.write(svg_content)
-    print(f"Dummy Glyph saved to {output_path}")
-
-    # Analyze glyph health
-    health_metrics = analyze_glyph_health(repo_path)
+    print(f"Glyph saved to {output_path}")
 
     return svg_content, health_metrics
 
 if __name__ == "__main__":
     # This would typically be run by the GitHub Action
     # For local testing, you might pass arguments or set environment variables
-    repo_path = os.getenv("GITHUB_WORKSPACE", ".")
-    output_dir = os.path.join(repo_path, "glyphs")
+    from backend.mirrors import mirrors
+
+    workspace = os.getenv("GITHUB_WORKSPACE", ".")
+    # GITGLYPH_REPO (a path or remote URL) is analyzed instead of the workspace, from its local mirror if remote
+    repo_path = mirrors.resolve(os.getenv("GITGLYPH_REPO", workspace))
+    output_dir = os.path.join(workspace, "glyphs")
     os.makedirs(output_dir, exist_ok=True)
     output_file = os.path.join(output_dir, "latest_glyph.svg")
     svg_content, health_metrics = generate_glyph(repo_path, output_file)
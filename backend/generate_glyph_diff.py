@@ -1,18 +1,105 @@
-
 import os
 
-def generate_glyph_diff(repo_path, base_ref, head_ref, output_path):
+from backend.git_history import merge_base, resolve_revision
+from backend.glyph_cache import cache_key, glyph_cache
+from backend.glyph_layout import (
+    DEFAULT_HEIGHT,
+    DEFAULT_POINT_BUDGET,
+    DEFAULT_WIDTH,
+    compute_layout,
+    layout_from_json,
+    layout_to_json,
+    load_commit_arrays,
+    svg_elements,
+)
+
+# Bump whenever the rendered output changes so cached diffs are invalidated.
+RENDERER_VERSION = 2
+
+# Number of commits before the merge base drawn as (muted) context
+BASE_CONTEXT_COMMITS = int(os.getenv("GITGLYPH_DIFF_BASE_CONTEXT", 200))
+# Share of the width given to the base-side context
+BASE_SHARE = 0.4
+
+def base_side_layout(repo_path, merge_base_sha, width, height, context_commits=BASE_CONTEXT_COMMITS):
     """
-    Placeholder function to simulate Glyph Diff generation.
-    In a real scenario, this would analyze the diff between two refs
-    and render a visualization of the changes.
+    Layout of the `context_commits` commits leading up to the merge base.
+    It depends only on the merge base, so it is cached and shared by every
+    PR (and every push to a PR) that branches from the same commit.
+    """
+    params = {"context": context_commits, "width": width, "height": height}
+    key = cache_key("diff-base", [repo_path], [merge_base_sha], RENDERER_VERSION, params)
+    cached = glyph_cache.get(key)
+    if cached is not None:
+        return layout_from_json(cached)
+
+    commits = load_commit_arrays(repo_path, merge_base_sha, max_count=context_commits)
+    layout = compute_layout(commits, width=width, height=height)
+    glyph_cache.put(key, layout_to_json(layout))
+    return layout
+
+def render_diff_svg(base_layout, head_layout, merge_base_sha, summary, background="#0d1117"):
+    """Draws the muted base context on the left and the PR's commits on the right."""
+    base_width = base_layout["width"]
+    width = base_width + head_layout["width"]
+    height = head_layout["height"]
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" viewBox="0 0 {width} {height}">',
+        f'<rect width="{width}" height="{height}" fill="{background}" />',
+    ]
+    parts.extend(svg_elements(base_layout, muted=True))
+    parts.append(f'<line x1="{base_width}" y1="0" x2="{base_width}" y2="{height}" stroke="#d29922" stroke-width="1" stroke-dasharray="4 3" />')
+    parts.extend(svg_elements(head_layout, offset_x=base_width))
+    parts.append(
+        f'<text x="{base_width + 6}" y="14" fill="#8b949e" font-family="monospace" font-size="11">'
+        f'{merge_base_sha[:7]}: {summary["commits"]} commits, +{summary["lines_added"]} -{summary["lines_deleted"]}</text>'
+    )
+    parts.append('</svg>')
+    return "".join(parts)
+
+def generate_glyph_diff(repo_path, base_ref, head_ref, output_path, max_points=DEFAULT_POINT_BUDGET):
+    """
+    Generates a Glyph Diff for a pull request and writes it to `output_path`.
+    Only the commits in `merge-base..head` are walked, so the cost follows the size
+    of the PR rather than the repository's history; the base side is a short,
+    cached context strip ending at the merge base. Works on shallow clones as long
+    as they are deep enough to contain the merge base.
+    Results are cached by repository, merge base and head SHA.
     """
     print(f"Generating Glyph Diff for repository: {repo_path}")
     print(f"Comparing {base_ref} with {head_ref}")
-    # Simulate creating a dummy SVG file for the diff
+    base_sha = resolve_revision(repo_path, base_ref)
+    head_sha = resolve_revision(repo_path, head_ref)
+    if base_sha is None or head_sha is None:
+        raise RuntimeError(f"Could not resolve {base_ref if base_sha is None else head_ref} in {repo_path}")
+    merge_base_sha = merge_base(repo_path, base_sha, head_sha)
+    if merge_base_sha is None:
+        raise RuntimeError(f"No merge base between {base_ref} and {head_ref}; deepen the checkout and retry.")
+
+    params = {"max_points": max_points, "context": BASE_CONTEXT_COMMITS}
+    key = cache_key("diff", [repo_path], [merge_base_sha, head_sha], RENDERER_VERSION, params)
+    cached = glyph_cache.get(key)
+
+    if cached is not None:
+        svg_content = cached["svg_content"]
+    else:
+        base_width = int(DEFAULT_WIDTH * BASE_SHARE)
+        base_layout = base_side_layout(repo_path, merge_base_sha, base_width, DEFAULT_HEIGHT)
+
+        commits = load_commit_arrays(repo_path, f"{merge_base_sha}..{head_sha}")
+        head_layout = compute_layout(commits, width=DEFAULT_WIDTH - base_width, height=DEFAULT_HEIGHT, max_points=max_points)
+        summary = {
+            "commits": len(commits["sha"]),
+            "lines_added": int(commits["added"].sum()),
+            "lines_deleted": int(commits["deleted"].sum()),
+        }
+        svg_content = render_diff_svg(base_layout, head_layout, merge_base_sha, summary)
+        glyph_cache.put(key, {"svg_content": svg_content})
+
     with open(output_path, "w") as f:
-        f.write('<svg width="100" height="100"><circle cx="50" cy="50" r="40" stroke="black" stroke-width="3" fill="red" /></svg>')
-    print(f"Dummy Glyph Diff saved to {output_path}")
+        f.write(svg_content)
+    print(f"Glyph Diff saved to {output_path}")
+    return svg_content
 
 if __name__ == "__main__":
     # This would typically be run by the GitHub Action for PRs
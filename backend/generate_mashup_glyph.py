@@ -1,26 +1,81 @@
 
 import os
 
-def generate_mashup_glyph(repo_structure_path: str, repo_style_path: str, output_path: str):
+import numpy as np
+
+from backend.git_history import resolve_revision
+from backend.glyph_cache import cache_key, glyph_cache
+from backend.glyph_layout import DEFAULT_HEIGHT, DEFAULT_WIDTH, MARGIN, MAX_RADIUS, MIN_RADIUS, hsv_to_rgb, render_svg
+from backend.repo_profile import PROFILE_BINS, PROFILE_VERSION, get_profiles
+
+# Bump whenever the rendered output changes so cached mashups are invalidated.
+RENDERER_VERSION = 2
+
+def compose_mashup_layout(structure, style, width=DEFAULT_WIDTH, height=DEFAULT_HEIGHT):
+    """
+    Composes a glyph layout from the structure profile of one repository and the
+    style profile of another. One point is drawn per active (lane, time bin) cell:
+    - structure decides where points are and how large they are (commit density)
+    - style decides their colors (time of day, message mix), how sharply size
+      grows with density (churn spread) and how loosely they sit in their lane (cadence)
+    """
+    density = np.asarray(structure["density"], dtype=np.float64).reshape(-1, PROFILE_BINS)
+    lanes, bins = np.nonzero(density)
+    weight = density[lanes, bins]
+    lane_count = density.shape[0]
+    layout = {"width": width, "height": height, "aggregated": True, "lane_count": lane_count, "edges": np.zeros((0, 4))}
+
+    lane_height = (height - 2 * MARGIN) / max(lane_count, 1)
+    # Irregular cadence scatters points vertically within their lane
+    jitter = min(style["weekly_cv"], 1.0) * 0.35 * lane_height * np.sin(bins * 12.9898 + lanes * 78.233)
+    layout["x"] = MARGIN + (bins + 0.5) / PROFILE_BINS * (width - 2 * MARGIN)
+    layout["y"] = MARGIN + (lanes + 0.5) * lane_height + jitter
+
+    # Spread-out churn makes size contrast sharper
+    churn = style["churn_quantiles"]
+    exponent = 1.0 + (churn[-1] - churn[0]) / 2.0
+    layout["radius"] = MIN_RADIUS + (MAX_RADIUS - MIN_RADIUS) * weight ** (1.0 / exponent)
+
+    # Hues follow the style repository's time-of-day distribution
+    hours = np.asarray(style["hour_histogram"], dtype=np.float64)
+    cdf = np.cumsum(hours / hours.sum()) if hours.sum() > 0 else (np.arange(24) + 1) / 24
+    samples = (np.arange(len(weight)) * 0.6180339887) % 1.0
+    hour = np.minimum(np.searchsorted(cdf, samples, side="right"), 23)
+    mix = style["message_mix"]
+    saturation = np.full(len(weight), 0.35 + 0.6 * mix["feature"])
+    value = np.full(len(weight), 0.95 - 0.3 * mix["fix"])
+    layout["color"] = hsv_to_rgb(hour / 24.0, saturation, value)
+    layout["opacity"] = 0.55 + 0.4 * weight
+    return layout
+
+def generate_mashup_glyph(repo_structure_path: str, repo_style_path: str, output_path: str, max_workers=None):
     """
-    Placeholder function to simulate Glyph Mashup generation.
-    This would combine the structural elements from one repo
-    with the aesthetic elements from another.
+    Generates a Glyph Mashup: the branch topology and commit density of one repository
+    drawn with the churn, cadence and message style of another.
+    Both repositories are profiled once per HEAD SHA (in parallel when neither is cached and
+    `max_workers` allows it), so any further pairing of profiled repositories only pays for the composition.
+    Results are cached by both repositories and their HEAD SHAs.
     """
     print(f"Generating Mashup Glyph from structure: {repo_structure_path} and style: {repo_style_path}")
-    # Simulate creating a dummy SVG file for the mashup
-    # In a real implementation, this would involve complex logic
-    # to parse git history for structure and apply styles from another.
-    svg_content = f'''<svg width="200" height="200">
-        <rect x="0" y="0" width="200" height="200" fill="#f0f0f0"/>
-        <circle cx="100" cy="100" r="80" fill="#ffcc00" stroke="#333" stroke-width="5"/>
-        <text x="50%" y="50%" dominant-baseline="middle" text-anchor="middle" font-size="20" fill="#333">Mashup!</text>
-        <text x="50%" y="70%" dominant-baseline="middle" text-anchor="middle" font-size="12" fill="#666">Structure from {os.path.basename(repo_structure_path)}</text>
-        <text x="50%" y="80%" dominant-baseline="middle" text-anchor="middle" font-size="12" fill="#666">Style from {os.path.basename(repo_style_path)}</text>
-    </svg>'''
+    structure_sha = resolve_revision(repo_structure_path, "HEAD")
+    style_sha = resolve_revision(repo_style_path, "HEAD")
+    key = None
+    if structure_sha and style_sha:
+        key = cache_key("mashup", [repo_structure_path, repo_style_path], [structure_sha, style_sha], RENDERER_VERSION, {"profile_version": PROFILE_VERSION})
+        cached = glyph_cache.get(key)
+        if cached is not None:
+            with open(output_path, "w") as f:
+                f.write(cached["svg_content"])
+            return cached["svg_content"]
+
+    structure_profile, style_profile = get_profiles([repo_structure_path, repo_style_path], max_workers)
+    layout = compose_mashup_layout(structure_profile["structure"], style_profile["style"])
+    svg_content = render_svg(layout)
     with open(output_path, "w") as f:
         f.write(svg_content)
-    print(f"Dummy Mashup Glyph saved to {output_path}")
+    print(f"Mashup Glyph saved to {output_path}")
+    if key:
+        glyph_cache.put(key, {"svg_content": svg_content})
     return svg_content
 
 if __name__ == "__main__":
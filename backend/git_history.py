@@ -0,0 +1,228 @@
+import os
+import subprocess
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+
+# Record separator / field separator used in the `git log` format string.
+# Neither byte appears in commit metadata in practice, so they split the
+# stream unambiguously without needing NUL-terminated (-z) parsing.
+RECORD_SEP = "\x1e"
+FIELD_SEP = "\x1f"
+LOG_FORMAT = "%x1e%H%x1f%P%x1f%an%x1f%ae%x1f%at%x1f%B%x1f"
+
+
+def git_env(repo_path: str) -> dict:
+    """
+    Environment for git subprocesses that stops repository discovery at `repo_path`,
+    so a plain directory nested inside another checkout is never mistaken for it.
+    """
+    env = os.environ.copy()
+    env["GIT_CEILING_DIRECTORIES"] = os.path.dirname(os.path.realpath(repo_path))
+    return env
+
+
+class CommitRecord(NamedTuple):
+    sha: str
+    parents: Tuple[str, ...]
+    author_name: str
+    author_email: str
+    timestamp: int
+    message: str
+    files: List[Tuple[str, int, int]]  # (path, lines_added, lines_deleted)
+
+
+def git_log_command(
+    repo_path: str,
+    rev_range: str = "HEAD",
+    numstat: bool = True,
+    from_stdin: bool = False,
+    max_count: Optional[int] = None,
+) -> List[str]:
+    """
+    Builds the `git log` invocation used to stream commit records.
+    Diff options mirror GitPython's `Commit.stats` (first parent, no rename
+    detection) so file lists match what the per-commit API used to return.
+    With `from_stdin`, exactly the commits written to stdin are logged, in that order.
+    `max_count` stops the walk after that many commits.
+    """
+    command = ["git", "-C", repo_path, "log", "--no-color", f"--format={LOG_FORMAT}"]
+    if max_count is not None:
+        command.append(f"--max-count={max_count}")
+    if numstat:
+        command += ["--numstat", "--no-renames", "--diff-merges=first-parent"]
+    if from_stdin:
+        command += ["--no-walk=unsorted", "--stdin"]
+    else:
+        command.append(rev_range)
+    command.append("--")
+    return command
+
+
+def _parse_record(raw: str, numstat: bool) -> Optional[CommitRecord]:
+    header, sep, stat_block = raw.rpartition(FIELD_SEP)
+    if not sep:
+        return None
+    fields = header.split(FIELD_SEP, 5)
+    if len(fields) != 6:
+        return None
+    sha, parents, author_name, author_email, timestamp, message = fields
+
+    files = []
+    if numstat:
+        for line in stat_block.splitlines():
+            parts = line.split("\t", 2)
+            if len(parts) != 3:
+                continue
+            added = int(parts[0]) if parts[0] != "-" else 0
+            deleted = int(parts[1]) if parts[1] != "-" else 0
+            files.append((parts[2].strip(), added, deleted))
+
+    return CommitRecord(
+        sha=sha,
+        parents=tuple(parents.split()),
+        author_name=author_name,
+        author_email=author_email,
+        timestamp=int(timestamp or 0),
+        message=message,
+        files=files,
+    )
+
+
+def iter_commit_records(
+    repo_path: str,
+    rev_range: str = "HEAD",
+    numstat: bool = True,
+    revisions: Optional[List[str]] = None,
+    max_count: Optional[int] = None,
+) -> Iterator[CommitRecord]:
+    """
+    Streams commit records for `rev_range` from a single `git log` pipe,
+    newest first (the same order as `Repo.iter_commits()`).
+    If `revisions` is given, only those commits are logged, in the given order.
+    With `max_count`, only the newest `max_count` commits are streamed.
+    Nothing is buffered beyond the commit currently being parsed.
+    """
+    from_stdin = revisions is not None
+    process = subprocess.Popen(
+        git_log_command(repo_path, rev_range, numstat, from_stdin, max_count),
+        stdin=subprocess.PIPE if from_stdin else subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        env=git_env(repo_path),
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+    )
+    if from_stdin:
+        # git reads the whole revision list before it starts writing output.
+        process.stdin.write("".join(f"{sha}\n" for sha in revisions))
+        process.stdin.close()
+    try:
+        pending: List[str] = []
+        for line in process.stdout:
+            if line.startswith(RECORD_SEP):
+                if pending:
+                    record = _parse_record("".join(pending), numstat)
+                    if record is not None:
+                        yield record
+                pending = [line[1:]]
+            elif pending:
+                pending.append(line)
+        if pending:
+            record = _parse_record("".join(pending), numstat)
+            if record is not None:
+                yield record
+    finally:
+        process.stdout.close()
+        stderr = process.stderr.read()
+        process.stderr.close()
+        returncode = process.wait()
+    if returncode != 0:
+        raise RuntimeError(f"git log failed for {repo_path} ({rev_range}): {stderr.strip()}")
+
+
+def list_revisions(repo_path: str, rev_range: str = "HEAD") -> List[str]:
+    """Returns the SHAs in `rev_range`, newest first, without loading any commit data."""
+    result = subprocess.run(
+        ["git", "-C", repo_path, "rev-list", rev_range, "--"],
+        capture_output=True,
+        text=True,
+        env=git_env(repo_path),
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"git rev-list failed for {repo_path} ({rev_range}): {result.stderr.strip()}")
+    return result.stdout.split()
+
+
+def count_revisions(repo_path: str, rev_range: str = "HEAD") -> int:
+    """Returns the number of commits in `rev_range`."""
+    result = subprocess.run(
+        ["git", "-C", repo_path, "rev-list", "--count", rev_range, "--"],
+        capture_output=True,
+        text=True,
+        env=git_env(repo_path),
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"git rev-list failed for {repo_path} ({rev_range}): {result.stderr.strip()}")
+    return int(result.stdout.strip() or 0)
+
+
+def split_revisions(revisions: List[str], chunk_count: int) -> List[List[str]]:
+    """Splits `revisions` into at most `chunk_count` contiguous, order-preserving chunks."""
+    chunk_count = max(1, min(chunk_count, len(revisions)))
+    size, remainder = divmod(len(revisions), chunk_count)
+    chunks = []
+    start = 0
+    for i in range(chunk_count):
+        end = start + size + (1 if i < remainder else 0)
+        chunks.append(revisions[start:end])
+        start = end
+    return [chunk for chunk in chunks if chunk]
+
+
+def resolve_revision(repo_path: str, rev: str = "HEAD") -> Optional[str]:
+    """Returns the full SHA for `rev`, or None if it cannot be resolved (e.g. an empty repository)."""
+    result = subprocess.run(
+        ["git", "-C", repo_path, "rev-parse", "--verify", "--quiet", f"{rev}^{{commit}}"],
+        capture_output=True,
+        text=True,
+        env=git_env(repo_path),
+    )
+    if result.returncode != 0:
+        return None
+    return result.stdout.strip() or None
+
+
+def is_repository(repo_path: str) -> bool:
+    """True if `repo_path` is a Git repository (bare or not), including one without commits yet."""
+    result = subprocess.run(
+        ["git", "-C", repo_path, "rev-parse", "--git-dir"],
+        capture_output=True,
+        env=git_env(repo_path),
+    )
+    return result.returncode == 0
+
+
+def is_ancestor(repo_path: str, ancestor_sha: str, descendant_sha: str) -> bool:
+    """True if `ancestor_sha` exists and is reachable from `descendant_sha`."""
+    result = subprocess.run(
+        ["git", "-C", repo_path, "merge-base", "--is-ancestor", ancestor_sha, descendant_sha],
+        capture_output=True,
+        env=git_env(repo_path),
+    )
+    return result.returncode == 0
+
+
+def merge_base(repo_path: str, base: str, head: str) -> Optional[str]:
+    """
+    Returns the best common ancestor of `base` and `head`, or None when there is none
+    in the available history (unrelated histories, or a shallow clone not yet deep enough).
+    """
+    result = subprocess.run(
+        ["git", "-C", repo_path, "merge-base", base, head],
+        capture_output=True,
+        text=True,
+        env=git_env(repo_path),
+    )
+    if result.returncode != 0:
+        return None
+    return result.stdout.strip() or None
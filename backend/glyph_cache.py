@@ -0,0 +1,186 @@
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import zlib
+from collections import OrderedDict
+
+CACHE_DIR = os.getenv(
+    "GITGLYPH_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "gitglyph", "glyphs"),
+)
+MEMORY_BUDGET_BYTES = int(os.getenv("GITGLYPH_CACHE_MEMORY_BYTES", 64 * 1024 * 1024))
+DISK_BUDGET_BYTES = int(os.getenv("GITGLYPH_CACHE_DISK_BYTES", 1024 * 1024 * 1024))
+
+
+def cache_key(kind, repo_paths, shas, renderer_version, params=None):
+    """
+    Content-addressed key for a rendered artifact.
+    Repos are identified by their resolved path and pinned by commit SHA, so the key
+    changes whenever the history, the renderer or the render parameters change.
+    """
+    identity = {
+        "kind": kind,
+        "repos": [os.path.realpath(path) for path in repo_paths],
+        "shas": list(shas),
+        "renderer_version": renderer_version,
+        "params": params or {},
+    }
+    return hashlib.sha256(json.dumps(identity, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class GlyphCache:
+    """
+    Two-tier cache for rendered glyphs: an in-memory LRU bounded by bytes, backed by
+    gzip-compressed JSON files on disk bounded by a byte budget (least recently used first out).
+    Values must be JSON-serializable.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, memory_budget=MEMORY_BUDGET_BYTES, disk_budget=DISK_BUDGET_BYTES):
+        self.cache_dir = cache_dir
+        self.memory_budget = memory_budget
+        self.disk_budget = disk_budget
+        self._memory = OrderedDict() # key -> (value, size)
+        self._memory_bytes = 0
+        self._disk_bytes = None # Lazily measured on first write
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json.gz")
+
+    def get(self, key):
+        """Returns the cached value for `key`, or None."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+
+        path = self._path(key)
+        try:
+            with gzip.open(path, "rb") as f:
+                payload = f.read()
+            value = json.loads(payload)
+            os.utime(path) # Mark as recently used for disk eviction
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        except (OSError, EOFError, ValueError, zlib.error) as e:
+            # Truncated or corrupt entry (e.g. a crash mid-write on a filesystem without atomic rename)
+            print(f"Warning: discarding unreadable glyph cache entry {key}: {e}")
+            self._discard(path)
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+            self._remember(key, value, len(payload))
+        return value
+
+    def put(self, key, value):
+        """Stores `value` in both tiers."""
+        payload = json.dumps(value).encode("utf-8")
+        with self._lock:
+            self._remember(key, value, len(payload))
+        self._write_disk(key, payload)
+
+    def _remember(self, key, value, size):
+        if size > self.memory_budget:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= previous[1]
+        self._memory[key] = (value, size)
+        self._memory_bytes += size
+        while self._memory_bytes > self.memory_budget:
+            _, (_, evicted_size) = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted_size
+
+    def _discard(self, path):
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except OSError:
+            return
+        with self._lock:
+            if self._disk_bytes is not None:
+                self._disk_bytes -= size
+
+    def _write_disk(self, key, payload):
+        path = self._path(key)
+        tmp_path = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(gzip.compress(payload))
+            try:
+                replaced = os.path.getsize(path) # An entry being overwritten no longer counts
+            except FileNotFoundError:
+                replaced = 0
+            os.replace(tmp_path, path)
+            tmp_path = None
+            written = os.path.getsize(path)
+        except OSError as e:
+            print(f"Warning: could not write glyph cache entry {key}: {e}")
+            if tmp_path is not None:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+            return
+
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = self._measure_disk()[1]
+            else:
+                self._disk_bytes += written - replaced
+            over_budget = self._disk_bytes > self.disk_budget
+        if over_budget:
+            self.prune_disk()
+
+    def _measure_disk(self):
+        entries = []
+        total = 0
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(".json.gz"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+        return entries, total
+
+    def prune_disk(self):
+        """Deletes least recently used files until the disk tier is under 90% of its budget."""
+        entries, total = self._measure_disk()
+        target = self.disk_budget * 0.9
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        with self._lock:
+            self._disk_bytes = total
+
+    def clear_memory(self):
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+
+
+glyph_cache = GlyphCache()
@@ -0,0 +1,245 @@
+from array import array
+
+import numpy as np
+
+from backend.analysis_state import classify_message
+from backend.commit_table import empty_table, get_table, resolve_indices
+from backend.git_history import iter_commit_records, resolve_revision
+
+DEFAULT_WIDTH = 800
+DEFAULT_HEIGHT = 400
+DEFAULT_POINT_BUDGET = 5000
+DEFAULT_MAX_LANES = 12
+MIN_RADIUS = 1.5
+MAX_RADIUS = 9.0
+MARGIN = 20.0
+EMPTY_SHA = b"\0" * 40
+
+
+def load_commit_arrays(repo_path, rev_range="HEAD", max_count=None, message_kinds=False):
+    """
+    Loads commit history into columnar NumPy arrays, oldest commit first.
+    Parent links are resolved to row indices (-1 when absent or outside the range),
+    so every later layout step is a batched array operation.
+    With `max_count`, only the newest `max_count` commits of the range are loaded.
+    With `message_kinds`, a "kind" column holds each message's `classify_message` result.
+    The full history of a single revision is read from its memory-mapped commit table;
+    ranges and truncated histories walk `git log` instead.
+    """
+    if ".." not in rev_range and max_count is None:
+        table = get_table(repo_path, rev_range) or empty_table()
+        return table.commit_arrays(message_kinds=message_kinds)
+
+    shas = bytearray()
+    first_parents = bytearray()
+    second_parents = bytearray()
+    timestamps = array("q")
+    added = array("q")
+    deleted = array("q")
+    kinds = array("b")
+
+    if resolve_revision(repo_path, "HEAD") is not None:
+        for record in iter_commit_records(repo_path, rev_range, max_count=max_count):
+            shas += record.sha.encode("ascii")
+            parents = record.parents
+            first_parents += parents[0].encode("ascii") if parents else EMPTY_SHA
+            second_parents += parents[1].encode("ascii") if len(parents) > 1 else EMPTY_SHA
+            timestamps.append(record.timestamp)
+            added.append(sum(f[1] for f in record.files))
+            deleted.append(sum(f[2] for f in record.files))
+            if message_kinds:
+                kinds.append(classify_message(record.message))
+
+    # `git log` yields newest first; reverse everything into chronological order.
+    sha_array = np.frombuffer(bytes(shas), dtype="S40")[::-1]
+    commits = {
+        "sha": sha_array,
+        "timestamp": np.frombuffer(timestamps, dtype=np.int64)[::-1],
+        "added": np.frombuffer(added, dtype=np.int64)[::-1],
+        "deleted": np.frombuffer(deleted, dtype=np.int64)[::-1],
+    }
+    if message_kinds:
+        commits["kind"] = np.frombuffer(kinds, dtype=np.int8)[::-1]
+    commits["first_parent"] = resolve_indices(sha_array, np.frombuffer(bytes(first_parents), dtype="S40")[::-1])
+    commits["second_parent"] = resolve_indices(sha_array, np.frombuffer(bytes(second_parents), dtype="S40")[::-1])
+    return commits
+
+
+def assign_lanes(first_parent, max_lanes=DEFAULT_MAX_LANES):
+    """
+    Assigns each commit to a branch lane.
+    Every commit inherits the segment of its most recent first-parent child, and
+    segment roots are found by pointer jumping (O(log n) vectorized passes).
+    The HEAD segment is lane 0; other segments follow by recency, folded into `max_lanes`.
+    Returns (lanes, segment_ids).
+    """
+    n = len(first_parent)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    heir = np.full(n, -1, dtype=np.int64)
+    has_parent = first_parent >= 0
+    np.maximum.at(heir, first_parent[has_parent], np.flatnonzero(has_parent))
+
+    segment = np.where(heir >= 0, heir, np.arange(n))
+    while True:
+        jumped = segment[segment]
+        if np.array_equal(jumped, segment):
+            break
+        segment = jumped
+
+    tips, tip_rank = np.unique(segment, return_inverse=True)
+    lanes = (len(tips) - 1 - tip_rank) % max_lanes
+    return lanes.astype(np.int64), segment
+
+
+def hsv_to_rgb(hue, saturation, value):
+    """Vectorized HSV -> RGB conversion; all inputs in [0, 1], output uint8 (n, 3)."""
+    i = np.floor(hue * 6.0).astype(np.int64) % 6
+    f = hue * 6.0 - np.floor(hue * 6.0)
+    p = value * (1.0 - saturation)
+    q = value * (1.0 - f * saturation)
+    t = value * (1.0 - (1.0 - f) * saturation)
+    choices = [
+        np.stack([value, t, p], axis=-1),
+        np.stack([q, value, p], axis=-1),
+        np.stack([p, value, t], axis=-1),
+        np.stack([p, q, value], axis=-1),
+        np.stack([t, p, value], axis=-1),
+        np.stack([value, p, q], axis=-1),
+    ]
+    rgb = np.choose(i[:, None], choices)
+    return np.round(rgb * 255).astype(np.uint8)
+
+
+def _scale_log(values, low, high):
+    scaled = np.log1p(values.astype(np.float64))
+    peak = scaled.max() if len(scaled) else 0.0
+    if peak <= 0:
+        return np.full(len(values), low)
+    return low + (high - low) * scaled / peak
+
+
+def compute_layout(commits, width=DEFAULT_WIDTH, height=DEFAULT_HEIGHT, max_points=DEFAULT_POINT_BUDGET, max_lanes=DEFAULT_MAX_LANES):
+    """
+    Computes glyph geometry for the commit arrays from `load_commit_arrays`.
+    - x: commit time, y: branch lane
+    - radius: change size (lines added + deleted, log scaled)
+    - hue: time of day; saturation: how busy that day was
+    When there are more commits than `max_points`, commits are aggregated into
+    (time bin, lane) cells so the output never exceeds the point budget.
+    """
+    timestamps = commits["timestamp"]
+    n = len(timestamps)
+    layout = {"width": width, "height": height, "aggregated": False, "lane_count": 0}
+    if n == 0:
+        empty = np.zeros(0)
+        layout.update(x=empty, y=empty, radius=empty, color=np.zeros((0, 3), dtype=np.uint8), opacity=empty, edges=np.zeros((0, 4)))
+        return layout
+
+    lanes, _ = assign_lanes(commits["first_parent"], max_lanes)
+    lane_count = int(lanes.max()) + 1
+    layout["lane_count"] = lane_count
+
+    span = timestamps.max() - timestamps.min()
+    if span > 0:
+        position = (timestamps - timestamps.min()) / span
+    else:
+        position = np.arange(n) / max(n - 1, 1)
+
+    size = (commits["added"] + commits["deleted"]).astype(np.float64)
+    seconds_of_day = (timestamps % 86400) / 86400.0
+    _, day_index, day_counts = np.unique(timestamps // 86400, return_inverse=True, return_counts=True)
+    busyness = day_counts[day_index].astype(np.float64)
+    weight = np.ones(n)
+
+    if n > max_points:
+        bins_per_lane = max(1, max_points // lane_count)
+        time_bin = np.minimum((position * bins_per_lane).astype(np.int64), bins_per_lane - 1)
+        cells, cell_index = np.unique(time_bin * lane_count + lanes, return_inverse=True)
+        weight = np.bincount(cell_index).astype(np.float64)
+        position = np.bincount(cell_index, weights=position) / weight
+        size = np.bincount(cell_index, weights=size)
+        busyness = np.bincount(cell_index, weights=busyness) / weight
+        # Circular mean keeps 23:59 and 00:01 close together
+        angle = seconds_of_day * 2 * np.pi
+        seconds_of_day = (np.arctan2(
+            np.bincount(cell_index, weights=np.sin(angle)),
+            np.bincount(cell_index, weights=np.cos(angle)),
+        ) / (2 * np.pi)) % 1.0
+        lanes = cells % lane_count
+        layout["aggregated"] = True
+
+    lane_height = (height - 2 * MARGIN) / lane_count
+    layout["x"] = MARGIN + position * (width - 2 * MARGIN)
+    layout["y"] = MARGIN + (lanes + 0.5) * lane_height
+    layout["radius"] = _scale_log(size, MIN_RADIUS, MAX_RADIUS)
+    saturation = _scale_log(busyness, 0.35, 0.95)
+    layout["color"] = hsv_to_rgb(seconds_of_day, saturation, np.full(len(size), 0.9))
+    layout["opacity"] = _scale_log(weight, 0.85, 1.0) if layout["aggregated"] else np.full(len(size), 0.85)
+
+    if layout["aggregated"]:
+        layout["edges"] = np.zeros((0, 4))
+    else:
+        # Parent links that cross lanes draw the branch and merge strokes
+        children = np.concatenate([np.arange(n), np.arange(n)])
+        parents = np.concatenate([commits["first_parent"], commits["second_parent"]])
+        linked = parents >= 0
+        children, parents = children[linked], parents[linked]
+        x, y = layout["x"], layout["y"]
+        crossing = y[parents] != y[children]
+        children, parents = children[crossing], parents[crossing]
+        layout["edges"] = np.stack([x[parents], y[parents], x[children], y[children]], axis=-1)
+    return layout
+
+
+def layout_to_json(layout):
+    """Converts a layout to plain lists so it can be cached as JSON."""
+    return {name: value.tolist() if isinstance(value, np.ndarray) else value for name, value in layout.items()}
+
+
+def layout_from_json(data):
+    """Inverse of `layout_to_json`."""
+    layout = dict(data)
+    for name in ("x", "y", "radius", "opacity"):
+        layout[name] = np.asarray(data[name], dtype=np.float64)
+    layout["color"] = np.asarray(data["color"], dtype=np.uint8).reshape(-1, 3)
+    layout["edges"] = np.asarray(data["edges"], dtype=np.float64).reshape(-1, 4)
+    return layout
+
+
+def svg_elements(layout, offset_x=0.0, muted=False):
+    """
+    Yields the SVG elements of a layout (lane guides, branch strokes, commits),
+    shifted right by `offset_x`. Muted layouts draw every commit in grey.
+    """
+    width, height = layout["width"], layout["height"]
+    if layout["lane_count"]:
+        lane_height = (height - 2 * MARGIN) / layout["lane_count"]
+        yield '<g stroke="#30363d" stroke-width="1">'
+        for y in (MARGIN + (np.arange(layout["lane_count"]) + 0.5) * lane_height).tolist():
+            yield f'<line x1="{MARGIN + offset_x}" y1="{y:.2f}" x2="{width - MARGIN + offset_x}" y2="{y:.2f}" />'
+        yield '</g>'
+    if len(layout["edges"]):
+        edges = layout["edges"] + np.array([offset_x, 0.0, offset_x, 0.0])
+        yield '<g stroke="#8b949e" stroke-width="0.6" stroke-opacity="0.6">'
+        for x1, y1, x2, y2 in np.round(edges, 2).tolist():
+            yield f'<line x1="{x1:.2f}" y1="{y1:.2f}" x2="{x2:.2f}" y2="{y2:.2f}" />'
+        yield '</g>'
+    colors = np.broadcast_to(np.array([0x48, 0x4f, 0x58], dtype=np.uint8), layout["color"].shape) if muted else layout["color"]
+    for x, y, r, o, (red, green, blue) in zip(
+        (layout["x"] + offset_x).tolist(), layout["y"].tolist(), layout["radius"].tolist(), layout["opacity"].tolist(), colors.tolist()
+    ):
+        yield f'<circle cx="{x:.2f}" cy="{y:.2f}" r="{r:.2f}" fill="#{red:02x}{green:02x}{blue:02x}" fill-opacity="{o:.2f}" />'
+
+
+def render_svg(layout, background="#0d1117"):
+    """Serializes a layout to an SVG document string."""
+    width, height = layout["width"], layout["height"]
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" viewBox="0 0 {width} {height}">',
+        f'<rect width="{width}" height="{height}" fill="{background}" />',
+    ]
+    parts.extend(svg_elements(layout))
+    parts.append('</svg>')
+    return "".join(parts)
@@ -0,0 +1,195 @@
+import contextlib
+import contextvars
+import cProfile
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left
+
+# Histogram bucket upper bounds in seconds; history walks on large repositories can take minutes
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+# Profiling is only available when a dump directory is configured
+PROFILE_DIR = os.getenv("GITGLYPH_PROFILE_DIR")
+PROFILE_HEADER = "X-GitGlyph-Profile"
+
+STAGE_METRIC = "gitglyph_stage_duration_seconds"
+REQUEST_METRIC = "gitglyph_request_duration_seconds"
+COALESCE_METRIC = "gitglyph_analysis_calls_total"
+METRIC_HELP = {
+    STAGE_METRIC: "Time spent in each processing stage.",
+    REQUEST_METRIC: "HTTP request latency by route.",
+    COALESCE_METRIC: "Analysis calls by kind, either computed or coalesced into an identical in-flight call.",
+}
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1) # The last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """Thread-safe set of labelled histograms and counters, rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self._histograms = {} # (name, sorted label items) -> Histogram
+        self._counters = {} # (name, sorted label items) -> count
+        self._lock = threading.Lock()
+
+    def increment(self, name, labels, amount=1):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, labels, value):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def render(self):
+        lines = []
+        with self._lock:
+            names = sorted({name for name, _ in self._histograms})
+            for name in names:
+                lines.append(f"# HELP {name} {METRIC_HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} histogram")
+                for (metric, labels), histogram in sorted(self._histograms.items()):
+                    if metric != name:
+                        continue
+                    label_text = ",".join(f'{key}="{_escape(value)}"' for key, value in labels)
+                    prefix = f"{label_text}," if label_text else ""
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets + (float("inf"),), histogram.counts):
+                        cumulative += count
+                        le = "+Inf" if bound == float("inf") else repr(bound)
+                        lines.append(f'{name}_bucket{{{prefix}le="{le}"}} {cumulative}')
+                    lines.append(f"{name}_sum{{{label_text}}} {histogram.sum}")
+                    lines.append(f"{name}_count{{{label_text}}} {histogram.count}")
+            for name in sorted({name for name, _ in self._counters}):
+                lines.append(f"# HELP {name} {METRIC_HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} counter")
+                for (metric, labels), count in sorted(self._counters.items()):
+                    if metric == name:
+                        label_text = ",".join(f'{key}="{_escape(value)}"' for key, value in labels)
+                        lines.append(f"{name}{{{label_text}}} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+metrics = MetricsRegistry()
+
+# Spans recorded while a capture is active, so worker processes can ship them to the parent
+_captured_spans = contextvars.ContextVar("captured_spans", default=None)
+_profile_id = contextvars.ContextVar("profile_id", default=None)
+
+
+def record_span(stage, seconds):
+    metrics.observe(STAGE_METRIC, {"stage": stage}, seconds)
+    captured = _captured_spans.get()
+    if captured is not None:
+        captured.append((stage, seconds))
+
+
+def record_spans(spans):
+    """Adds spans collected by `capture_spans` in another process to this process's metrics."""
+    for stage, seconds in spans:
+        metrics.observe(STAGE_METRIC, {"stage": stage}, seconds)
+
+
+@contextlib.contextmanager
+def span(stage):
+    """Times the enclosed block as `stage`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_span(stage, time.perf_counter() - start)
+
+
+@contextlib.contextmanager
+def capture_spans():
+    """Yields a list that collects every span recorded in the enclosed block."""
+    spans = []
+    token = _captured_spans.set(spans)
+    try:
+        yield spans
+    finally:
+        _captured_spans.reset(token)
+
+
+def profiling_enabled():
+    return PROFILE_DIR is not None
+
+
+def current_profile_id():
+    """Identifier of the profiled request being handled in this context, or None."""
+    return _profile_id.get()
+
+
+@contextlib.contextmanager
+def profile_request(profile_id):
+    """Marks the enclosed block (and the jobs it submits) as part of profiled request `profile_id`."""
+    token = _profile_id.set(profile_id)
+    try:
+        yield
+    finally:
+        _profile_id.reset(token)
+
+
+def new_profile_id():
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+
+@contextlib.contextmanager
+def profiled(profile_id, name, async_aware=False):
+    """
+    Profiles the enclosed block and writes the result to PROFILE_DIR/<profile_id>-<name>.
+    With `async_aware` (a block awaited on the event loop), pyinstrument is used: HTML output that
+    follows awaits and only samples the profiled request's own context. Without pyinstrument such a
+    block is not profiled, since cProfile would record every request interleaved on the loop and
+    refuses to run twice in one thread. Otherwise cProfile is used (.prof, for `python -m pstats`
+    or snakeviz). A no-op without a profile id.
+    """
+    if profile_id is None or PROFILE_DIR is None:
+        yield
+        return
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = os.path.join(PROFILE_DIR, f"{profile_id}-{name}")
+
+    if async_aware:
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            yield
+            return
+        profiler = Profiler(async_mode="enabled")
+        profiler.start()
+        try:
+            yield
+        finally:
+            profiler.stop()
+            with open(f"{path}.html", "w") as f:
+                f.write(profiler.output_html())
+        return
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(f"{path}.prof")
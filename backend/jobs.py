@@ -0,0 +1,261 @@
+import asyncio
+import os
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+
+from backend.analysis import analyze_glyph_health
+from backend.coalesce import analysis_key, single_flight
+from backend.contributor_analysis import analyze_contributor_collaboration
+from backend.generate_mashup_glyph import generate_mashup_glyph
+from backend.instrumentation import capture_spans, current_profile_id, profiled, record_spans, span
+from backend.mirrors import mirrors
+from backend.nlp_analysis import suggest_goal_keywords
+from backend.notifications import dispatch_digest_batch
+from backend.org_analysis import analyze_organization
+from backend.rasterize import rasterizer
+
+MAX_WORKERS = int(os.getenv("GITGLYPH_JOB_WORKERS", os.cpu_count() or 1))
+# CPUs each job worker may use for a pool of its own, so nested pools never multiply the process count
+JOB_CPU_SHARE = max(1, (os.cpu_count() or 1) // MAX_WORKERS)
+MAX_ACTIVE_JOBS_PER_USER = int(os.getenv("GITGLYPH_JOB_PER_USER", 2))
+RESULT_TTL_SECONDS = int(os.getenv("GITGLYPH_JOB_RESULT_TTL", 15 * 60))
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (SUCCEEDED, FAILED, CANCELLED)
+
+
+def run_mashup_glyph(repo_structure_path, repo_style_path):
+    """
+    Worker entry point for mashup jobs; the output file is scoped to the worker, and profiles
+    are extracted within the worker's CPU share (in-process by default).
+    """
+    output_file = f"/tmp/mashup_glyph_{uuid.uuid4()}.svg"
+    return generate_mashup_glyph(repo_structure_path, repo_style_path, output_file, max_workers=JOB_CPU_SHARE)
+
+
+def run_org_analysis(repo_paths, **kwargs):
+    """Worker entry point for org analyses; the map step stays within the worker's CPU share (in-process by default)."""
+    return analyze_organization(repo_paths, max_workers=JOB_CPU_SHARE, **kwargs)
+
+
+# Job kinds that may be submitted. Targets run in worker processes (through `run_job`), so they must be importable top-level functions.
+JOB_KINDS = {
+    "contributor-constellation": analyze_contributor_collaboration,
+    "mashup-glyph": run_mashup_glyph,
+    "keyword-suggestions": suggest_goal_keywords,
+    "glyph-health": analyze_glyph_health,
+    "org-analysis": run_org_analysis,
+    "digest-batch": dispatch_digest_batch,
+}
+# Kinds whose first argument is a repository path; identical in-flight jobs of these kinds
+# (same repository HEAD and arguments) share one worker computation.
+COALESCED_KINDS = {"contributor-constellation", "glyph-health"}
+
+
+def init_worker():
+    """Runs once in every job worker: pools the worker opens stay within its CPU share."""
+    rasterizer.limit_workers(JOB_CPU_SHARE)
+
+
+def run_job(kind, profile_id, args, kwargs):
+    """
+    Worker entry point for every job: runs the job kind and returns (result, spans), so the
+    stage timings recorded in the worker end up in the parent's metrics. Jobs submitted by a
+    profiled request are profiled in the worker as well. Mirrors among the repository
+    arguments are held for reading, so they are not pruned while the job runs.
+    """
+    paths = [arg for arg in args if isinstance(arg, str)]
+    paths += [item for arg in args if isinstance(arg, list) for item in arg if isinstance(item, str)]
+    with mirrors.reading(*paths), capture_spans() as spans, profiled(profile_id, f"job-{kind}"):
+        with span(f"job.{kind}"):
+            result = JOB_KINDS[kind](*args, **kwargs)
+    return result, spans
+
+
+class JobLimitExceeded(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, kind, user_id):
+        self.id = str(uuid.uuid4())
+        self.kind = kind
+        self.user_id = user_id
+        self.status = QUEUED
+        self.created_at = time.time()
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self.future = None
+        self.coalesced = False # True when sharing an identical job's computation
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+            "coalesced": self.coalesced,
+        }
+
+
+class JobManager:
+    """
+    Runs heavy analyses in a bounded process pool, off the event loop.
+    Each user may have at most `per_user_limit` queued or running jobs, and
+    finished jobs (with their results) expire after `result_ttl` seconds.
+    """
+
+    def __init__(self, max_workers=MAX_WORKERS, per_user_limit=MAX_ACTIVE_JOBS_PER_USER, result_ttl=RESULT_TTL_SECONDS):
+        self.max_workers = max_workers
+        self.per_user_limit = per_user_limit
+        self.result_ttl = result_ttl
+        self._jobs = {}
+        self._reserved = Counter() # user_id -> slots held by work running outside the pool
+        self._lock = threading.Lock()
+        self._pool = None
+
+    def _executor(self):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers, initializer=init_worker)
+        return self._pool
+
+    async def submit(self, user_id, kind, *args, **kwargs):
+        """
+        Queues a job of `kind` for `user_id`; raises JobLimitExceeded past the per-user limit.
+        The coalescing key resolves the repository's HEAD with git, so it is computed in a thread.
+        """
+        if kind not in JOB_KINDS:
+            raise KeyError(kind)
+        key = None
+        if kind in COALESCED_KINDS:
+            key = await asyncio.to_thread(analysis_key, kind, args[0], {"args": args[1:], "kwargs": kwargs})
+        with self._lock:
+            self._check_limit(user_id)
+            job = Job(kind, user_id)
+            self._jobs[job.id] = job
+
+        start = lambda: self._executor().submit(run_job, kind, current_profile_id(), args, kwargs)
+        if key is not None:
+            job.future, computed = single_flight.submit(key, start)
+            job.coalesced = not computed
+        else:
+            job.future = start()
+        job.future.add_done_callback(lambda future, job=job: self._finish(job, future))
+        return job
+
+    def reserve(self, user_id):
+        """
+        Takes one of `user_id`'s job slots for work that runs outside the pool, such as a streamed
+        analysis; raises JobLimitExceeded past the per-user limit. Returns a function that gives
+        the slot back, which is safe to call more than once.
+        """
+        with self._lock:
+            self._check_limit(user_id)
+            self._reserved[user_id] += 1
+        released = threading.Event()
+
+        def release():
+            with self._lock:
+                if not released.is_set():
+                    released.set()
+                    self._reserved[user_id] -= 1
+        return release
+
+    def _check_limit(self, user_id):
+        self._expire()
+        active = self._reserved[user_id] + sum(1 for j in self._jobs.values() if j.user_id == user_id and self._occupies_worker(j))
+        if active >= self.per_user_limit:
+            raise JobLimitExceeded(f"User already has {active} active jobs (limit {self.per_user_limit}).")
+
+    @staticmethod
+    def _occupies_worker(job):
+        """
+        True while a job counts against its user's limit: until it finishes, and for a job
+        cancelled while running, until its worker is actually done with it.
+        """
+        if job.status not in FINISHED_STATES:
+            return True
+        return job.status == CANCELLED and job.future is not None and not job.future.done()
+
+    def _finish(self, job, future):
+        with self._lock:
+            if job.status == CANCELLED:
+                return
+            try:
+                job.result, spans = future.result()
+                if not job.coalesced:
+                    record_spans(spans) # Shared computations are timed once
+                job.status = SUCCEEDED
+            except CancelledError:
+                job.status = CANCELLED
+            except Exception as e:
+                job.error = str(e)
+                job.status = FAILED
+            job.finished_at = time.time()
+
+    def get(self, job_id):
+        """Returns the job, or None if unknown or expired. Refreshes queued/running status."""
+        with self._lock:
+            self._expire()
+            job = self._jobs.get(job_id)
+            if job is not None and job.status == QUEUED and job.future is not None and job.future.running():
+                job.status = RUNNING
+            return job
+
+    def cancel(self, job_id):
+        """
+        Cancels a job. Queued jobs never start; a job already running in a worker
+        process cannot be interrupted, so it is marked cancelled and its result discarded,
+        but keeps counting against the user's limit until the worker finishes it.
+        A computation shared with other coalesced jobs keeps running for them.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status in FINISHED_STATES:
+                return job
+            shared = any(other is not job and other.future is job.future and other.status not in FINISHED_STATES
+                         for other in self._jobs.values())
+            job.status = CANCELLED
+            job.finished_at = time.time()
+        # Outside the lock: cancelling a queued future runs its done callback (`_finish`) right away
+        if job.future is not None and not shared:
+            job.future.cancel()
+        return job
+
+    async def wait(self, job):
+        """Awaits a job's completion without blocking the event loop and returns its result."""
+        try:
+            waiter = asyncio.wrap_future(job.future)
+            # A caller going away must not cancel a computation other jobs may share
+            result, _ = await (asyncio.shield(waiter) if job.kind in COALESCED_KINDS else waiter)
+            return result
+        except asyncio.CancelledError:
+            # A job cancelled through the API resolves to no result; any other cancellation propagates
+            if job.future.cancelled():
+                return None
+            raise
+
+    def _expire(self):
+        cutoff = time.time() - self.result_ttl
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished_at is not None and job.finished_at < cutoff and not self._occupies_worker(job)]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+job_manager = JobManager()
@@ -4,80 +4,118 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi import HTTPException, Request
 from pydantic import BaseModel
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import List, Optional
 import uuid
 import os
+import json
+import asyncio
+import time
+import weakref
 from dotenv import load_dotenv
-from git import Repo, exc
 
 from starlette.config import Config
 from starlette.middleware.sessions import SessionMiddleware
-from starlette.responses import RedirectResponse
+from starlette.responses import RedirectResponse, Response, StreamingResponse
 from authlib.integrations.starlette_client import OAuth
 
-from backend.notifications import send_weekly_digest
-from backend.generate_mashup_glyph import generate_mashup_glyph
-from backend.nlp_analysis import analyze_commit_for_goal_progress
-from backend.contributor_analysis import analyze_contributor_collaboration
+from backend.notifications import send_weekly_digest, run_digest_schedule
+from backend.nlp_analysis import get_keyword_matcher, score_goals, NLTKUnavailable
+from backend.jobs import job_manager, JobLimitExceeded, FAILED, SUCCEEDED
+from backend.models import GlyphHealthMetrics, GlyphSnapshot, ProjectGoal, GlyphCollection
+from backend.storage import store
+from backend.contributor_analysis import stream_contributor_collaboration
+from backend.analysis import GRANULARITIES, SERIES_POINT_BUDGET
+from backend.rasterize import rasterizer
+from backend.mirrors import mirrors, MirrorError
+from backend.instrumentation import (
+    metrics, REQUEST_METRIC, PROFILE_HEADER, profiling_enabled, new_profile_id, profile_request, profiled,
+)
 
 load_dotenv()
 
-class GlyphHealthMetrics(BaseModel):
-    feature_to_fix_ratio: float
-    code_churn_volatility: float
-    commit_cadence: float
-    stability_graph_data: List[float]
-    development_tempo_data: List[float]
-
-class GlyphSnapshot(BaseModel):
-    timestamp: datetime
-    commit_hash: str
-    svg_content: str
-    health_metrics: Optional[GlyphHealthMetrics] = None
-
-class GlyphData(BaseModel):
-    svg_content: str
-    health_metrics: GlyphHealthMetrics
-    # Add other relevant data points like coordinates, colors, animation timings
-    # For now, we'll keep it simple with just SVG and health metrics
-
-class ProjectGoal(BaseModel):
-    id: str
-    collection_id: str
-    user_id: str
-    name: str
-    description: Optional[str] = None
-    target_date: Optional[datetime] = None
-    keywords: List[str] = []
-    progress: float = 0.0 # 0.0 to 1.0
-    created_at: datetime
-    updated_at: datetime
-
-class GlyphCollection(BaseModel):
-    id: str
-    user_id: str
-    name: str
-    description: Optional[str] = None
-    created_at: datetime
-    snapshots: List[GlyphSnapshot] = []
-    is_public: bool = False # New field for public API
-    user_email: Optional[str] = None # New field for notifications
-
-app = FastAPI()
+class BatchGoalProgressRequest(BaseModel):
+    goal_ids: List[str]
+    commit_messages: List[str]
 
-# In-memory storage for glyph collections and generated glyph data
-glyph_collections: Dict[str, GlyphCollection] = {}
-generated_glyphs: Dict[str, GlyphData] = {} # Stores the latest generated glyph data by collection_id
-project_goals: Dict[str, ProjectGoal] = {} # Stores project goals
+class OrgAnalysisRequest(BaseModel):
+    repo_paths: List[str]
+    min_weight: int = 1
+    top_k: Optional[int] = None
+    granularity: str = "week"
+    window: int = 4
+    max_points: int = SERIES_POINT_BUDGET
 
-# Simple API Key storage (for demonstration)
-API_KEYS = {"test_api_key": "user123"} # In a real app, this would be a database
+app = FastAPI()
 
-def get_api_key(request: Request):
-    api_key = request.headers.get("X-API-Key")
-    if not api_key or api_key not in API_KEYS:
-        raise HTTPException(status_code=403, detail="Could not validate API Key")
-    return api_key
+# Seconds between scheduled weekly digest batches; unset disables the scheduler
+DIGEST_INTERVAL_SECONDS = os.getenv("DIGEST_INTERVAL_SECONDS")
+# Seconds between checks of the digest schedule; the lease outlives a few missed checks
+DIGEST_POLL_SECONDS = float(os.getenv("DIGEST_POLL_SECONDS", 60))
+# Every uvicorn worker runs the schedule, but only the holder of this lease dispatches.
+# The same name records the last batch, so restarts do not reset the weekly timer.
+DIGEST_SCHEDULE_LEASE = "digest-schedule"
+digest_schedule_task = None
+
+@app.on_event("startup")
+async def start_digest_schedule():
+    global digest_schedule_task
+    if DIGEST_INTERVAL_SECONDS:
+        interval = float(DIGEST_INTERVAL_SECONDS)
+        holder = f"{os.getpid()}-{uuid.uuid4()}"
+        acquire_lease = lambda: store.acquire_lease(DIGEST_SCHEDULE_LEASE, holder, ttl=3 * DIGEST_POLL_SECONDS)
+        claim_run = lambda: store.claim_schedule_run(DIGEST_SCHEDULE_LEASE, interval)
+        digest_schedule_task = asyncio.create_task(run_digest_schedule(
+            store.list_digest_collections, interval, acquire_lease, claim_run, DIGEST_POLL_SECONDS))
+
+@app.on_event("shutdown")
+def shutdown_job_pool():
+    job_manager.shutdown()
+    rasterizer.shutdown()
+    if digest_schedule_task is not None:
+        digest_schedule_task.cancel()
+
+# Users (GitHub login or username) allowed to run administrative actions such as digest batches
+ADMIN_USERS = {user.strip() for user in os.getenv("GITGLYPH_ADMIN_USERS", "").split(",") if user.strip()}
+
+def check_top_k(top_k: Optional[int]):
+    """Rejects a link budget that would drop every link."""
+    if top_k is not None and top_k < 1:
+        raise HTTPException(status_code=400, detail="top_k must be at least 1.")
+
+async def resolve_repo_path(repo_path: str) -> str:
+    """Remote URLs are analyzed from a local bare mirror, cloned or fetched first; local paths are used as they are."""
+    if repo_path.startswith("-"):
+        raise HTTPException(status_code=400, detail="Repository paths and URLs must not start with '-'.")
+    try:
+        return await asyncio.to_thread(mirrors.resolve, repo_path)
+    except MirrorError as e:
+        raise HTTPException(status_code=400, detail=f"Could not mirror repository: {e}")
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    """
+    Records the latency of every request by route template and status code.
+    With GITGLYPH_PROFILE_DIR set, requests carrying `X-GitGlyph-Profile: 1` are also profiled
+    (the request itself only when pyinstrument is installed), together with the jobs they submit;
+    the dumps share the id returned in `X-GitGlyph-Profile-Id`.
+    """
+    profile_id = new_profile_id() if profiling_enabled() and request.headers.get(PROFILE_HEADER) == "1" else None
+    start = time.perf_counter()
+    status = 500
+    try:
+        with profile_request(profile_id), profiled(profile_id, "request", async_aware=True):
+            response = await call_next(request)
+        status = response.status_code
+    finally:
+        route = request.scope.get("route")
+        metrics.observe(REQUEST_METRIC, {
+            "method": request.method,
+            "route": route.path if route is not None else "unmatched",
+            "status": str(status),
+        }, time.perf_counter() - start)
+    if profile_id is not None:
+        response.headers[f"{PROFILE_HEADER}-Id"] = profile_id
+    return response
 
 # Configure CORS
 app.add_middleware(
@@ -117,6 +155,11 @@ oauth.register(
     client_kwargs={"scope": "read:user"},
 )
 
+@app.get("/metrics")
+async def get_metrics():
+    """Request latency and per-stage timing histograms in the Prometheus text format."""
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/")
 async def read_root():
     return {"message": "Welcome to GitGlyph API"}
@@ -180,7 +223,12 @@ async def create_glyph_collection(request: Request, collection: GlyphCollection)
 
     collection.id = str(uuid.uuid4())
     collection.created_at = datetime.now()
-    glyph_collections[collection.id] = collection
+    initial_snapshots = collection.snapshots
+    collection.snapshots = [] # Snapshot bodies are kept in the snapshot store, not inline
+    collection.snapshot_count = len(initial_snapshots)
+    store.save_collection(collection)
+    for snapshot in initial_snapshots:
+        store.add_snapshot(collection.id, snapshot)
     return {"message": "Glyph collection created successfully", "collection_id": collection.id}
 
 @app.get("/api/collections")
@@ -190,7 +238,9 @@ async def list_glyph_collections(request: Request):
     
     user_id = request.session["user_profile"].get("login") if request.session.get("provider") == "github" else request.session["user_profile"].get("username")
     
-    user_collections = [c for c in glyph_collections.values() if c.user_id == user_id]
+    user_collections = store.list_collections(user_id)
+    for collection in user_collections:
+        collection.snapshot_count = store.count_snapshots(collection.id)
     return user_collections
 
 @app.get("/api/collections/{collection_id}")
@@ -198,7 +248,7 @@ async def get_glyph_collection(collection_id: str, request: Request):
     if "user" not in request.session:
         raise HTTPException(status_code=401, detail="Not authenticated")
     
-    collection = glyph_collections.get(collection_id)
+    collection = store.get_collection(collection_id)
     if not collection:
         raise HTTPException(status_code=404, detail="Glyph collection not found")
     
@@ -206,6 +256,7 @@ async def get_glyph_collection(collection_id: str, request: Request):
     if collection.user_id != user_id:
         raise HTTPException(status_code=403, detail="Unauthorized to access this collection.")
     
+    collection.snapshot_count = store.count_snapshots(collection_id)
     return collection
 
 @app.put("/api/collections/{collection_id}")
@@ -213,7 +264,7 @@ async def update_glyph_collection(collection_id: str, request: Request, updated_
     if "user" not in request.session:
         raise HTTPException(status_code=401, detail="Not authenticated")
     
-    existing_collection = glyph_collections.get(collection_id)
+    existing_collection = store.get_collection(collection_id)
     if not existing_collection:
         raise HTTPException(status_code=404, detail="Glyph collection not found")
     
@@ -224,20 +275,90 @@ async def update_glyph_collection(collection_id: str, request: Request, updated_
     # Update fields that are allowed to be updated
     existing_collection.name = updated_collection.name
     existing_collection.description = updated_collection.description
-    existing_collection.snapshots = updated_collection.snapshots # This allows adding/removing snapshots
+    # Snapshots are added and removed through the /snapshots endpoints
     
     existing_collection.user_email = updated_collection.user_email # Allow updating user email for notifications
+    existing_collection.repo_path = updated_collection.repo_path
     
-    glyph_collections[collection_id] = existing_collection # Update in storage
+    store.save_collection(existing_collection) # Update in storage
+    existing_collection.snapshot_count = store.count_snapshots(collection_id)
     
     return {"message": "Glyph collection updated successfully", "collection": existing_collection}
 
+@app.post("/api/collections/{collection_id}/snapshots")
+async def add_glyph_snapshot(collection_id: str, request: Request, snapshot: GlyphSnapshot):
+    if "user" not in request.session:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    
+    collection = store.get_collection(collection_id)
+    if not collection:
+        raise HTTPException(status_code=404, detail="Glyph collection not found")
+    
+    user_id = request.session["user_profile"].get("login") if request.session.get("provider") == "github" else request.session["user_profile"].get("username")
+    if collection.user_id != user_id:
+        raise HTTPException(status_code=403, detail="Unauthorized to update this collection.")
+    
+    snapshot_info = store.add_snapshot(collection_id, snapshot)
+    return {"message": "Snapshot added successfully", "snapshot": snapshot_info}
+
+@app.get("/api/collections/{collection_id}/snapshots")
+async def list_glyph_snapshots(collection_id: str, request: Request, limit: int = 50, offset: int = 0, since: Optional[datetime] = None, until: Optional[datetime] = None):
+    if "user" not in request.session:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    
+    collection = store.get_collection(collection_id)
+    if not collection:
+        raise HTTPException(status_code=404, detail="Glyph collection not found")
+    
+    user_id = request.session["user_profile"].get("login") if request.session.get("provider") == "github" else request.session["user_profile"].get("username")
+    if collection.user_id != user_id:
+        raise HTTPException(status_code=403, detail="Unauthorized to access this collection.")
+    
+    # Metadata only; fetch a single snapshot for its SVG body
+    snapshots, total = store.list_snapshots(collection_id, limit=min(max(limit, 1), 500), offset=max(offset, 0), since=since, until=until)
+    return {"snapshots": snapshots, "total": total, "limit": limit, "offset": offset}
+
+@app.get("/api/collections/{collection_id}/snapshots/{snapshot_id}")
+async def get_glyph_snapshot(collection_id: str, snapshot_id: str, request: Request):
+    if "user" not in request.session:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    
+    collection = store.get_collection(collection_id)
+    if not collection:
+        raise HTTPException(status_code=404, detail="Glyph collection not found")
+    
+    user_id = request.session["user_profile"].get("login") if request.session.get("provider") == "github" else request.session["user_profile"].get("username")
+    if collection.user_id != user_id:
+        raise HTTPException(status_code=403, detail="Unauthorized to access this collection.")
+    
+    snapshot = store.get_snapshot(collection_id, snapshot_id)
+    if not snapshot:
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+    return snapshot
+
+@app.delete("/api/collections/{collection_id}/snapshots/{snapshot_id}")
+async def delete_glyph_snapshot(collection_id: str, snapshot_id: str, request: Request):
+    if "user" not in request.session:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    
+    collection = store.get_collection(collection_id)
+    if not collection:
+        raise HTTPException(status_code=404, detail="Glyph collection not found")
+    
+    user_id = request.session["user_profile"].get("login") if request.session.get("provider") == "github" else request.session["user_profile"].get("username")
+    if collection.user_id != user_id:
+        raise HTTPException(status_code=403, detail="Unauthorized to update this collection.")
+    
+    if not store.delete_snapshot(collection_id, snapshot_id):
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+    return {"message": "Snapshot deleted successfully"}
+
 @app.post("/api/collections/{collection_id}/send-digest")
 async def send_digest_notification(collection_id: str, background_tasks: BackgroundTasks, request: Request):
     if "user" not in request.session:
         raise HTTPException(status_code=401, detail="Not authenticated")
     
-    collection = glyph_collections.get(collection_id)
+    collection = store.get_collection(collection_id)
     if not collection:
         raise HTTPException(status_code=404, detail="Glyph collection not found")
     
@@ -248,27 +369,29 @@ async def send_digest_notification(collection_id: str, background_tasks: Backgro
     if not collection.user_email:
         raise HTTPException(status_code=400, detail="User email not set for this collection. Please update the collection with a user email.")
 
-    # In a real application, repo_path would be retrieved from the collection's metadata
-    # For this example, we'll use a dummy path.
-    dummy_repo_path = "./dummy_repo" 
-    if not os.path.exists(dummy_repo_path):
-        os.makedirs(dummy_repo_path)
-        # Simulate a git repo for analysis.py
-        try:
-            Repo.init(dummy_repo_path)
-            # Create a dummy commit
-            with open(os.path.join(dummy_repo_path, "test.txt"), "w") as f:
-                f.write("initial commit")
-            repo = Repo(dummy_repo_path)
-            repo.index.add(["test.txt"])
-            repo.index.commit("Initial commit for dummy repo")
-        except exc.InvalidGitRepositoryError:
-            pass # Already initialized or other issue
-    
-    background_tasks.add_task(send_weekly_digest, collection.user_email, collection.id, dummy_repo_path)
-    
+    if not collection.repo_path:
+        raise HTTPException(status_code=400, detail="No repository linked to this collection. Please update the collection with a repository path or URL.")
+
+    # Remote repositories are mirrored (or fetched) by the background task itself
+    background_tasks.add_task(send_weekly_digest, collection.user_email, collection.id, collection.repo_path)
     return {"message": "Weekly digest email scheduled successfully."}
 
+# Sends mail to every subscriber, so it is restricted to administrators; the stats are the job result
+@app.post("/api/digests/dispatch")
+async def dispatch_weekly_digests(request: Request):
+    if "user" not in request.session:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    user_id = request.session["user_profile"].get("login") if request.session.get("provider") == "github" else request.session["user_profile"].get("username")
+    if user_id not in ADMIN_USERS:
+        raise HTTPException(status_code=403, detail="Only administrators can dispatch digests to every subscriber.")
+    try:
+        job = await job_manager.submit(user_id, "digest-batch")
+    except JobLimitExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e))
+
+    return {"message": "Weekly digest batch submitted", "job": job.to_dict()}
+
 @app.post("/api/mashup-glyph")
 async def create_mashup_glyph(request: Request, repo_structure_path: str, repo_style_path: str):
     if "user" not in request.session:
@@ -277,8 +400,14 @@ async def create_mashup_glyph(request: Request, repo_structure_path: str, repo_s
     # In a real application, these paths would likely be associated with user's linked repositories
     # and validated for access.
     
-    output_file = f"/tmp/mashup_glyph_{uuid.uuid4()}.svg"
-    mashup_svg = generate_mashup_glyph(repo_structure_path, repo_style_path, output_file)
+    repo_structure_path = await resolve_repo_path(repo_structure_path)
+    repo_style_path = await resolve_repo_path(repo_style_path)
+    user_id = request.session["user_profile"].get("login") if request.session.get("provider") == "github" else request.session["user_profile"].get("username")
+    try:
+        job = await job_manager.submit(user_id, "mashup-glyph", repo_structure_path, repo_style_path)
+    except JobLimitExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    mashup_svg = await job_manager.wait(job)
     
     return {"message": "Mashup Glyph generated successfully", "svg_content": mashup_svg}
 
@@ -294,7 +423,7 @@ async def create_project_goal(request: Request, goal: ProjectGoal):
     goal.id = str(uuid.uuid4())
     goal.created_at = datetime.now()
     goal.updated_at = datetime.now()
-    project_goals[goal.id] = goal
+    store.save_goal(goal)
     return {"message": "Project goal created successfully", "goal_id": goal.id}
 
 @app.get("/api/goals/{goal_id}")
@@ -302,7 +431,7 @@ async def get_project_goal(goal_id: str, request: Request):
     if "user" not in request.session:
         raise HTTPException(status_code=401, detail="Not authenticated")
     
-    goal = project_goals.get(goal_id)
+    goal = store.get_goal(goal_id)
     if not goal:
         raise HTTPException(status_code=404, detail="Project goal not found")
     
@@ -317,7 +446,7 @@ async def update_project_goal(goal_id: str, request: Request, updated_goal: Proj
     if "user" not in request.session:
         raise HTTPException(status_code=401, detail="Not authenticated")
     
-    existing_goal = project_goals.get(goal_id)
+    existing_goal = store.get_goal(goal_id)
     if not existing_goal:
         raise HTTPException(status_code=404, detail="Project goal not found")
     
@@ -331,7 +460,7 @@ async def update_project_goal(goal_id: str, request: Request, updated_goal: Proj
     existing_goal.keywords = updated_goal.keywords
     existing_goal.updated_at = datetime.now()
     
-    project_goals[goal_id] = existing_goal
+    store.save_goal(existing_goal)
     
     return {"message": "Project goal updated successfully", "goal": existing_goal}
 
@@ -340,7 +469,7 @@ async def delete_project_goal(goal_id: str, request: Request):
     if "user" not in request.session:
         raise HTTPException(status_code=401, detail="Not authenticated")
     
-    goal = project_goals.get(goal_id)
+    goal = store.get_goal(goal_id)
     if not goal:
         raise HTTPException(status_code=404, detail="Project goal not found")
     
@@ -348,7 +477,7 @@ async def delete_project_goal(goal_id: str, request: Request):
     if goal.user_id != user_id:
         raise HTTPException(status_code=403, detail="Unauthorized to delete this goal.")
     
-    del project_goals[goal_id]
+    store.delete_goal(goal_id)
     
     return {"message": "Project goal deleted successfully"}
 
@@ -357,7 +486,7 @@ async def track_goal_progress(goal_id: str, request: Request, commit_messages: L
     if "user" not in request.session:
         raise HTTPException(status_code=401, detail="Not authenticated")
     
-    goal = project_goals.get(goal_id)
+    goal = store.get_goal(goal_id)
     if not goal:
         raise HTTPException(status_code=404, detail="Project goal not found")
     
@@ -365,9 +494,7 @@ async def track_goal_progress(goal_id: str, request: Request, commit_messages: L
     if goal.user_id != user_id:
         raise HTTPException(status_code=403, detail="Unauthorized to track progress for this goal.")
     
-    total_score = 0
-    for msg in commit_messages:
-        total_score += analyze_commit_for_goal_progress(msg, goal.keywords)
+    total_score = get_keyword_matcher(tuple(goal.keywords)).score_many(commit_messages)
     
     # Simple progress calculation: total score / (number of commits * max keywords per commit)
     # This needs to be refined based on how progress is truly measured.
@@ -377,22 +504,280 @@ async def track_goal_progress(goal_id: str, request: Request, commit_messages: L
     goal.progress = min(1.0, total_score / max_possible_score)
     goal.updated_at = datetime.now()
     
-    project_goals[goal_id] = goal
+    store.save_goal(goal)
     
     return {"message": "Goal progress updated successfully", "goal": goal}
 
+@app.post("/api/goals/batch-track-progress")
+async def batch_track_goal_progress(request: Request, batch: BatchGoalProgressRequest):
+    if "user" not in request.session:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    
+    user_id = request.session["user_profile"].get("login") if request.session.get("provider") == "github" else request.session["user_profile"].get("username")
+    goals = []
+    for goal_id in batch.goal_ids:
+        goal = store.get_goal(goal_id)
+        if not goal:
+            raise HTTPException(status_code=404, detail=f"Project goal {goal_id} not found")
+        if goal.user_id != user_id:
+            raise HTTPException(status_code=403, detail="Unauthorized to track progress for this goal.")
+        goals.append(goal)
+    
+    # All goals are scored against the messages in a single pass
+    total_scores = score_goals(batch.commit_messages, [goal.keywords for goal in goals])
+    
+    for goal, total_score in zip(goals, total_scores):
+        max_possible_score = len(batch.commit_messages) * len(goal.keywords) if len(goal.keywords) > 0 else 1
+        goal.progress = min(1.0, total_score / max_possible_score) if max_possible_score > 0 else 0.0
+        goal.updated_at = datetime.now()
+        store.save_goal(goal)
+    
+    return {"message": "Goal progress updated successfully", "goals": goals}
+
+@app.get("/api/keyword-suggestions")
+async def get_keyword_suggestions(repo_path: str, request: Request, top_n: int = 10):
+    if "user" not in request.session:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    if top_n < 1:
+        raise HTTPException(status_code=400, detail="top_n must be at least 1.")
+    
+    repo_path = await resolve_repo_path(repo_path)
+    if not os.path.exists(repo_path) or not os.path.isdir(repo_path):
+        raise HTTPException(status_code=400, detail="Invalid repository path provided.")
+    
+    user_id = request.session["user_profile"].get("login") if request.session.get("provider") == "github" else request.session["user_profile"].get("username")
+    try:
+        job = await job_manager.submit(user_id, "keyword-suggestions", repo_path, top_n)
+    except JobLimitExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    
+    try:
+        keywords = await job_manager.wait(job)
+        return {"keywords": keywords}
+    except NLTKUnavailable as e:
+        raise HTTPException(status_code=503, detail=f"Keyword suggestions are unavailable: {e}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error analyzing repository: {e}")
+
+async def run_glyph_health(request: Request, repo_path: str, granularity: str, window: int, max_points: Optional[int]):
+    if "user" not in request.session:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    repo_path = await resolve_repo_path(repo_path)
+    if not os.path.exists(repo_path) or not os.path.isdir(repo_path):
+        raise HTTPException(status_code=400, detail="Invalid repository path provided.")
+    if granularity not in GRANULARITIES:
+        raise HTTPException(status_code=400, detail=f"Unknown granularity '{granularity}', expected one of {list(GRANULARITIES)}.")
+
+    user_id = request.session["user_profile"].get("login") if request.session.get("provider") == "github" else request.session["user_profile"].get("username")
+    try:
+        job = await job_manager.submit(user_id, "glyph-health", repo_path, granularity, window, max_points)
+    except JobLimitExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e))
+
+    try:
+        return await job_manager.wait(job)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error analyzing repository: {e}")
+
+# Health series are downsampled to at most SERIES_POINT_BUDGET points by default;
+# the raw per-period series are only returned by the opt-in /full endpoint.
+@app.get("/api/glyph-health", response_model=GlyphHealthMetrics)
+async def get_glyph_health(repo_path: str, request: Request, granularity: str = "week", window: int = 4, max_points: int = SERIES_POINT_BUDGET):
+    return await run_glyph_health(request, repo_path, granularity, window, max(2, min(max_points, SERIES_POINT_BUDGET)))
+
+@app.get("/api/glyph-health/full", response_model=GlyphHealthMetrics)
+async def get_full_resolution_glyph_health(repo_path: str, request: Request, granularity: str = "week", window: int = 4):
+    return await run_glyph_health(request, repo_path, granularity, window, None)
+
 @app.get("/api/contributor-constellation")
-async def get_contributor_constellation(repo_path: str, request: Request):
+async def get_contributor_constellation(repo_path: str, request: Request, min_weight: int = 1, top_k: Optional[int] = None):
     if "user" not in request.session:
         raise HTTPException(status_code=401, detail="Not authenticated")
+    check_top_k(top_k)
     
     # In a real application, validate repo_path against user's linked repositories
     # and ensure it's a safe path. For now, we'll assume it's a valid, accessible path.
+    repo_path = await resolve_repo_path(repo_path)
     if not os.path.exists(repo_path) or not os.path.isdir(repo_path):
         raise HTTPException(status_code=400, detail="Invalid repository path provided.")
     
+    user_id = request.session["user_profile"].get("login") if request.session.get("provider") == "github" else request.session["user_profile"].get("username")
+    try:
+        job = await job_manager.submit(user_id, "contributor-constellation", repo_path, min_weight=min_weight, top_k=top_k)
+    except JobLimitExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e))
+
     try:
-        constellation_data = analyze_contributor_collaboration(repo_path)
+        constellation_data = await job_manager.wait(job)
         return constellation_data
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error analyzing repository: {e}")
+
+# Streamed constellations are sent as NDJSON lines or Server-Sent Events: 'nodes' and 'links'
+# frames to merge incrementally, periodic 'progress' frames and a final 'done' frame with the reconciled graph.
+STREAM_FORMATS = {"ndjson": "application/x-ndjson", "sse": "text/event-stream"}
+
+@app.get("/api/contributor-constellation/stream")
+async def stream_contributor_constellation(repo_path: str, request: Request, format: str = "ndjson", min_weight: int = 1, top_k: Optional[int] = None):
+    if "user" not in request.session:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    check_top_k(top_k)
+
+    repo_path = await resolve_repo_path(repo_path)
+    if not os.path.exists(repo_path) or not os.path.isdir(repo_path):
+        raise HTTPException(status_code=400, detail="Invalid repository path provided.")
+    if format not in STREAM_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown stream format '{format}', expected one of {list(STREAM_FORMATS)}.")
+
+    # The walk runs in this process, so an open stream holds one of the user's job slots
+    user_id = request.session["user_profile"].get("login") if request.session.get("provider") == "github" else request.session["user_profile"].get("username")
+    try:
+        release_slot = job_manager.reserve(user_id)
+    except JobLimitExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e))
+
+    def encode_frames():
+        # Runs in the threadpool, so the history walk never blocks the event loop
+        try:
+            with mirrors.reading(repo_path):
+                for frame in stream_contributor_collaboration(repo_path, min_weight=min_weight, top_k=top_k):
+                    yield encode_frame(frame)
+        except Exception as e:
+            yield encode_frame({"type": "error", "detail": f"Error analyzing repository: {e}"})
+        finally:
+            release_slot()
+
+    def encode_frame(frame):
+        if format == "sse":
+            return f"event: {frame['type']}\ndata: {json.dumps(frame)}\n\n"
+        return json.dumps(frame) + "\n"
+
+    frames = encode_frames()
+    # A stream that is never iterated (client gone before the response started) releases its slot when collected
+    weakref.finalize(frames, release_slot)
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return StreamingResponse(frames, media_type=STREAM_FORMATS[format], headers=headers)
+
+@app.post("/api/jobs/contributor-constellation")
+async def submit_contributor_constellation_job(repo_path: str, request: Request, min_weight: int = 1, top_k: Optional[int] = None):
+    if "user" not in request.session:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    check_top_k(top_k)
+    
+    repo_path = await resolve_repo_path(repo_path)
+    if not os.path.exists(repo_path) or not os.path.isdir(repo_path):
+        raise HTTPException(status_code=400, detail="Invalid repository path provided.")
+    
+    user_id = request.session["user_profile"].get("login") if request.session.get("provider") == "github" else request.session["user_profile"].get("username")
+    try:
+        job = await job_manager.submit(user_id, "contributor-constellation", repo_path, min_weight=min_weight, top_k=top_k)
+    except JobLimitExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    
+    return {"message": "Contributor constellation job submitted", "job": job.to_dict()}
+
+@app.post("/api/jobs/mashup-glyph")
+async def submit_mashup_glyph_job(request: Request, repo_structure_path: str, repo_style_path: str):
+    if "user" not in request.session:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    
+    repo_structure_path = await resolve_repo_path(repo_structure_path)
+    repo_style_path = await resolve_repo_path(repo_style_path)
+    user_id = request.session["user_profile"].get("login") if request.session.get("provider") == "github" else request.session["user_profile"].get("username")
+    try:
+        job = await job_manager.submit(user_id, "mashup-glyph", repo_structure_path, repo_style_path)
+    except JobLimitExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    
+    return {"message": "Mashup Glyph job submitted", "job": job.to_dict()}
+
+async def submit_org_analysis(request: Request, org: OrgAnalysisRequest):
+    if "user" not in request.session:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    if not org.repo_paths:
+        raise HTTPException(status_code=400, detail="At least one repository path is required.")
+    check_top_k(org.top_k)
+    try:
+        repo_paths = await asyncio.to_thread(mirrors.resolve_many, org.repo_paths)
+    except MirrorError as e:
+        raise HTTPException(status_code=400, detail=f"Could not mirror repository: {e}")
+    invalid = [path for path in repo_paths if not os.path.isdir(path)]
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"Invalid repository paths provided: {invalid}")
+    if org.granularity not in GRANULARITIES:
+        raise HTTPException(status_code=400, detail=f"Unknown granularity '{org.granularity}', expected one of {list(GRANULARITIES)}.")
+
+    user_id = request.session["user_profile"].get("login") if request.session.get("provider") == "github" else request.session["user_profile"].get("username")
+    try:
+        return await job_manager.submit(user_id, "org-analysis", repo_paths, min_weight=org.min_weight, top_k=org.top_k,
+                                        granularity=org.granularity, window=org.window,
+                                        max_points=max(2, min(org.max_points, SERIES_POINT_BUDGET)))
+    except JobLimitExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e))
+
+# Organization-wide health and constellation over many repositories, merged from per-repo partials
+@app.post("/api/org-analysis")
+async def analyze_organization_repos(request: Request, org: OrgAnalysisRequest):
+    job = await submit_org_analysis(request, org)
+    try:
+        return await job_manager.wait(job)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error analyzing organization: {e}")
+
+@app.post("/api/jobs/org-analysis")
+async def submit_org_analysis_job(request: Request, org: OrgAnalysisRequest):
+    job = await submit_org_analysis(request, org)
+    return {"message": "Organization analysis job submitted", "job": job.to_dict()}
+
+@app.get("/api/jobs/{job_id}")
+async def get_job_status(job_id: str, request: Request):
+    if "user" not in request.session:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    
+    job = job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    
+    user_id = request.session["user_profile"].get("login") if request.session.get("provider") == "github" else request.session["user_profile"].get("username")
+    if job.user_id != user_id:
+        raise HTTPException(status_code=403, detail="Unauthorized to access this job.")
+    
+    return job.to_dict()
+
+@app.get("/api/jobs/{job_id}/result")
+async def get_job_result(job_id: str, request: Request):
+    if "user" not in request.session:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    
+    job = job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    
+    user_id = request.session["user_profile"].get("login") if request.session.get("provider") == "github" else request.session["user_profile"].get("username")
+    if job.user_id != user_id:
+        raise HTTPException(status_code=403, detail="Unauthorized to access this job.")
+    
+    if job.status == FAILED:
+        raise HTTPException(status_code=500, detail=f"Job failed: {job.error}")
+    if job.status != SUCCEEDED:
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}; no result available.")
+    
+    return {"job": job.to_dict(), "result": job.result}
+
+@app.delete("/api/jobs/{job_id}")
+async def cancel_job(job_id: str, request: Request):
+    if "user" not in request.session:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    
+    job = job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    
+    user_id = request.session["user_profile"].get("login") if request.session.get("provider") == "github" else request.session["user_profile"].get("username")
+    if job.user_id != user_id:
+        raise HTTPException(status_code=403, detail="Unauthorized to cancel this job.")
+    
+    job = job_manager.cancel(job_id)
+    return {"message": "Job cancelled", "job": job.to_dict()}
@@ -0,0 +1,254 @@
+import argparse
+import fcntl
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+
+from backend.instrumentation import span
+
+MIRROR_DIR = os.getenv(
+    "GITGLYPH_MIRROR_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "gitglyph", "mirrors"),
+)
+MIRROR_DISK_BUDGET_BYTES = int(os.getenv("GITGLYPH_MIRROR_DISK_BYTES", 10 * 1024 * 1024 * 1024))
+# A mirror fetched less than this many seconds ago is used as it is
+FETCH_INTERVAL_SECONDS = float(os.getenv("GITGLYPH_MIRROR_FETCH_INTERVAL", 60))
+# Mirrors used more recently are never pruned: covers the gap between resolving a mirror and `reading` it
+PRUNE_GRACE_SECONDS = float(os.getenv("GITGLYPH_MIRROR_PRUNE_GRACE", 600))
+# Only branches and tags are mirrored; hosting-specific refs (pull requests, notes) are skipped
+FETCH_REFSPECS = ("+refs/heads/*:refs/heads/*", "+refs/tags/*:refs/tags/*")
+METADATA_FILE = "gitglyph-mirror.json"
+# URLs (https://, ssh://, file://, ...) and scp-like remotes (git@host:owner/repo.git)
+REMOTE_PATTERN = re.compile(r"^([a-z][a-z0-9+.-]*://|[\w.-]+@[\w.-]+:)", re.IGNORECASE)
+
+
+class MirrorError(Exception):
+    pass
+
+
+def is_remote(repo):
+    """True if `repo` names a remote to mirror rather than a local repository path."""
+    return bool(REMOTE_PATTERN.match(repo))
+
+
+def _git(args, cwd=None):
+    result = subprocess.run(["git", *args], cwd=cwd, capture_output=True, text=True,
+                            env=dict(os.environ, GIT_TERMINAL_PROMPT="0"))
+    if result.returncode != 0:
+        raise MirrorError(f"git {args[0]} failed: {result.stderr.strip()}")
+    return result.stdout
+
+
+def _directory_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+class MirrorManager:
+    """
+    Keeps one bare mirror per remote repository under `mirror_dir` and hands out its path,
+    which every analysis accepts in place of a working-tree checkout.
+    - The first use clones the remote; later uses run an incremental `git fetch` at most once
+      per `fetch_interval` seconds, so only new objects are transferred.
+    - Mirrors are evicted least recently used first once they exceed `disk_budget` bytes,
+      skipping those used within `prune_grace` seconds and those being fetched or read.
+    Per-mirror file locks serialize clones and fetches (`<mirror>.lock`) and mark readers
+    (`<mirror>.readers`, shared) across threads and worker processes.
+    """
+
+    def __init__(self, mirror_dir=MIRROR_DIR, disk_budget=MIRROR_DISK_BUDGET_BYTES, fetch_interval=FETCH_INTERVAL_SECONDS,
+                 prune_grace=PRUNE_GRACE_SECONDS):
+        self.mirror_dir = mirror_dir
+        self.disk_budget = disk_budget
+        self.fetch_interval = fetch_interval
+        self.prune_grace = prune_grace
+
+    def mirror_path(self, url):
+        """Location of the mirror for `url`: a readable name plus a digest of the full URL."""
+        name = re.sub(r"[^\w.-]", "_", os.path.basename(url.rstrip("/")))
+        name = name[:-4] if name.endswith(".git") else name
+        digest = hashlib.sha1(url.encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.mirror_dir, f"{name}-{digest}.git")
+
+    def _read_metadata(self, path):
+        try:
+            with open(os.path.join(path, METADATA_FILE)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_metadata(self, path, metadata):
+        fd, tmp_path = tempfile.mkstemp(dir=path, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(metadata, f)
+        os.replace(tmp_path, os.path.join(path, METADATA_FILE))
+
+    def _lock(self, path, suffix=".lock", mode=fcntl.LOCK_EX):
+        """
+        Opens and flocks `<path><suffix>`; returns the open file, which holds the lock until closed.
+        Lock files are never deleted, so every process always locks the same file.
+        With LOCK_NB in `mode`, raises BlockingIOError instead of waiting.
+        """
+        os.makedirs(self.mirror_dir, exist_ok=True)
+        lock_file = open(f"{path}{suffix}", "a")
+        try:
+            fcntl.flock(lock_file, mode)
+        except BaseException:
+            lock_file.close()
+            raise
+        return lock_file
+
+    def is_mirror(self, path):
+        return path.endswith(".git") and os.path.dirname(os.path.realpath(path)) == os.path.realpath(self.mirror_dir)
+
+    @contextmanager
+    def reading(self, *paths):
+        """
+        Holds a shared lock on every mirror among `paths` (other paths are ignored) while the caller
+        reads it, so `prune` never removes a mirror in use. Raises MirrorError if one is already gone.
+        """
+        with ExitStack() as stack:
+            for path in paths:
+                if not self.is_mirror(path):
+                    continue
+                stack.enter_context(self._lock(path, ".readers", fcntl.LOCK_SH))
+                if not os.path.isdir(path):
+                    raise MirrorError(f"Mirror {path} was evicted; resolve the repository again")
+            yield
+
+    def _clone(self, url, path):
+        # Cloned next to its final location and renamed, so a failed clone never looks like a mirror
+        tmp_path = tempfile.mkdtemp(dir=self.mirror_dir, suffix=".clone")
+        try:
+            _git(["clone", "--bare", "--quiet", "--", url, tmp_path])
+            for refspec in FETCH_REFSPECS:
+                _git(["config", "--add", "remote.origin.fetch", refspec], cwd=tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            raise
+
+    def ensure(self, url, fetch=True):
+        """
+        Returns the path of an up-to-date bare mirror of `url`, cloning it on first use and
+        otherwise fetching incrementally (unless fetched within `fetch_interval`, or `fetch` is False).
+        Raises MirrorError if the remote cannot be cloned or fetched.
+        """
+        if url.startswith("-"):
+            raise MirrorError(f"Invalid repository URL '{url}'") # Would be parsed as a git option
+        path = self.mirror_path(url)
+        lock_file = self._lock(path)
+        try:
+            metadata = self._read_metadata(path)
+            now = time.time()
+            updated = True
+            if metadata is None:
+                if os.path.exists(path):
+                    shutil.rmtree(path) # Left over from an interrupted clone
+                with span("mirror.clone"):
+                    self._clone(url, path)
+                metadata = {"url": url, "last_fetched": now}
+            elif fetch and now - metadata["last_fetched"] >= self.fetch_interval:
+                with span("mirror.fetch"):
+                    _git(["fetch", "--prune", "--quiet", "origin"], cwd=path)
+                metadata["last_fetched"] = now
+            else:
+                updated = False
+            metadata["last_used"] = now
+            if updated:
+                metadata["size"] = _directory_size(path)
+            self._write_metadata(path, metadata)
+        finally:
+            lock_file.close()
+        if updated:
+            self.prune(keep=(path,))
+        return path
+
+    def resolve(self, repo):
+        """Maps a remote URL to its mirror path; local repository paths are returned unchanged."""
+        if repo.startswith("-"):
+            raise MirrorError(f"Invalid repository '{repo}'")
+        return self.ensure(repo) if is_remote(repo) else repo
+
+    def resolve_many(self, repos, max_workers=8):
+        """`resolve` for many repositories, fetching up to `max_workers` mirrors at a time."""
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            return list(pool.map(self.resolve, repos))
+
+    def list(self):
+        """Metadata of every mirror (url, last_used, last_fetched, size) with its path, least recently used first."""
+        mirrors = []
+        if not os.path.isdir(self.mirror_dir):
+            return mirrors
+        for name in os.listdir(self.mirror_dir):
+            path = os.path.join(self.mirror_dir, name)
+            metadata = self._read_metadata(path) if name.endswith(".git") else None
+            if metadata is not None:
+                mirrors.append(dict(metadata, path=path))
+        return sorted(mirrors, key=lambda mirror: mirror["last_used"])
+
+    def remove(self, path, wait=True):
+        """
+        Removes a mirror once it is neither being fetched nor read. Without `wait`, a mirror in use
+        is left alone and False is returned.
+        """
+        mode = fcntl.LOCK_EX if wait else fcntl.LOCK_EX | fcntl.LOCK_NB
+        with ExitStack() as stack:
+            try:
+                stack.enter_context(self._lock(path, ".lock", mode))
+                stack.enter_context(self._lock(path, ".readers", mode))
+            except BlockingIOError:
+                return False
+            shutil.rmtree(path, ignore_errors=True)
+        return True
+
+    def prune(self, keep=()):
+        """
+        Removes least recently used mirrors, never those in `keep`, used within `prune_grace`
+        seconds, or being fetched or read, until the rest fit the disk budget.
+        """
+        mirrors = self.list()
+        total = sum(mirror.get("size", 0) for mirror in mirrors)
+        recent = time.time() - self.prune_grace
+        for mirror in mirrors:
+            if total <= self.disk_budget:
+                break
+            if mirror["path"] in keep or mirror["last_used"] > recent:
+                continue
+            if self.remove(mirror["path"], wait=False):
+                total -= mirror.get("size", 0)
+        return total
+
+
+mirrors = MirrorManager()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the bare mirrors GitGlyph analyzes remote repositories from.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    ensure_parser = commands.add_parser("ensure", help="Clone or incrementally fetch a mirror and print its path.")
+    ensure_parser.add_argument("url")
+    commands.add_parser("list", help="List mirrors, least recently used first.")
+    commands.add_parser("prune", help="Evict mirrors beyond the disk budget.")
+    args = parser.parse_args()
+
+    if args.command == "ensure":
+        print(mirrors.ensure(args.url))
+    elif args.command == "list":
+        for mirror in mirrors.list():
+            print(f"{mirror['path']}\t{mirror.get('size', 0)}\t{mirror['url']}")
+    else:
+        print(f"{mirrors.prune()} bytes in use")
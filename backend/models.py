@@ -0,0 +1,58 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import List, Optional
+
+class GlyphHealthMetrics(BaseModel):
+    feature_to_fix_ratio: float
+    code_churn_volatility: float
+    commit_cadence: float
+    stability_graph_data: List[float]
+    development_tempo_data: List[float]
+    # Period index of each point when a series was downsampled; None means one point per period
+    stability_graph_index: Optional[List[int]] = None
+    development_tempo_index: Optional[List[int]] = None
+
+class GlyphSnapshot(BaseModel):
+    timestamp: datetime
+    commit_hash: str
+    svg_content: str
+    health_metrics: Optional[GlyphHealthMetrics] = None
+
+class GlyphSnapshotInfo(BaseModel):
+    # Snapshot metadata without the SVG body, as returned by snapshot listings
+    id: str
+    collection_id: str
+    timestamp: datetime
+    commit_hash: str
+    content_hash: str
+    health_metrics: Optional[GlyphHealthMetrics] = None
+
+class GlyphData(BaseModel):
+    svg_content: str
+    health_metrics: GlyphHealthMetrics
+    # Add other relevant data points like coordinates, colors, animation timings
+    # For now, we'll keep it simple with just SVG and health metrics
+
+class ProjectGoal(BaseModel):
+    id: str
+    collection_id: str
+    user_id: str
+    name: str
+    description: Optional[str] = None
+    target_date: Optional[datetime] = None
+    keywords: List[str] = []
+    progress: float = 0.0 # 0.0 to 1.0
+    created_at: datetime
+    updated_at: datetime
+
+class GlyphCollection(BaseModel):
+    id: str
+    user_id: str
+    name: str
+    description: Optional[str] = None
+    created_at: datetime
+    snapshots: List[GlyphSnapshot] = [] # Only accepted on creation; snapshots live in the snapshot store
+    snapshot_count: int = 0
+    is_public: bool = False # New field for public API
+    user_email: Optional[str] = None # New field for notifications
+    repo_path: Optional[str] = None # Repository analyzed for digests: a local path or a remote URL (mirrored)
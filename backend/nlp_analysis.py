@@ -1,46 +1,200 @@
-
-import nltk
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
+from array import array
 from collections import Counter
+from functools import lru_cache
 import re
+import threading
+
+import numpy as np
+
+# NLTK data needed on first use: resource path -> downloader package
+NLTK_RESOURCES = {
+    'corpora/stopwords': 'stopwords',
+    'tokenizers/punkt': 'punkt',
+}
+_nltk_lock = threading.Lock()
+_nltk_ready = False
 
-# Download necessary NLTK data (run once)
-try:
-    nltk.data.find('corpora/stopwords')
-except nltk.downloader.DownloadError:
-    nltk.download('stopwords')
-try:
-    nltk.data.find('tokenizers/punkt')
-except nltk.downloader.DownloadError:
-    nltk.download('punkt')
+class NLTKUnavailable(Exception):
+    pass
+
+def ensure_nltk_resources():
+    """
+    Makes sure the NLTK corpora are available, downloading them on first use only.
+    Importing this module stays cheap; workers that never extract keywords never touch NLTK.
+    Raises NLTKUnavailable if a corpus is still missing after the download attempt;
+    the next call tries again.
+    """
+    global _nltk_ready
+    if _nltk_ready:
+        return
+    with _nltk_lock:
+        if _nltk_ready:
+            return
+        import nltk
+        for resource, package in NLTK_RESOURCES.items():
+            try:
+                nltk.data.find(resource)
+            except LookupError:
+                nltk.download(package, quiet=True)
+                try:
+                    nltk.data.find(resource)
+                except LookupError:
+                    raise NLTKUnavailable(f"NLTK data '{package}' is not installed and could not be downloaded") from None
+        _nltk_ready = True
+
+@lru_cache(maxsize=1)
+def get_stop_words() -> frozenset[str]:
+    """English stop words, loaded once and shared by every caller."""
+    ensure_nltk_resources()
+    from nltk.corpus import stopwords
+    return frozenset(stopwords.words('english'))
 
 def extract_keywords(text: str) -> list[str]:
     """
     Extracts keywords from a given text using NLTK.
     """
-    stop_words = set(stopwords.words('english'))
+    from nltk.tokenize import word_tokenize
+
+    stop_words = get_stop_words()
     word_tokens = word_tokenize(text.lower())
     
     # Filter out stop words and non-alphabetic tokens
     filtered_words = [w for w in word_tokens if w.isalpha() and w not in stop_words]
     
     # Simple frequency-based keyword extraction
-    # In a real scenario, you might use TF-IDF or other more advanced techniques
+    # For a whole repository history, use extract_corpus_keywords (TF-IDF) instead
     word_counts = Counter(filtered_words)
     return [word for word, count in word_counts.most_common(5)] # Return top 5 keywords
 
+# Alphabetic runs, matching the `isalpha` filter used by extract_keywords
+WORD_PATTERN = re.compile(r"[^\W\d_]+")
+
+def extract_corpus_keywords(messages, top_n: int = 10) -> list[str]:
+    """
+    Extracts keywords from a stream of commit messages with TF-IDF, treating each message as a document.
+    Messages are consumed one at a time into compact term-id arrays, then term frequencies,
+    document frequencies and the per-term score (sum of L2-normalized TF-IDF weights) are
+    computed in one vectorized pass. A regex tokenizer replaces word_tokenize to keep
+    100k-message histories fast. Raises ValueError unless `top_n` is at least 1.
+    """
+    if top_n < 1:
+        raise ValueError(f"top_n must be at least 1, got {top_n}")
+    stop_words = get_stop_words()
+    vocabulary = {}
+    term_ids = array('i')
+    doc_ids = array('i')
+    doc_count = 0
+
+    for message in messages:
+        for word in WORD_PATTERN.findall(message.lower()):
+            if len(word) < 2 or word in stop_words:
+                continue
+            term_ids.append(vocabulary.setdefault(word, len(vocabulary)))
+            doc_ids.append(doc_count)
+        doc_count += 1
+
+    if not vocabulary:
+        return []
+
+    terms = np.frombuffer(term_ids, dtype=np.int32).astype(np.int64)
+    docs = np.frombuffer(doc_ids, dtype=np.int32).astype(np.int64)
+    vocab_size = len(vocabulary)
+
+    # Term frequency per (document, term) pair
+    pairs, tf = np.unique(docs * vocab_size + terms, return_counts=True)
+    pair_docs = pairs // vocab_size
+    pair_terms = pairs % vocab_size
+
+    df = np.bincount(pair_terms, minlength=vocab_size)
+    idf = np.log((1 + doc_count) / (1 + df)) + 1.0
+    weights = tf * idf[pair_terms]
+
+    norms = np.sqrt(np.bincount(pair_docs, weights=weights * weights, minlength=doc_count))
+    scores = np.bincount(pair_terms, weights=weights / norms[pair_docs], minlength=vocab_size)
+
+    top_n = min(top_n, vocab_size)
+    best = np.argpartition(-scores, top_n - 1)[:top_n]
+    best = best[np.argsort(-scores[best], kind='stable')]
+    words = np.empty(vocab_size, dtype=object)
+    for word, term_id in vocabulary.items():
+        words[term_id] = word
+    return words[best].tolist()
+
+def suggest_goal_keywords(repo_path: str, top_n: int = 10) -> list[str]:
+    """Suggests goal keywords for a repository from TF-IDF over its whole commit-message history."""
+    from backend.commit_table import get_table
+
+    table = get_table(repo_path)
+    return extract_corpus_keywords(table.messages() if table is not None else [], top_n)
+
+class KeywordMatcher:
+    """
+    Matches a set of goal keywords against commit messages in a single regex scan.
+    Equivalent to searching each keyword as a whole word: every keyword found counts once
+    per occurrence in the keyword list, however often it appears in the message.
+    """
+
+    def __init__(self, keywords):
+        self.weights = Counter(keyword.lower() for keyword in keywords)
+        # Longest first, inside a lookahead, so overlapping keywords starting at different positions are all seen
+        ordered = sorted(self.weights, key=len, reverse=True)
+        self._pattern = re.compile(r'(?=\b(' + '|'.join(re.escape(k) for k in ordered) + r')\b)') if ordered else None
+        # A keyword that is a prefix of a longer one can be hidden by it at the same position
+        self._shadowed = [
+            (keyword, re.compile(r'\b' + re.escape(keyword) + r'\b'))
+            for keyword in ordered
+            if any(other != keyword and other.startswith(keyword) for other in ordered)
+        ]
+
+    def matches(self, commit_message: str) -> set[str]:
+        """Returns the distinct (lowercased) keywords present in the message."""
+        if self._pattern is None:
+            return set()
+        message = commit_message.lower()
+        found = set(self._pattern.findall(message))
+        for keyword, pattern in self._shadowed:
+            if keyword not in found and pattern.search(message):
+                found.add(keyword)
+        return found
+
+    def score(self, commit_message: str) -> int:
+        return sum(self.weights[keyword] for keyword in self.matches(commit_message))
+
+    def score_many(self, commit_messages: list[str]) -> int:
+        return sum(self.score(message) for message in commit_messages)
+
+@lru_cache(maxsize=1024)
+def get_keyword_matcher(keywords: tuple[str, ...]) -> KeywordMatcher:
+    """
+    Returns the compiled matcher for a keyword set.
+    Cached by the keyword tuple, so a goal whose keywords change gets a new matcher.
+    """
+    return KeywordMatcher(keywords)
+
 def analyze_commit_for_goal_progress(commit_message: str, goal_keywords: list[str]) -> float:
     """
     Analyzes a single commit message for progress towards a goal.
     Returns a score based on how many goal keywords are found in the commit message.
     """
-    commit_message_lower = commit_message.lower()
-    score = 0
-    for keyword in goal_keywords:
-        if re.search(r'\b' + re.escape(keyword.lower()) + r'\b', commit_message_lower):
-            score += 1
-    return score
+    return get_keyword_matcher(tuple(goal_keywords)).score(commit_message)
+
+def score_goals(commit_messages: list[str], goal_keyword_lists: list[list[str]]) -> list[int]:
+    """
+    Scores one list of commit messages against many goals in a single pass.
+    Each message is scanned once with a matcher over the union of all goal keywords;
+    the per-goal totals are then summed from the keywords found.
+    Returns one total score per goal, in the order given.
+    """
+    union_matcher = get_keyword_matcher(tuple(sorted({k for keywords in goal_keyword_lists for k in keywords})))
+    found_counts = Counter()
+    for message in commit_messages:
+        found_counts.update(union_matcher.matches(message))
+
+    totals = []
+    for keywords in goal_keyword_lists:
+        weights = Counter(keyword.lower() for keyword in keywords)
+        totals.append(sum(found_counts[keyword] * weight for keyword, weight in weights.items()))
+    return totals
 
 if __name__ == "__main__":
     # Example Usage
@@ -1,20 +1,31 @@
 
+import asyncio
 import os
+import queue
+import tempfile
+import threading
+import time
 from email.mime.image import MIMEImage
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 import smtplib
-import cairosvg # For SVG to PNG conversion
-
 from backend.generate_glyph import generate_glyph # Assuming this can generate an SVG string
+from backend.rasterize import rasterizer
+from backend.instrumentation import record_span, span
+from backend.coalesce import analysis_key, single_flight
+from backend.mirrors import mirrors
+
+# Width of the PNG glyph embedded in digest emails
+DIGEST_IMAGE_WIDTH = int(os.getenv("DIGEST_IMAGE_WIDTH", 800))
 
 def generate_weekly_digest_content(user_email: str, collection_id: str, glyph_svg_content: str, health_metrics: dict):
     """
     Generates the HTML content for the weekly digest email.
+    Returns (html_content, glyph_png) where the PNG is rasterized in memory for embedding.
+    Blocks on the rasterizer pool; run it off the event loop.
     """
-    # Convert SVG to PNG for embedding
-    glyph_image_path = f"/tmp/glyph_{collection_id}.png"
-    cairosvg.svg2png(bytestring=glyph_svg_content.encode('utf-8'), write_to=glyph_image_path)
+    with span("digest.rasterize"):
+        glyph_png = rasterizer.rasterize(glyph_svg_content, output_width=DIGEST_IMAGE_WIDTH)
 
     # Basic summary of key statistics
     summary_text = f"""
@@ -40,21 +51,85 @@ def generate_weekly_digest_content(user_email: str, collection_id: str, glyph_sv
         </body>
     </html>
     """
-    return html_content, glyph_image_path
+    return html_content, glyph_png
 
-def send_email(to_email: str, subject: str, html_content: str, image_path: str = None):
+def smtp_settings():
+    """SMTP configuration from the environment. STARTTLS can be disabled for local SMTP stand-ins."""
+    return {
+        "server": os.getenv("SMTP_SERVER", "smtp.gmail.com"),
+        "port": int(os.getenv("SMTP_PORT", 587)),
+        "username": os.getenv("EMAIL_USERNAME"),
+        "password": os.getenv("EMAIL_PASSWORD"),
+        "starttls": os.getenv("SMTP_STARTTLS", "true").lower() != "false",
+    }
+
+class SMTPConnectionPool:
     """
-    Sends an email with HTML content and an optional embedded image.
+    A small pool of reusable SMTP sessions.
+    Each session runs connect/STARTTLS/login once and then sends many messages;
+    idle sessions are health-checked with NOOP before reuse.
     """
-    sender_email = os.getenv("EMAIL_USERNAME")
-    sender_password = os.getenv("EMAIL_PASSWORD")
-    smtp_server = os.getenv("SMTP_SERVER", "smtp.gmail.com")
-    smtp_port = int(os.getenv("SMTP_PORT", 587))
 
-    if not sender_email or not sender_password:
-        print("Email credentials not set. Skipping email sending.")
-        return
+    def __init__(self, settings=None, max_connections=int(os.getenv("SMTP_POOL_SIZE", 4))):
+        self.settings = settings or smtp_settings()
+        self.max_connections = max_connections
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_connections)
+
+    def _connect(self):
+        server = smtplib.SMTP(self.settings["server"], self.settings["port"], timeout=30)
+        if self.settings["starttls"]:
+            server.starttls()
+        if self.settings["username"] and self.settings["password"]:
+            server.login(self.settings["username"], self.settings["password"])
+        return server
+
+    def acquire(self):
+        """Returns a live session, blocking while all `max_connections` are in use."""
+        self._slots.acquire()
+        try:
+            while True:
+                try:
+                    server = self._idle.get_nowait()
+                except queue.Empty:
+                    return self._connect()
+                try:
+                    if server.noop()[0] == 250:
+                        return server
+                except (smtplib.SMTPException, OSError):
+                    pass
+                self._close(server)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, server):
+        """Returns a healthy session to the pool."""
+        self._idle.put(server)
+        self._slots.release()
+
+    def discard(self, server):
+        """Drops a session that failed mid-send."""
+        self._close(server)
+        self._slots.release()
+
+    def _close(self, server):
+        try:
+            server.quit()
+        except (smtplib.SMTPException, OSError):
+            pass
+
+    def close(self):
+        while True:
+            try:
+                self._close(self._idle.get_nowait())
+            except queue.Empty:
+                return
 
+def build_email(sender_email: str, to_email: str, subject: str, html_content: str, image_bytes: bytes = None):
+    """
+    Builds the MIME message with HTML content and an optional embedded PNG image.
+    """
     msg = MIMEMultipart('related')
     msg['From'] = sender_email
     msg['To'] = to_email
@@ -62,32 +137,197 @@ def send_email(to_email: str, subject: str, html_content: str, image_path: str =
 
     msg.attach(MIMEText(html_content, 'html'))
 
-    if image_path:
-        with open(image_path, 'rb') as img_file:
-            img = MIMEImage(img_file.read())
-            img.add_header('Content-ID', '<glyph_image>')
-            msg.attach(img)
+    if image_bytes:
+        img = MIMEImage(image_bytes, 'png')
+        img.add_header('Content-ID', '<glyph_image>')
+        msg.attach(img)
+    return msg
+
+def is_transient_smtp_error(error):
+    """
+    True for failures worth retrying: 4xx replies, dropped connections and network errors.
+    5xx replies (refused recipients or sender, rejected data, failed authentication) are final.
+    """
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return any(400 <= code < 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    if isinstance(error, smtplib.SMTPServerDisconnected):
+        return True
+    # SMTPException subclasses OSError; any other SMTP error is a protocol problem retrying won't fix
+    return not isinstance(error, smtplib.SMTPException)
+
+def send_message_with_retry(pool: SMTPConnectionPool, msg, retries: int = 3, backoff: float = 1.0):
+    """
+    Sends `msg` over a pooled session, retrying transient errors (see `is_transient_smtp_error`)
+    with exponential backoff. Returns the number of retries used. Permanent failures are raised
+    at once, and transient ones once retries are exhausted. A session is only dropped when the
+    connection itself failed; after a refused message it goes back to the pool.
+    """
+    for attempt in range(retries + 1):
+        server = None
+        try:
+            server = pool.acquire()
+            with span("digest.smtp_send"):
+                server.send_message(msg)
+        except OSError as e:
+            if server is not None:
+                if isinstance(e, smtplib.SMTPServerDisconnected) or not isinstance(e, smtplib.SMTPException):
+                    pool.discard(server)
+                else:
+                    pool.release(server)
+            if attempt == retries or not is_transient_smtp_error(e):
+                raise
+            time.sleep(backoff * (2 ** attempt))
+        else:
+            pool.release(server)
+            return attempt
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+def get_smtp_pool():
+    """The process-wide SMTP session pool, created on first use."""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = SMTPConnectionPool()
+        return _default_pool
+
+def send_email(to_email: str, subject: str, html_content: str, image_bytes: bytes = None):
+    """
+    Sends an email with HTML content and an optional embedded image over a pooled SMTP session.
+    """
+    sender_email = os.getenv("EMAIL_USERNAME")
+
+    if not sender_email:
+        print("Email credentials not set. Skipping email sending.")
+        return
 
+    msg = build_email(sender_email, to_email, subject, html_content, image_bytes)
     try:
-        with smtplib.SMTP(smtp_server, smtp_port) as server:
-            server.starttls()
-            server.login(sender_email, sender_password)
-            server.send_message(msg)
+        send_message_with_retry(get_smtp_pool(), msg)
         print(f"Email sent successfully to {to_email}")
     except Exception as e:
         print(f"Failed to send email to {to_email}: {e}")
+
+def render_weekly_digest(user_email: str, collection_id: str, repo_path: str):
+    """
+    Generates the glyph, metrics and digest HTML for one collection. Blocking; run it off the event loop.
+    `repo_path` may be a remote URL, analyzed from its (incrementally fetched) local mirror.
+    """
+    repo_path = mirrors.resolve(repo_path)
+    fd, glyph_path = tempfile.mkstemp(suffix=".svg", prefix=f"glyph_{collection_id}_")
+    os.close(fd)
+    try:
+        # Digests for collections sharing a repository render its glyph once
+        with mirrors.reading(repo_path), span("digest.glyph"):
+            glyph_svg_content, health_metrics = single_flight.do(
+                analysis_key("digest-glyph", repo_path), generate_glyph, repo_path, glyph_path)
     finally:
-        if image_path and os.path.exists(image_path):
-            os.remove(image_path) # Clean up the generated image
+        os.remove(glyph_path)
+    return generate_weekly_digest_content(user_email, collection_id, glyph_svg_content, health_metrics)
 
 async def send_weekly_digest(user_email: str, collection_id: str, repo_path: str):
     """
     Orchestrates the generation and sending of the weekly digest email.
+    Rendering and SMTP work run in worker threads so the event loop stays responsive.
+    """
+    html_content, glyph_png = await asyncio.to_thread(render_weekly_digest, user_email, collection_id, repo_path)
+    await asyncio.to_thread(send_email, user_email, "Your Weekly GitGlyph Digest!", html_content, glyph_png)
+
+class DigestDispatcher:
+    """
+    Sends weekly digests for many collections in one batch.
+    Digests are rendered concurrently (at most `concurrency` at once) and sent over a shared
+    pool of SMTP sessions with retry and exponential backoff. `stats` reports throughput.
+    """
+
+    def __init__(self, pool: SMTPConnectionPool = None, concurrency: int = int(os.getenv("DIGEST_CONCURRENCY", 8)),
+                 retries: int = 3, backoff: float = 1.0):
+        self.pool = pool or get_smtp_pool()
+        self.concurrency = concurrency
+        self.retries = retries
+        self.backoff = backoff
+
+    async def dispatch(self, collections):
+        """Sends a digest for every collection that has a user email and repository path. Returns stats."""
+        sender_email = os.getenv("EMAIL_USERNAME")
+        stats = {"sent": 0, "failed": 0, "skipped": 0, "retries": 0, "errors": {}}
+        semaphore = asyncio.Semaphore(self.concurrency)
+        started = time.monotonic()
+
+        async def deliver(collection):
+            if not sender_email or not collection.user_email or not collection.repo_path:
+                stats["skipped"] += 1
+                return
+            async with semaphore:
+                try:
+                    html_content, glyph_png = await asyncio.to_thread(
+                        render_weekly_digest, collection.user_email, collection.id, collection.repo_path)
+                    msg = build_email(sender_email, collection.user_email, "Your Weekly GitGlyph Digest!", html_content, glyph_png)
+                    stats["retries"] += await asyncio.to_thread(
+                        send_message_with_retry, self.pool, msg, self.retries, self.backoff)
+                    stats["sent"] += 1
+                except Exception as e:
+                    stats["failed"] += 1
+                    stats["errors"][collection.id] = str(e)
+
+        await asyncio.gather(*(deliver(collection) for collection in collections))
+
+        elapsed = time.monotonic() - started
+        record_span("digest.batch", elapsed)
+        stats["elapsed_seconds"] = elapsed
+        stats["messages_per_second"] = stats["sent"] / elapsed if elapsed > 0 else 0.0
+        return stats
+
+def dispatch_digest_batch():
+    """
+    Worker entry point for digest batch jobs: dispatches digests for every subscribed collection
+    over an SMTP pool of its own and returns the batch stats.
+    """
+    from backend.storage import store
+
+    pool = SMTPConnectionPool()
+    try:
+        return asyncio.run(DigestDispatcher(pool=pool).dispatch(store.list_digest_collections()))
+    finally:
+        pool.close()
+
+async def run_digest_schedule(list_collections, interval_seconds: float, acquire_lease=None, claim_run=None,
+                              poll_seconds: float = 60):
+    """
+    Dispatches digests for all collections returned by `list_collections()` every `interval_seconds`.
+    The schedule is checked right away and then every `poll_seconds` (at most `interval_seconds`):
+    a batch is sent whenever `claim_run()` returns True, which should record the run and only
+    succeed once the last recorded run is an interval old. Persisting that record keeps restarts
+    from resetting the schedule; without `claim_run`, runs are only tracked in this process.
+    When several processes run the schedule (one per uvicorn worker), `acquire_lease()` must elect
+    one of them: only a process for which it returns True checks the schedule. The leader renews
+    its lease on every check and after every batch.
+    Runs until cancelled.
     """
-    # Simulate glyph generation and health analysis
-    # In a real scenario, you'd fetch the actual glyph data and metrics
-    glyph_svg_content, health_metrics = generate_glyph(repo_path, "/tmp/dummy_glyph.svg") # Dummy path, content is returned
+    if claim_run is None:
+        last_run = None
 
-    html_content, glyph_image_path = generate_weekly_digest_content(user_email, collection_id, glyph_svg_content, health_metrics)
-    send_email(to_email=user_email, subject="Your Weekly GitGlyph Digest!", html_content=html_content, image_path=glyph_image_path)
+        def claim_run():
+            nonlocal last_run
+            now = time.time()
+            if last_run is not None and now - last_run < interval_seconds:
+                return False
+            last_run = now
+            return True
 
+    dispatcher = DigestDispatcher()
+    while True:
+        try:
+            if (acquire_lease is None or await asyncio.to_thread(acquire_lease)) and await asyncio.to_thread(claim_run):
+                collections = await asyncio.to_thread(list_collections)
+                stats = await dispatcher.dispatch(collections)
+                print(f"Weekly digest batch: {stats['sent']} sent, {stats['failed']} failed, "
+                      f"{stats['skipped']} skipped, {stats['messages_per_second']:.2f} msg/s")
+                if acquire_lease is not None:
+                    await asyncio.to_thread(acquire_lease)
+        except Exception as e:
+            print(f"Weekly digest batch failed: {e}")
+        await asyncio.sleep(min(poll_seconds, interval_seconds))
@@ -0,0 +1,177 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+from backend.analysis import SERIES_POINT_BUDGET, health_from_state
+from backend.analysis_state import merge_states, new_state, state_from_table
+from backend.commit_table import get_table
+from backend.contributor_analysis import table_contributions
+from backend.cooccurrence import pair_weights, select_links
+from backend.git_history import is_repository, resolve_revision
+from backend.glyph_cache import cache_key, glyph_cache
+from backend.instrumentation import span
+
+# Bump whenever the partial contents change so cached partials are invalidated.
+PARTIAL_VERSION = 1
+MAX_ORG_WORKERS = int(os.getenv("GITGLYPH_ORG_WORKERS", os.cpu_count() or 1))
+# HEADs are resolved with this many concurrent `git rev-parse` calls
+RESOLVE_THREADS = 16
+
+
+def empty_partial(sha=None):
+    return {"sha": sha, "state": new_state(), "contributors": {}, "links": []}
+
+
+def repo_partial(repo_path, sha):
+    """
+    Map step: reads the commit table of `repo_path` at `sha` and returns its partial result,
+    made only of mergeable accumulators:
+    - state: the additive analysis state (message kinds, line counts, daily cadence buckets)
+    - contributors: email -> {'name', 'commits'}
+    - links: [source, target, shared files] for every author pair of this repository
+    """
+    if sha is None:
+        return empty_partial()
+
+    table = get_table(repo_path, sha)
+    nodes, incidence = table_contributions(table)
+    sources, targets, weights = pair_weights(incidence)
+    links = select_links([node["id"] for node in nodes], sources, targets, weights)
+    return {
+        "sha": sha,
+        "state": state_from_table(table),
+        "contributors": {node["id"]: {"name": node["name"], "commits": node["commits"]} for node in nodes},
+        "links": [[link["source"], link["target"], link["value"]] for link in links],
+    }
+
+
+def resolve_head(repo_path):
+    """
+    Returns (sha, error): the HEAD SHA of `repo_path` (None for a repository without commits yet),
+    or an error when `repo_path` is not a Git repository at all.
+    """
+    sha = resolve_revision(repo_path)
+    if sha is None and not is_repository(repo_path):
+        return None, f"{repo_path} is not a valid Git repository."
+    return sha, None
+
+
+def get_partials(repo_paths, max_workers=None):
+    """
+    Returns (partials, failed): the partial of every repository in `repo_paths` that could be
+    read, in order, and a repo path -> error map for the others (including paths that are not
+    repositories).
+    Partials are cached per repository and HEAD SHA, so after one repository changes only
+    that repository is walked again. Missing partials are computed in a process pool.
+    """
+    max_workers = max_workers or MAX_ORG_WORKERS
+    with ThreadPoolExecutor(max_workers=RESOLVE_THREADS) as resolver:
+        heads = list(resolver.map(resolve_head, repo_paths))
+
+    partials = [None] * len(repo_paths)
+    missing = {} # cache key -> (repo_path, sha, indices into repo_paths)
+    failed = {}
+    for i, (repo_path, (sha, error)) in enumerate(zip(repo_paths, heads)):
+        if error is not None:
+            failed[repo_path] = error
+            continue
+        if sha is None:
+            partials[i] = empty_partial()
+            continue
+        key = cache_key("org-partial", [repo_path], [sha], PARTIAL_VERSION)
+        cached = glyph_cache.get(key)
+        if cached is not None:
+            partials[i] = cached
+        elif key in missing:
+            missing[key][2].append(i)
+        else:
+            missing[key] = (repo_path, sha, [i])
+
+    if len(missing) > 1 and max_workers > 1:
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(missing))) as pool:
+            # Repositories differ wildly in size, so they are handed out one at a time
+            futures = {key: pool.submit(repo_partial, path, sha) for key, (path, sha, _) in missing.items()}
+            outcomes = {key: _outcome(future.result) for key, future in futures.items()}
+    else:
+        outcomes = {key: _outcome(repo_partial, path, sha) for key, (path, sha, _) in missing.items()}
+
+    for key, (repo_path, _, indices) in missing.items():
+        partial, error = outcomes[key]
+        if error is not None:
+            failed[repo_path] = error
+            continue
+        glyph_cache.put(key, partial)
+        for i in indices:
+            partials[i] = partial
+    return [partial for partial in partials if partial is not None], failed
+
+
+def _outcome(function, *args):
+    try:
+        return function(*args), None
+    except Exception as e:
+        return None, str(e)
+
+
+def merge_partials(partials):
+    """
+    Reduce step: combines partials into (state, contributors, weights).
+    Every accumulator is a sum or a union, so the result does not depend on how partials are grouped:
+    - state: merged with `merge_states`
+    - contributors: email -> {'name', 'commits', 'repos'}, commits summed, `repos` counting the repositories touched
+    - weights: (email, email) -> shared files summed over repositories; files never span repositories
+    """
+    state = new_state()
+    contributors = {}
+    weights = {}
+    for partial in partials:
+        state = merge_states(state, partial["state"])
+        for email, data in partial["contributors"].items():
+            if email not in contributors:
+                contributors[email] = {"name": data["name"], "commits": 0, "repos": 0}
+            contributors[email]["commits"] += data["commits"]
+            contributors[email]["repos"] += 1
+        for source, target, weight in partial["links"]:
+            pair = (source, target) if source < target else (target, source)
+            weights[pair] = weights.get(pair, 0) + weight
+    state["last_sha"] = None # Meaningless across repositories
+    return state, contributors, weights
+
+
+def organization_links(author_emails, weights, min_weight=1, top_k=None):
+    """Turns merged pair weights into links ordered and filtered like `collaboration_links`."""
+    author_ids = {email: i for i, email in enumerate(author_emails)}
+    pairs = np.array([(author_ids[a], author_ids[b]) for a, b in weights], dtype=np.int64).reshape(-1, 2)
+    values = np.fromiter(weights.values(), dtype=np.int64, count=len(weights))
+    sources, targets = pairs.min(axis=1), pairs.max(axis=1)
+    return select_links(author_emails, sources, targets, values, min_weight=min_weight, top_k=top_k)
+
+
+def analyze_organization(repo_paths, min_weight=1, top_k=None, granularity="week", window=4,
+                         max_points=SERIES_POINT_BUDGET, max_workers=None):
+    """
+    Analyzes many repositories as one organization with a parallel map-reduce:
+    per-repository partials (cached per HEAD SHA) are merged into organization-wide
+    health metrics and a contributor constellation whose links are weighted by the
+    files two authors share across all repositories.
+    Repositories that cannot be read are reported in `failed` instead of failing the whole run.
+    """
+    with span("org.partials"):
+        partials, failed = get_partials(repo_paths, max_workers)
+    with span("org.merge"):
+        state, contributors, weights = merge_partials(partials)
+        emails = list(contributors)
+        links = organization_links(emails, weights, min_weight=min_weight, top_k=top_k)
+
+    return {
+        "repo_count": len(partials),
+        "commit_count": state["commit_count"],
+        "health": health_from_state(state, granularity, window, max_points),
+        "constellation": {
+            "nodes": [{"id": email, "name": data["name"], "commits": data["commits"], "repos": data["repos"]}
+                      for email, data in contributors.items()],
+            "links": links,
+        },
+        "failed": failed,
+    }
@@ -0,0 +1,116 @@
+import hashlib
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+
+MAX_WORKERS = int(os.getenv("GITGLYPH_RASTER_WORKERS", 2))
+CACHE_BUDGET_BYTES = int(os.getenv("GITGLYPH_RASTER_CACHE_BYTES", 32 * 1024 * 1024))
+
+
+def svg_to_png(svg_bytes, output_width=None, output_height=None):
+    """Worker entry point: rasterizes an SVG document to PNG bytes entirely in memory."""
+    import cairosvg # Imported in the worker; needs the native cairo library
+
+    return cairosvg.svg2png(bytestring=svg_bytes, output_width=output_width, output_height=output_height)
+
+
+def raster_key(svg_bytes, output_width=None, output_height=None):
+    return f"{hashlib.sha256(svg_bytes).hexdigest()}:{output_width}x{output_height}"
+
+
+class Rasterizer:
+    """
+    Renders SVG to PNG in a bounded process pool, keeping the CPU-bound work off the
+    calling thread. Results are cached in an LRU bounded by bytes and keyed by the SVG
+    hash plus output size, and concurrent requests for the same key share one render.
+    With `max_workers` of 0, SVGs are rendered in the calling thread instead (see `limit_workers`).
+    """
+
+    def __init__(self, max_workers=MAX_WORKERS, cache_budget=CACHE_BUDGET_BYTES):
+        self.max_workers = max_workers
+        self.cache_budget = cache_budget
+        self._cache = OrderedDict() # key -> png bytes
+        self._cache_bytes = 0
+        self._pending = {} # key -> Future of an in-flight render
+        self._lock = threading.Lock()
+        self._pool = None
+        self.hits = 0
+        self.misses = 0
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        # A forked child (e.g. a job worker) has no pool threads or workers; it starts its own pool
+        self._pool = None
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def limit_workers(self, cpu_share):
+        """
+        Caps the pool for a process that is itself one of several workers (e.g. a job worker)
+        with `cpu_share` CPUs: with a single CPU, SVGs are rendered in-process rather than in a
+        nested pool, so job workers never multiply into job workers x rasterizer workers.
+        """
+        self.max_workers = min(self.max_workers, cpu_share) if cpu_share > 1 else 0
+
+    def _executor(self):
+        if self._pool is None:
+            # The pool is first used from worker threads, where forking could copy held locks;
+            # spawned workers only need to import this small module.
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    def submit(self, svg_content, output_width=None, output_height=None):
+        """Returns a concurrent Future resolving to the PNG bytes for `svg_content`."""
+        svg_bytes = svg_content.encode("utf-8") if isinstance(svg_content, str) else svg_content
+        key = raster_key(svg_bytes, output_width, output_height)
+        with self._lock:
+            png = self._cache.get(key)
+            if png is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                future = Future()
+                future.set_result(png)
+                return future
+            future = self._pending.get(key)
+            if future is not None:
+                self.hits += 1
+                return future
+            self.misses += 1
+            inline = self.max_workers < 1
+            future = Future() if inline else self._executor().submit(svg_to_png, svg_bytes, output_width, output_height)
+            self._pending[key] = future
+        future.add_done_callback(lambda done, key=key: self._finish(key, done))
+        if inline:
+            try:
+                future.set_result(svg_to_png(svg_bytes, output_width, output_height))
+            except Exception as e:
+                future.set_exception(e)
+        return future
+
+    def rasterize(self, svg_content, output_width=None, output_height=None):
+        """Blocking variant of `submit`; call it from a worker thread, not the event loop."""
+        return self.submit(svg_content, output_width, output_height).result()
+
+    def _finish(self, key, future):
+        with self._lock:
+            self._pending.pop(key, None)
+            if future.cancelled() or future.exception() is not None:
+                return
+            png = future.result()
+            if len(png) > self.cache_budget:
+                return
+            self._cache[key] = png
+            self._cache_bytes += len(png)
+            while self._cache_bytes > self.cache_budget:
+                _, evicted = self._cache.popitem(last=False)
+                self._cache_bytes -= len(evicted)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+rasterizer = Rasterizer()
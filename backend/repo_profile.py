@@ -0,0 +1,119 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from backend.analysis_state import FEATURE, FIX, OTHER
+from backend.git_history import resolve_revision
+from backend.glyph_cache import cache_key, glyph_cache
+from backend.glyph_layout import DEFAULT_MAX_LANES, assign_lanes, load_commit_arrays
+
+# Bump whenever the profile contents change so cached profiles are invalidated.
+PROFILE_VERSION = 1
+# Time bins of the structure density grid
+PROFILE_BINS = 64
+CHURN_QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+
+
+def structure_profile(commits):
+    """
+    Compact description of a history's shape, from the arrays of `load_commit_arrays`:
+    - density: lanes x PROFILE_BINS grid of commit counts over normalized time, scaled to a peak of 1
+    - branch_count, merge_ratio (share of merge commits), commit_count and span_days
+    """
+    timestamps = commits["timestamp"]
+    n = len(timestamps)
+    if n == 0:
+        return {"density": [], "branch_count": 0, "merge_ratio": 0.0, "commit_count": 0, "span_days": 0.0}
+
+    lanes, segments = assign_lanes(commits["first_parent"], DEFAULT_MAX_LANES)
+    lane_count = int(lanes.max()) + 1
+    span = timestamps.max() - timestamps.min()
+    position = (timestamps - timestamps.min()) / span if span > 0 else np.arange(n) / max(n - 1, 1)
+    time_bin = np.minimum((position * PROFILE_BINS).astype(np.int64), PROFILE_BINS - 1)
+    density = np.bincount(lanes * PROFILE_BINS + time_bin, minlength=lane_count * PROFILE_BINS).reshape(lane_count, PROFILE_BINS)
+
+    return {
+        "density": np.round(density / density.max(), 4).tolist(),
+        "branch_count": int(len(np.unique(segments))),
+        "merge_ratio": float(np.mean(commits["second_parent"] >= 0)),
+        "commit_count": n,
+        "span_days": float(span / 86400),
+    }
+
+
+def style_profile(commits):
+    """
+    Compact description of how a repository is worked on, from the arrays of
+    `load_commit_arrays(..., message_kinds=True)`:
+    - hour_histogram: share of commits per UTC hour of day (24 values)
+    - churn_quantiles: log1p(lines added + deleted) per commit at CHURN_QUANTILES
+    - weekly_mean / weekly_cv: commits per active-span week and their coefficient of variation
+    - message_mix: share of feature, fix and other commits
+    """
+    timestamps = commits["timestamp"]
+    n = len(timestamps)
+    if n == 0:
+        return {
+            "hour_histogram": [0.0] * 24,
+            "churn_quantiles": [0.0] * len(CHURN_QUANTILES),
+            "weekly_mean": 0.0,
+            "weekly_cv": 0.0,
+            "message_mix": {"feature": 0.0, "fix": 0.0, "other": 0.0},
+        }
+
+    hours = np.bincount((timestamps % 86400) // 3600, minlength=24) / n
+    churn = np.log1p((commits["added"] + commits["deleted"]).astype(np.float64))
+    weeks = (timestamps // 86400 + 3) // 7
+    weekly = np.bincount(weeks - weeks.min()).astype(np.float64)
+    kinds = np.bincount(commits["kind"], minlength=3) / n
+
+    return {
+        "hour_histogram": np.round(hours, 4).tolist(),
+        "churn_quantiles": np.round(np.quantile(churn, CHURN_QUANTILES), 4).tolist(),
+        "weekly_mean": float(weekly.mean()),
+        "weekly_cv": float(weekly.std() / weekly.mean()),
+        "message_mix": {"feature": float(kinds[FEATURE]), "fix": float(kinds[FIX]), "other": float(kinds[OTHER])},
+    }
+
+
+def extract_profile(repo_path, sha):
+    """Reads the history of `repo_path` up to `sha` once and returns both its profiles."""
+    commits = load_commit_arrays(repo_path, sha, message_kinds=True)
+    return {"sha": sha, "structure": structure_profile(commits), "style": style_profile(commits)}
+
+
+def get_profiles(repo_paths, max_workers=None):
+    """
+    Returns the profile of every repository in `repo_paths`, in order.
+    Profiles are cached per repository and HEAD SHA; those missing from the cache
+    are extracted in parallel, in up to `max_workers` processes (default: one per
+    repository), or in this process when `max_workers` is 1.
+    """
+    profiles = [None] * len(repo_paths)
+    missing = {} # cache key -> (repo_path, sha, indices into repo_paths)
+    for i, repo_path in enumerate(repo_paths):
+        sha = resolve_revision(repo_path, "HEAD")
+        if sha is None:
+            profiles[i] = extract_profile(repo_path, "HEAD")
+            continue
+        key = cache_key("profile", [repo_path], [sha], PROFILE_VERSION)
+        cached = glyph_cache.get(key)
+        if cached is not None:
+            profiles[i] = cached
+        elif key in missing:
+            missing[key][2].append(i)
+        else:
+            missing[key] = (repo_path, sha, [i])
+
+    max_workers = max_workers or len(missing)
+    if len(missing) > 1 and max_workers > 1:
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(missing))) as pool:
+            extracted = list(pool.map(extract_profile, *zip(*((path, sha) for path, sha, _ in missing.values()))))
+    else:
+        extracted = [extract_profile(path, sha) for path, sha, _ in missing.values()]
+
+    for (key, (_, _, indices)), profile in zip(missing.items(), extracted):
+        glyph_cache.put(key, profile)
+        for i in indices:
+            profiles[i] = profile
+    return profiles
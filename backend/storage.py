@@ -0,0 +1,308 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from datetime import datetime, timezone
+
+from backend.models import GlyphCollection, GlyphSnapshot, GlyphSnapshotInfo, GlyphHealthMetrics, ProjectGoal
+
+DB_PATH = os.getenv("GITGLYPH_DB_PATH", "gitglyph.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS collections (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    is_public INTEGER NOT NULL DEFAULT 0,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_collections_user_id ON collections (user_id);
+CREATE INDEX IF NOT EXISTS idx_collections_is_public ON collections (is_public);
+
+CREATE TABLE IF NOT EXISTS goals (
+    id TEXT PRIMARY KEY,
+    collection_id TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_goals_collection_id ON goals (collection_id);
+CREATE INDEX IF NOT EXISTS idx_goals_user_id ON goals (user_id);
+
+CREATE TABLE IF NOT EXISTS snapshots (
+    id TEXT PRIMARY KEY,
+    collection_id TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    commit_hash TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    health_metrics TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_snapshots_collection_time ON snapshots (collection_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_snapshots_content_hash ON snapshots (content_hash);
+
+-- Time-limited leases electing one holder (e.g. one uvicorn worker) for a periodic task
+CREATE TABLE IF NOT EXISTS leases (
+    name TEXT PRIMARY KEY,
+    holder TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+
+-- Last run of each periodic task, so its schedule survives restarts
+CREATE TABLE IF NOT EXISTS schedule_runs (
+    name TEXT PRIMARY KEY,
+    last_run_at REAL NOT NULL
+);
+
+-- SVG bodies are zlib-compressed and shared by every snapshot with identical content
+CREATE TABLE IF NOT EXISTS snapshot_bodies (
+    content_hash TEXT PRIMARY KEY,
+    svg BLOB NOT NULL
+);
+"""
+
+# Statements are module constants so sqlite3's per-connection statement cache reuses them as prepared statements.
+UPSERT_COLLECTION = "INSERT OR REPLACE INTO collections (id, user_id, is_public, data) VALUES (?, ?, ?, ?)"
+SELECT_COLLECTION = "SELECT data FROM collections WHERE id = ?"
+SELECT_USER_COLLECTIONS = "SELECT data FROM collections WHERE user_id = ?"
+SELECT_PUBLIC_COLLECTIONS = "SELECT data FROM collections WHERE is_public = 1"
+SELECT_DIGEST_COLLECTIONS = "SELECT data FROM collections WHERE json_extract(data, '$.user_email') IS NOT NULL"
+UPSERT_GOAL = "INSERT OR REPLACE INTO goals (id, collection_id, user_id, data) VALUES (?, ?, ?, ?)"
+SELECT_GOAL = "SELECT data FROM goals WHERE id = ?"
+SELECT_COLLECTION_GOALS = "SELECT data FROM goals WHERE collection_id = ?"
+DELETE_GOAL = "DELETE FROM goals WHERE id = ?"
+INSERT_SNAPSHOT_BODY = "INSERT OR IGNORE INTO snapshot_bodies (content_hash, svg) VALUES (?, ?)"
+INSERT_SNAPSHOT = "INSERT INTO snapshots (id, collection_id, timestamp, commit_hash, content_hash, health_metrics) VALUES (?, ?, ?, ?, ?, ?)"
+SELECT_SNAPSHOT_PAGE = (
+    "SELECT id, collection_id, timestamp, commit_hash, content_hash, health_metrics FROM snapshots"
+    " WHERE collection_id = ? AND timestamp >= ? AND timestamp <= ? ORDER BY timestamp LIMIT ? OFFSET ?"
+)
+COUNT_SNAPSHOTS = "SELECT COUNT(*) FROM snapshots WHERE collection_id = ? AND timestamp >= ? AND timestamp <= ?"
+SELECT_SNAPSHOT = (
+    "SELECT s.timestamp, s.commit_hash, s.health_metrics, b.svg FROM snapshots s"
+    " JOIN snapshot_bodies b ON b.content_hash = s.content_hash WHERE s.id = ? AND s.collection_id = ?"
+)
+SELECT_SNAPSHOT_HASH = "SELECT content_hash FROM snapshots WHERE id = ? AND collection_id = ?"
+DELETE_SNAPSHOT = "DELETE FROM snapshots WHERE id = ?"
+DELETE_ORPHAN_BODY = "DELETE FROM snapshot_bodies WHERE content_hash = ? AND NOT EXISTS (SELECT 1 FROM snapshots WHERE content_hash = ?)"
+
+# Takes a free or expired lease, or renews one already held by the same holder
+ACQUIRE_LEASE = (
+    "INSERT INTO leases (name, holder, expires_at) VALUES (?, ?, ?)"
+    " ON CONFLICT (name) DO UPDATE SET holder = excluded.holder, expires_at = excluded.expires_at"
+    " WHERE leases.holder = excluded.holder OR leases.expires_at < ?"
+)
+# Records a run unless the previous one is more recent than the interval
+CLAIM_SCHEDULE_RUN = (
+    "INSERT INTO schedule_runs (name, last_run_at) VALUES (?, ?)"
+    " ON CONFLICT (name) DO UPDATE SET last_run_at = excluded.last_run_at"
+    " WHERE schedule_runs.last_run_at <= ?"
+)
+
+# Bounds used when a listing has no time range
+MIN_TIMESTAMP = ""
+MAX_TIMESTAMP = "\uffff"
+# Snapshot timestamps are stored in UTC with a fixed width, so text order is time order
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S.%f+00:00"
+# Bumped by migrations in `_migrate`, tracked in PRAGMA user_version
+SCHEMA_VERSION = 1
+SELECT_SNAPSHOT_TIMESTAMPS = "SELECT id, timestamp FROM snapshots"
+UPDATE_SNAPSHOT_TIMESTAMP = "UPDATE snapshots SET timestamp = ? WHERE id = ?"
+
+
+def utc_timestamp(value):
+    """Stored form of a snapshot timestamp. Naive datetimes are taken to be UTC."""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).strftime(TIMESTAMP_FORMAT)
+
+
+class GlyphStore:
+    """
+    SQLite-backed storage for glyph collections, project goals and glyph snapshots.
+    Each thread reuses one connection. WAL mode lets several uvicorn worker
+    processes share the same database file. Models are stored as JSON alongside
+    the indexed columns used for lookups.
+    """
+
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        # A connection inherited by a forked worker process must not be used there
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.db_path, timeout=30, cached_statements=256)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            with self._schema_lock:
+                if not self._schema_ready:
+                    connection.executescript(SCHEMA)
+                    self._migrate(connection)
+                    self._schema_ready = True
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def _migrate(self, connection):
+        version = connection.execute("PRAGMA user_version").fetchone()[0]
+        if version < 1:
+            # Timestamps used to be stored as raw isoformat() text with their original UTC offsets
+            with connection:
+                rows = connection.execute(SELECT_SNAPSHOT_TIMESTAMPS).fetchall()
+                connection.executemany(UPDATE_SNAPSHOT_TIMESTAMP,
+                                       [(utc_timestamp(timestamp), snapshot_id) for snapshot_id, timestamp in rows])
+                connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _write(self, sql, params):
+        connection = self._connection()
+        with connection:
+            connection.execute(sql, params)
+
+    def _fetch_one(self, sql, params):
+        row = self._connection().execute(sql, params).fetchone()
+        return row[0] if row else None
+
+    def _fetch_all(self, sql, params=()):
+        return [row[0] for row in self._connection().execute(sql, params)]
+
+    # Collections
+
+    def save_collection(self, collection: GlyphCollection):
+        self._write(UPSERT_COLLECTION, (collection.id, collection.user_id, int(collection.is_public), collection.model_dump_json()))
+
+    def get_collection(self, collection_id):
+        data = self._fetch_one(SELECT_COLLECTION, (collection_id,))
+        return GlyphCollection.model_validate_json(data) if data else None
+
+    def list_collections(self, user_id):
+        return [GlyphCollection.model_validate_json(data) for data in self._fetch_all(SELECT_USER_COLLECTIONS, (user_id,))]
+
+    def list_public_collections(self):
+        return [GlyphCollection.model_validate_json(data) for data in self._fetch_all(SELECT_PUBLIC_COLLECTIONS)]
+
+    def list_digest_collections(self):
+        """Collections that have a notification email set."""
+        return [GlyphCollection.model_validate_json(data) for data in self._fetch_all(SELECT_DIGEST_COLLECTIONS)]
+
+    # Goals
+
+    def save_goal(self, goal: ProjectGoal):
+        self._write(UPSERT_GOAL, (goal.id, goal.collection_id, goal.user_id, goal.model_dump_json()))
+
+    def get_goal(self, goal_id):
+        data = self._fetch_one(SELECT_GOAL, (goal_id,))
+        return ProjectGoal.model_validate_json(data) if data else None
+
+    def list_goals(self, collection_id):
+        return [ProjectGoal.model_validate_json(data) for data in self._fetch_all(SELECT_COLLECTION_GOALS, (collection_id,))]
+
+    def delete_goal(self, goal_id):
+        self._write(DELETE_GOAL, (goal_id,))
+
+    # Leases
+
+    def acquire_lease(self, name, holder, ttl):
+        """
+        Takes or renews the lease `name` for `holder` for `ttl` seconds. Returns True if `holder`
+        now holds it; False while another holder's lease is still live. Atomic across processes.
+        """
+        now = time.time()
+        connection = self._connection()
+        with connection:
+            cursor = connection.execute(ACQUIRE_LEASE, (name, holder, now + ttl, now))
+        return cursor.rowcount == 1
+
+    def claim_schedule_run(self, name, interval):
+        """
+        Records a run of the periodic task `name` now and returns True if its last recorded run
+        is at least `interval` seconds old (or there is none); returns False otherwise.
+        Atomic across processes, so each due run is claimed once.
+        """
+        now = time.time()
+        connection = self._connection()
+        with connection:
+            cursor = connection.execute(CLAIM_SCHEDULE_RUN, (name, now, now - interval))
+        return cursor.rowcount == 1
+
+    # Snapshots
+
+    def add_snapshot(self, collection_id, snapshot: GlyphSnapshot):
+        """
+        Appends a snapshot to a collection. The SVG body is stored once per distinct content
+        (SHA-256), compressed; appending never rewrites the collection or other snapshots.
+        """
+        svg_bytes = snapshot.svg_content.encode("utf-8")
+        content_hash = hashlib.sha256(svg_bytes).hexdigest()
+        info = GlyphSnapshotInfo(
+            id=str(uuid.uuid4()),
+            collection_id=collection_id,
+            timestamp=snapshot.timestamp,
+            commit_hash=snapshot.commit_hash,
+            content_hash=content_hash,
+            health_metrics=snapshot.health_metrics,
+        )
+        metrics = snapshot.health_metrics.model_dump_json() if snapshot.health_metrics else None
+        connection = self._connection()
+        with connection:
+            connection.execute(INSERT_SNAPSHOT_BODY, (content_hash, zlib.compress(svg_bytes)))
+            connection.execute(INSERT_SNAPSHOT, (info.id, collection_id, utc_timestamp(snapshot.timestamp), snapshot.commit_hash, content_hash, metrics))
+        return info
+
+    def list_snapshots(self, collection_id, limit=50, offset=0, since=None, until=None):
+        """
+        Returns (snapshot metadata page ordered by time, total matching count), without SVG bodies.
+        `since`/`until` are inclusive datetime bounds; naive bounds, like naive timestamps, are UTC.
+        """
+        lower = utc_timestamp(since) if since else MIN_TIMESTAMP
+        upper = utc_timestamp(until) if until else MAX_TIMESTAMP
+        connection = self._connection()
+        rows = connection.execute(SELECT_SNAPSHOT_PAGE, (collection_id, lower, upper, limit, offset)).fetchall()
+        total = connection.execute(COUNT_SNAPSHOTS, (collection_id, lower, upper)).fetchone()[0]
+        snapshots = [
+            GlyphSnapshotInfo(
+                id=snapshot_id,
+                collection_id=row_collection_id,
+                timestamp=timestamp,
+                commit_hash=commit_hash,
+                content_hash=content_hash,
+                health_metrics=GlyphHealthMetrics.model_validate_json(metrics) if metrics else None,
+            )
+            for snapshot_id, row_collection_id, timestamp, commit_hash, content_hash, metrics in rows
+        ]
+        return snapshots, total
+
+    def count_snapshots(self, collection_id):
+        return self._connection().execute(COUNT_SNAPSHOTS, (collection_id, MIN_TIMESTAMP, MAX_TIMESTAMP)).fetchone()[0]
+
+    def get_snapshot(self, collection_id, snapshot_id):
+        """Returns the full snapshot including its decompressed SVG body, or None."""
+        row = self._connection().execute(SELECT_SNAPSHOT, (snapshot_id, collection_id)).fetchone()
+        if not row:
+            return None
+        timestamp, commit_hash, metrics, svg = row
+        return GlyphSnapshot(
+            timestamp=timestamp,
+            commit_hash=commit_hash,
+            svg_content=zlib.decompress(svg).decode("utf-8"),
+            health_metrics=GlyphHealthMetrics.model_validate_json(metrics) if metrics else None,
+        )
+
+    def delete_snapshot(self, collection_id, snapshot_id):
+        """Deletes a snapshot, and its body once no other snapshot shares it. Returns False if not found."""
+        connection = self._connection()
+        with connection:
+            row = connection.execute(SELECT_SNAPSHOT_HASH, (snapshot_id, collection_id)).fetchone()
+            if not row:
+                return False
+            connection.execute(DELETE_SNAPSHOT, (snapshot_id,))
+            connection.execute(DELETE_ORPHAN_BODY, (row[0], row[0]))
+        return True
+
+
+store = GlyphStore()
@@ -0,0 +1,257 @@
+import argparse
+import base64
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic_repo import ensure_repo, parse_count, repo_params
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+DEFAULT_OUTPUT = os.path.join(BENCH_DIR, "results.json")
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+
+
+# Each case does its imports and setup, then returns the callable that is timed.
+def case_analyze_glyph_health(repo_path, workdir):
+    from backend.analysis import analyze_glyph_health
+    return lambda: analyze_glyph_health(repo_path)
+
+
+def case_analyze_contributor_collaboration(repo_path, workdir):
+    from backend.contributor_analysis import analyze_contributor_collaboration
+    return lambda: analyze_contributor_collaboration(repo_path)
+
+
+def case_backend_generate_glyph(repo_path, workdir):
+    from backend.generate_glyph import generate_glyph
+    return lambda: generate_glyph(repo_path, os.path.join(workdir, "glyph.svg"))
+
+
+def case_cli_generate_glyph(repo_path, workdir):
+    from cli.main import generate_glyph
+    return lambda: generate_glyph(repo_path, os.path.join(workdir, "cli_glyph.svg"))
+
+
+def _api_client():
+    import itsdangerous
+    from fastapi.testclient import TestClient
+    from backend.main import app
+
+    session = {"user": "bench", "user_profile": {"login": "bench"}, "provider": "github"}
+    cookie = itsdangerous.TimestampSigner(os.getenv("SECRET_KEY", "super-secret")).sign(
+        base64.b64encode(json.dumps(session).encode("utf-8"))
+    )
+    client = TestClient(app)
+    client.cookies.set("session", cookie.decode("utf-8"))
+    return client
+
+
+def _api_get(path, params):
+    client = _api_client()
+
+    def request():
+        response = client.get(path, params=params)
+        response.raise_for_status()
+        return response.content
+    return request
+
+
+def case_api_glyph_health(repo_path, workdir):
+    return _api_get("/api/glyph-health", {"repo_path": repo_path})
+
+
+def case_api_contributor_constellation(repo_path, workdir):
+    return _api_get("/api/contributor-constellation", {"repo_path": repo_path})
+
+
+def case_api_contributor_constellation_stream(repo_path, workdir):
+    return _api_get("/api/contributor-constellation/stream", {"repo_path": repo_path})
+
+
+CASES = {
+    "analyze_glyph_health": case_analyze_glyph_health,
+    "analyze_contributor_collaboration": case_analyze_contributor_collaboration,
+    "backend_generate_glyph": case_backend_generate_glyph,
+    "cli_generate_glyph": case_cli_generate_glyph,
+    "api_glyph_health": case_api_glyph_health,
+    "api_contributor_constellation": case_api_contributor_constellation,
+    "api_contributor_constellation_stream": case_api_contributor_constellation_stream,
+}
+
+
+def _max_rss_mb(who):
+    peak = resource.getrusage(who).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_case_in_process(name, repo_path, workdir, result_file):
+    """Child process side: sets up and times one case, then writes its measurements to `result_file`."""
+    target = CASES[name](repo_path, workdir)
+    start = time.perf_counter()
+    target()
+    seconds = time.perf_counter() - start
+    with open(result_file, "w") as f:
+        json.dump({
+            "seconds": seconds,
+            "peak_rss_mb": _max_rss_mb(resource.RUSAGE_SELF),
+            "children_peak_rss_mb": _max_rss_mb(resource.RUSAGE_CHILDREN),
+        }, f)
+
+
+def run_case(name, repo_path, timeout):
+    """
+    Runs one case in a fresh interpreter with empty commit tables and caches, so every
+    measurement is a cold run and peak memory is not polluted by earlier cases.
+    """
+    with tempfile.TemporaryDirectory(prefix="gitglyph-bench-") as workdir:
+        env = os.environ.copy()
+        env.update({
+            "GITGLYPH_TABLE_DIR": os.path.join(workdir, "tables"),
+            "GITGLYPH_CACHE_DIR": os.path.join(workdir, "cache"),
+            "GITGLYPH_DB_PATH": os.path.join(workdir, "gitglyph.db"),
+            "PYTHONPATH": os.pathsep.join(filter(None, [ROOT_DIR, env.get("PYTHONPATH")])),
+        })
+        result_file = os.path.join(workdir, "result.json")
+        command = [sys.executable, "-m", "benchmarks.run", "--case", name, "--repo", repo_path,
+                   "--workdir", workdir, "--result-file", result_file]
+        try:
+            completed = subprocess.run(command, cwd=ROOT_DIR, env=env, stdout=subprocess.DEVNULL,
+                                       stderr=subprocess.PIPE, text=True, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            return {"error": f"timed out after {timeout}s"}
+        if completed.returncode != 0:
+            return {"error": completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else f"exit code {completed.returncode}"}
+        with open(result_file) as f:
+            return json.load(f)
+
+
+def git_version():
+    return subprocess.run(["git", "--version"], capture_output=True, text=True).stdout.strip()
+
+
+def compare(results, baseline, threshold, memory_threshold, min_seconds):
+    """
+    Compares results with a baseline run of the same cases and sizes.
+    A case regresses when it is slower than baseline * (1 + threshold) by more than
+    `min_seconds`, or uses more than baseline * (1 + memory_threshold) peak memory.
+    Returns the rows of the comparison table and the number of regressions.
+    """
+    reference = {(r["case"], r["commits"]): r for r in baseline.get("results", []) if "error" not in r}
+    rows = []
+    regressions = 0
+    for result in results:
+        base = reference.get((result["case"], result["commits"]))
+        if base is None or "error" in result:
+            rows.append((result, base, "n/a" if "error" not in result else "error"))
+            continue
+        slower = result["seconds"] > base["seconds"] * (1 + threshold) and result["seconds"] - base["seconds"] > min_seconds
+        heavier = result["peak_rss_mb"] > base["peak_rss_mb"] * (1 + memory_threshold)
+        status = "REGRESSION" if slower or heavier else "ok"
+        regressions += status == "REGRESSION"
+        rows.append((result, base, status))
+    return rows, regressions
+
+
+def print_table(rows):
+    print(f"{'case':<40} {'commits':>9} {'seconds':>10} {'baseline':>10} {'peak MB':>9} {'baseline':>9}  status")
+    for result, base, status in rows:
+        if "error" in result:
+            print(f"{result['case']:<40} {result['commits']:>9} {'-':>10} {'-':>10} {'-':>9} {'-':>9}  {status}: {result['error']}")
+            continue
+        base_seconds = f"{base['seconds']:.3f}" if base else "-"
+        base_memory = f"{base['peak_rss_mb']:.1f}" if base else "-"
+        print(f"{result['case']:<40} {result['commits']:>9} {result['seconds']:>10.3f} {base_seconds:>10} "
+              f"{result['peak_rss_mb']:>9.1f} {base_memory:>9}  {status}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark GitGlyph entry points against synthetic repositories.")
+    parser.add_argument("--sizes", default="1k", help="Comma-separated commit counts, e.g. 1k,100k,1m.")
+    parser.add_argument("--authors", type=int, default=20)
+    parser.add_argument("--tags", type=int, default=10)
+    parser.add_argument("--files-per-commit", type=int, default=3)
+    parser.add_argument("--cases", default=",".join(CASES), help="Comma-separated case names.")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per case; the median time is reported.")
+    parser.add_argument("--timeout", type=int, default=3600, help="Seconds before a single run is abandoned.")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Where to write the JSON results.")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline results to compare against.")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline.")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed relative slowdown.")
+    parser.add_argument("--memory-threshold", type=float, default=0.25, help="Allowed relative peak memory growth.")
+    parser.add_argument("--min-seconds", type=float, default=0.05, help="Slowdowns smaller than this are noise.")
+    # Internal: run a single case inside a child process
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    parser.add_argument("--repo", help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    parser.add_argument("--result-file", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        run_case_in_process(args.case, args.repo, args.workdir, args.result_file)
+        return 0
+
+    cases = [name.strip() for name in args.cases.split(",") if name.strip()]
+    unknown = [name for name in cases if name not in CASES]
+    if unknown:
+        parser.error(f"unknown cases {unknown}, expected some of {list(CASES)}")
+
+    results = []
+    for size in args.sizes.split(","):
+        params = repo_params(parse_count(size), args.authors, args.tags, args.files_per_commit)
+        print(f"Preparing synthetic repository with {params['commits']} commits...")
+        repo_path = ensure_repo(params)
+        for name in cases:
+            runs = [run_case(name, repo_path, args.timeout) for _ in range(args.repeat)]
+            errors = [run["error"] for run in runs if "error" in run]
+            result = {"case": name, "commits": params["commits"], "repo_params": params}
+            if errors:
+                result["error"] = errors[0]
+            else:
+                result.update({
+                    "seconds": statistics.median(run["seconds"] for run in runs),
+                    "peak_rss_mb": max(run["peak_rss_mb"] for run in runs),
+                    "children_peak_rss_mb": max(run["children_peak_rss_mb"] for run in runs),
+                    "runs": [run["seconds"] for run in runs],
+                })
+            print(f"  {name}: " + (result["error"] if errors else f"{result['seconds']:.3f}s"))
+            results.append(result)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "git": git_version(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    regressions = 0
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        rows, regressions = compare(results, baseline, args.threshold, args.memory_threshold, args.min_seconds)
+        print_table(rows)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+
+    failures = sum("error" in result for result in results)
+    return 1 if regressions or failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
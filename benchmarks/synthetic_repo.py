@@ -0,0 +1,141 @@
+import argparse
+import hashlib
+import json
+import os
+import random
+import shutil
+import subprocess
+
+CACHE_DIR = os.getenv(
+    "GITGLYPH_BENCH_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "gitglyph", "bench"),
+)
+START_TIMESTAMP = 1500000000
+MESSAGE_KINDS = ("feat", "fix", "refactor", "docs", "chore")
+MAX_FILE_LINES = 24
+
+
+def repo_params(commits, authors=20, tags=10, files_per_commit=3, file_count=None, merge_every=25, seed=0):
+    return {
+        "commits": commits,
+        "authors": authors,
+        "tags": tags,
+        "files_per_commit": files_per_commit,
+        "file_count": file_count or max(50, commits // 20),
+        "merge_every": merge_every,
+        "seed": seed,
+    }
+
+
+def _data(payload):
+    encoded = payload.encode("utf-8")
+    return b"data %d\n%s\n" % (len(encoded), encoded)
+
+
+def fast_import_stream(params):
+    """
+    Yields a deterministic `git fast-import` stream for `params`, in chunks.
+    - authors follow a Zipf-like distribution, messages mix feat/fix/other prefixes
+    - every commit rewrites `files_per_commit` files, adding and deleting a few lines
+    - every `merge_every` commits a one-commit side branch is merged back into main
+    - `tags` lightweight tags are spread evenly over main
+    """
+    rng = random.Random(params["seed"])
+    author_weights = [1.0 / (rank + 1) for rank in range(params["authors"])]
+    file_lines = [[] for _ in range(params["file_count"])]
+    timestamp = START_TIMESTAMP
+    main_marks = []
+    mark = 0
+
+    def commit(ref, parent_from=None, merge=None):
+        nonlocal mark, timestamp
+        mark += 1
+        timestamp += rng.randint(600, 7200)
+        author = rng.choices(range(params["authors"]), weights=author_weights)[0]
+        kind = rng.choice(MESSAGE_KINDS)
+        ident = f"Author {author} <author{author}@example.com> {timestamp} +0000"
+        chunk = [
+            f"commit {ref}\nmark :{mark}\nauthor {ident}\ncommitter {ident}\n".encode("utf-8"),
+            _data(f"{kind}: change {mark}"),
+        ]
+        if parent_from is not None:
+            chunk.append(b"from :%d\n" % parent_from)
+        if merge is not None:
+            chunk.append(b"merge :%d\n" % merge)
+        for index in rng.sample(range(params["file_count"]), min(params["files_per_commit"], params["file_count"])):
+            lines = file_lines[index]
+            for _ in range(min(len(lines), rng.randint(0, 3 if len(lines) < MAX_FILE_LINES else 8))):
+                del lines[rng.randrange(len(lines))]
+            for _ in range(rng.randint(1, 4)):
+                lines.insert(rng.randint(0, len(lines)), f"line {mark} {rng.randrange(1 << 20)}")
+            chunk.append(f"M 100644 inline src/module_{index % 97}/file_{index}.txt\n".encode("utf-8"))
+            chunk.append(_data("\n".join(lines)))
+        chunk.append(b"\n")
+        return b"".join(chunk)
+
+    while mark < params["commits"]:
+        if params["merge_every"] and main_marks and len(main_marks) % params["merge_every"] == 0 and mark + 2 <= params["commits"]:
+            fork_point = main_marks[-1]
+            yield commit("refs/heads/side", parent_from=fork_point)
+            side_tip = mark
+            yield commit("refs/heads/main", parent_from=fork_point, merge=side_tip)
+        else:
+            yield commit("refs/heads/main")
+        main_marks.append(mark)
+
+    for tag in range(params["tags"]):
+        target = main_marks[(tag + 1) * len(main_marks) // (params["tags"] + 1)]
+        yield b"reset refs/tags/v%d.0\nfrom :%d\n\n" % (tag, target)
+    yield b"done\n"
+
+
+def generate_repo(path, params):
+    """Creates a repository at `path` from the synthetic history described by `params`."""
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    subprocess.run(["git", "init", "-q", "-b", "main", path], check=True)
+    process = subprocess.Popen(
+        ["git", "-C", path, "fast-import", "--quiet", "--done"],
+        stdin=subprocess.PIPE,
+    )
+    try:
+        for chunk in fast_import_stream(params):
+            process.stdin.write(chunk)
+    finally:
+        process.stdin.close()
+    if process.wait() != 0:
+        raise RuntimeError(f"git fast-import failed for {path}")
+    with open(os.path.join(path, ".git", "gitglyph-bench.json"), "w") as f:
+        json.dump(params, f)
+
+
+def ensure_repo(params, cache_dir=CACHE_DIR):
+    """Returns the path of a synthetic repository for `params`, generating it only once."""
+    digest = hashlib.sha1(json.dumps(params, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+    path = os.path.join(cache_dir, f"repo-{params['commits']}-{digest}")
+    marker = os.path.join(path, ".git", "gitglyph-bench.json")
+    if not os.path.exists(marker):
+        os.makedirs(cache_dir, exist_ok=True)
+        generate_repo(path, params)
+    return path
+
+
+def parse_count(value):
+    """Parses counts like 1000, 100k or 1m."""
+    value = value.strip().lower()
+    multiplier = {"k": 1000, "m": 1000000}.get(value[-1:], 1)
+    return int(value[:-1] if multiplier > 1 else value) * multiplier
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a deterministic synthetic Git repository for benchmarks.")
+    parser.add_argument("path", help="Where to create the repository (replaced if it exists).")
+    parser.add_argument("--commits", type=parse_count, default=1000)
+    parser.add_argument("--authors", type=int, default=20)
+    parser.add_argument("--tags", type=int, default=10)
+    parser.add_argument("--files-per-commit", type=int, default=3)
+    parser.add_argument("--file-count", type=int, default=None)
+    parser.add_argument("--merge-every", type=int, default=25)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    generate_repo(args.path, repo_params(args.commits, args.authors, args.tags, args.files_per_commit, args.file_count, args.merge_every, args.seed))
@@ -1,54 +1,304 @@
-
 import argparse
 import git
 import svgwrite
 import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# Simple visualization: each commit is a circle along one row, tags are larger circles
+X_OFFSET = 50
+Y_OFFSET = 50
+COMMIT_SPACING = 20
+CLOSING_TAG = '</svg>'
+
+def build_tag_map(repo):
+    """
+    Maps commit SHA -> list of tag names, built once from a single `git for-each-ref` call.
+    Annotated tags are peeled to the commit they point at.
+    """
+    tag_map = {}
+    refs = repo.git.for_each_ref("--format=%(objectname) %(*objectname) %(refname:short)", "refs/tags")
+    for line in refs.splitlines():
+        object_sha, peeled_sha, name = line.split(" ", 2)
+        tag_map.setdefault(peeled_sha or object_sha, []).append(name)
+    return tag_map
+
+def iter_revisions(repo_path, rev_range):
+    """
+    Streams (commit timestamp, SHA) for `rev_range` from one `git rev-list` pipe, oldest first.
+    Raises CalledProcessError (with git's stderr) if the walk fails, e.g. on an unknown revision.
+    """
+    process = subprocess.Popen(["git", "-C", repo_path, "rev-list", "--reverse", "--timestamp", rev_range],
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    try:
+        for line in process.stdout:
+            timestamp, sha = line.split()
+            yield int(timestamp), sha
+    finally:
+        process.stdout.close()
+        stderr = process.stderr.read()
+        process.stderr.close()
+        returncode = process.wait()
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, process.args, stderr=stderr)
+
+def new_drawing(output_path):
+    # The full profile has no coordinate limit (tiny caps numbers at 32767, about 1600 commits),
+    # and validation is off: attribute checks cost more than writing the elements.
+    return svgwrite.Drawing(output_path, profile='full', size=('100%', '100%'), debug=False)
+
+def commit_elements(dwg, index, tag_names):
+    """Serialized SVG elements for the commit at chronological position `index` and its tags."""
+    x = X_OFFSET + index * COMMIT_SPACING
+    y = Y_OFFSET
+
+    # Basic commit visualization
+    elements = [dwg.circle((x, y), r=5, fill='blue', stroke='black', stroke_width=0.5).tostring()]
+    for tag_name in tag_names:
+        elements.extend(tag_elements(dwg, index, tag_name))
+    return elements
+
+def tag_elements(dwg, index, tag_name):
+    x = X_OFFSET + index * COMMIT_SPACING
+    y = Y_OFFSET
+    tag_marker = dwg.circle((x, y), r=10, fill='red', stroke='black', stroke_width=1)
+    tag_marker.set_desc(title=f"Tag: {tag_name}")
+    return [tag_marker.tostring(), dwg.text(tag_name, insert=(x + 12, y + 5), fill='black', font_size='8px').tostring()]
+
+def render_glyph(repo, output_path):
+    """
+    Writes the glyph of `repo` to `output_path`, streaming elements to the file as commits
+    are produced so memory stays flat regardless of history length.
+    Returns the render state that `append_glyph` needs to extend the glyph later.
+    """
+    dwg = new_drawing(output_path)
+    dwg.add(dwg.rect((0, 0), ('100%', '100%'), fill='white'))
+
+    tag_map = build_tag_map(repo)
+    head = repo.git.rev_parse("HEAD")
+    count = 0
+    latest = 0
+
+    # Serialize the document shell once and stream the commit elements into it
+    document = dwg.tostring()
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write('<?xml version="1.0" encoding="utf-8" ?>\n')
+        f.write(document[:-len(CLOSING_TAG)])
+
+        for timestamp, sha in iter_revisions(repo.git_dir, head): # Display chronologically
+            f.write("".join(commit_elements(dwg, count, tag_map.get(sha, ()))))
+            count += 1
+            latest = max(latest, timestamp)
+
+        f.write(CLOSING_TAG)
+
+    return {"head": head, "commits": count, "latest": latest, "tags": tags_by_name(tag_map)}
+
+def tags_by_name(tag_map):
+    return {name: sha for sha, names in tag_map.items() for name in names}
+
+def append_glyph(repo, output_path, previous):
+    """
+    Extends a glyph rendered at `previous["head"]` to the current HEAD by appending only the new
+    commits and their tags, producing the same file a full render would. Returns the new render
+    state, or None when the glyph cannot be extended: history rewritten, tags moved, deleted or
+    added to commits already drawn, or new commits dated before old ones (`git rev-list` would
+    interleave them).
+    """
+    head = repo.git.rev_parse("HEAD")
+    tag_map = build_tag_map(repo)
+    tags = tags_by_name(tag_map)
+    if any(tags.get(name) != sha for name, sha in previous["tags"].items()):
+        return None
+    if head != previous["head"] and not repo.is_ancestor(previous["head"], head):
+        return None
+    new_revisions = list(iter_revisions(repo.git_dir, f"{previous['head']}..{head}"))
+    if any(timestamp < previous["latest"] for timestamp, _ in new_revisions):
+        return None
+    new_shas = {sha for _, sha in new_revisions}
+    if any(name not in previous["tags"] and sha not in new_shas for name, sha in tags.items()):
+        return None
+
+    dwg = new_drawing(output_path)
+    elements = []
+    for offset, (_, sha) in enumerate(new_revisions):
+        elements.extend(commit_elements(dwg, previous["commits"] + offset, tag_map.get(sha, ())))
+
+    with open(output_path, 'r+b') as f:
+        f.seek(-len(CLOSING_TAG), os.SEEK_END)
+        if f.read() != CLOSING_TAG.encode('utf-8'):
+            return None
+        f.seek(-len(CLOSING_TAG), os.SEEK_END)
+        f.truncate()
+        f.write(("".join(elements) + CLOSING_TAG).encode('utf-8'))
+
+    latest = max([previous["latest"]] + [timestamp for timestamp, _ in new_revisions])
+    return {"head": head, "commits": previous["commits"] + len(new_revisions), "latest": latest, "tags": tags}
 
 def generate_glyph(repo_path, output_path):
-    """Generates a static SVG Glyph from a local Git repository."""
+    """
+    Generates a static SVG Glyph from a local Git repository.
+    Returns the render state (see `render_glyph`), or None if `repo_path` is not a repository.
+    """
     try:
         repo = git.Repo(repo_path)
-    except git.InvalidGitRepositoryError:
+    except (git.InvalidGitRepositoryError, git.NoSuchPathError):
         print(f"Error: '{repo_path}' is not a valid Git repository.")
-        return
+        return None
 
-    dwg = svgwrite.Drawing(output_path, profile='tiny', size=('100%', '100%'))
-    dwg.add(dwg.rect((0, 0), ('100%', '100%'), fill='white'))
+    state = render_glyph(repo, output_path)
+    print(f"Glyph generated successfully at: {output_path}")
+    return state
 
-    # Simple visualization: each commit is a circle, tags are larger circles
-    x_offset = 50
-    y_offset = 50
-    commit_spacing = 20
+def update_glyph(repo_path, output_path, previous=None):
+    """
+    Worker entry point for batch and watch modes: brings the glyph at `output_path` up to date.
+    Nothing is done when HEAD and tags are unchanged since `previous`; a moved HEAD is appended
+    when possible and fully re-rendered otherwise. Returns a result dict with the new state.
+    """
+    start = time.perf_counter()
+    result = {"repo_path": repo_path, "output_path": output_path, "state": previous}
+    try:
+        repo = git.Repo(repo_path)
+        state = None
+        if previous is not None and os.path.exists(output_path):
+            if snapshot_refs(repo) == (previous["head"], previous["tags"]):
+                result.update(mode="unchanged", seconds=time.perf_counter() - start, commits=previous["commits"])
+                return result
+            state = append_glyph(repo, output_path, previous)
+            result["mode"] = "append"
+        if state is None:
+            state = render_glyph(repo, output_path)
+            result["mode"] = "full"
+        result.update(state=state, commits=state["commits"])
+    except (git.InvalidGitRepositoryError, git.NoSuchPathError):
+        result.update(mode="failed", error="not a valid Git repository")
+    except subprocess.CalledProcessError as e:
+        result.update(mode="failed", error=(e.stderr or "").strip() or str(e))
+    except Exception as e:
+        result.update(mode="failed", error=str(e) or type(e).__name__)
+    result["seconds"] = time.perf_counter() - start
+    return result
 
-    commits = list(repo.iter_commits())
-    commits.reverse() # Display chronologically
+def snapshot_refs(repo):
+    """The refs a glyph depends on: (HEAD SHA, tag name -> commit SHA)."""
+    return repo.git.rev_parse("HEAD"), tags_by_name(build_tag_map(repo))
 
-    for i, commit in enumerate(commits):
-        x = x_offset + i * commit_spacing
-        y = y_offset
+def read_manifest(path):
+    """
+    Reads a batch manifest: one repository per line, optionally followed by its output path
+    (separated by a tab). Blank lines and lines starting with '#' are ignored.
+    """
+    entries = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            repo_path, _, output_path = line.partition('\t')
+            entries.append((repo_path.strip(), output_path.strip() or None))
+    return entries
 
-        # Basic commit visualization
-        dwg.add(dwg.circle((x, y), r=5, fill='blue', stroke='black', stroke_width=0.5))
+def assign_outputs(entries, output_dir):
+    """Fills in missing output paths as <output_dir>/<repo name>.svg, suffixed when names collide."""
+    used = {output for _, output in entries if output}
+    assigned = []
+    for repo_path, output_path in entries:
+        if output_path is None:
+            name = os.path.basename(os.path.realpath(repo_path)) or "glyph"
+            output_path = os.path.join(output_dir, f"{name}.svg")
+            suffix = 2
+            while output_path in used:
+                output_path = os.path.join(output_dir, f"{name}-{suffix}.svg")
+                suffix += 1
+        used.add(output_path)
+        assigned.append((repo_path, output_path))
+    return assigned
 
-        # Check for tags on this commit
-        for tag in repo.tags:
-            if tag.commit == commit:
-                dwg.add(dwg.circle((x, y), r=10, fill='red', stroke='black', stroke_width=1,
-                                   title=f"Tag: {tag.name}"))
-                dwg.add(dwg.text(tag.name, insert=(x + 12, y + 5), fill='black', font_size='8px'))
+def run_round(pool, entries, states):
+    """Updates every glyph once, in the pool when there is one; returns results in completion order."""
+    if pool is None:
+        results = [update_glyph(repo_path, output_path, states.get(output_path)) for repo_path, output_path in entries]
+    else:
+        futures = [pool.submit(update_glyph, repo_path, output_path, states.get(output_path)) for repo_path, output_path in entries]
+        results = [future.result() for future in futures]
+    for result in results:
+        if result["mode"] != "failed":
+            states[result["output_path"]] = result["state"]
+    return results
 
-    dwg.save()
-    print(f"Glyph generated successfully at: {output_path}")
+def print_summary(results, wall_seconds):
+    print(f"{'repository':<50} {'mode':>9} {'commits':>9} {'seconds':>9}")
+    for result in sorted(results, key=lambda r: -r["seconds"]):
+        detail = f"  {result['error']}" if result["mode"] == "failed" else ""
+        print(f"{result['repo_path']:<50} {result['mode']:>9} {result.get('commits', 0):>9} {result['seconds']:>9.3f}{detail}")
+    rendered = [r for r in results if r["mode"] in ("full", "append")]
+    failed = sum(r["mode"] == "failed" for r in results)
+    busy = sum(r["seconds"] for r in results)
+    commits = sum(r.get("commits", 0) for r in rendered)
+    print(f"{len(rendered)} rendered, {len(results) - len(rendered) - failed} unchanged, {failed} failed; "
+          f"{commits} commits in {wall_seconds:.3f}s wall ({busy:.3f}s in workers)")
+
+def run_batch(entries, jobs, watch=False, interval=10.0):
+    """
+    Renders every (repo_path, output_path) entry with `jobs` worker processes and prints a timing summary.
+    With `watch`, keeps polling refs every `interval` seconds and updates only the glyphs whose
+    HEAD or tags moved, appending new commits to the existing SVG when possible.
+    Returns the number of failed repositories in the last round.
+    """
+    for _, output_path in entries:
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    states = {}
+    pool = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+    try:
+        while True:
+            start = time.perf_counter()
+            results = run_round(pool, entries, states)
+            changed = [r for r in results if r["mode"] != "unchanged"]
+            if not watch or changed:
+                print_summary(changed if watch else results, time.perf_counter() - start)
+            if not watch:
+                return sum(r["mode"] == "failed" for r in results)
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
 
 def main():
-    parser = argparse.ArgumentParser(description="Generate a GitGlyph SVG from a local Git repository.")
-    parser.add_argument("repo_path", help="Path to the local Git repository.")
-    parser.add_argument("-o", "--output", default="glyph.svg",
-                        help="Output path for the SVG file (default: glyph.svg).")
+    parser = argparse.ArgumentParser(description="Generate GitGlyph SVGs from local Git repositories.")
+    parser.add_argument("repo_paths", nargs="*", help="Paths to local Git repositories.")
+    parser.add_argument("-o", "--output", default=None,
+                        help="Output path for the SVG file when rendering a single repository (default: glyph.svg).")
+    parser.add_argument("-m", "--manifest", help="File listing repositories, one per line, each optionally followed by a tab and its output path.")
+    parser.add_argument("-d", "--output-dir", default="glyphs",
+                        help="Directory for the glyphs of several repositories, named after each repository (default: glyphs).")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes used to render several repositories (default: CPU count).")
+    parser.add_argument("-w", "--watch", action="store_true",
+                        help="Keep polling refs and re-render glyphs whose HEAD or tags moved.")
+    parser.add_argument("--interval", type=float, default=10.0, help="Seconds between polls in watch mode (default: 10).")
 
     args = parser.parse_args()
 
-    generate_glyph(args.repo_path, args.output)
+    entries = [(repo_path, None) for repo_path in args.repo_paths]
+    if args.manifest:
+        entries.extend(read_manifest(args.manifest))
+    if not entries:
+        parser.error("give at least one repository path or a --manifest")
+    if args.output and len(entries) > 1:
+        parser.error("--output names a single glyph; use --output-dir for several repositories")
+
+    if len(entries) == 1 and not args.watch:
+        generate_glyph(entries[0][0], args.output or entries[0][1] or "glyph.svg")
+        return 0
+
+    if len(entries) == 1 and entries[0][1] is None:
+        entries = [(entries[0][0], args.output or "glyph.svg")]
+    return 1 if run_batch(assign_outputs(entries, args.output_dir), max(1, args.jobs), args.watch, args.interval) else 0
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -2,6 +2,9 @@ document.addEventListener('DOMContentLoaded', () => {
     const loadConstellationBtn = document.getElementById('loadConstellation');
     const repoPathInput = document.getElementById('repoPath');
     const constellationContainer = document.getElementById('constellation-container');
+    const progressLabel = document.getElementById('constellation-progress');
+
+    let activeStream = null;
 
     loadConstellationBtn.addEventListener('click', async () => {
         const repoPath = repoPathInput.value;
@@ -10,71 +13,111 @@ document.addEventListener('DOMContentLoaded', () => {
             return;
         }
 
-        constellationContainer.innerHTML = 'Loading...';
+        if (activeStream) {
+            activeStream.abort(); // Only one constellation streams at a time
+        }
+        activeStream = new AbortController();
+
+        constellationContainer.innerHTML = '';
+        progressLabel.textContent = 'Loading...';
+        const constellation = createConstellation();
 
         try {
-            const response = await fetch(`http://localhost:8000/api/contributor-constellation?repo_path=${encodeURIComponent(repoPath)}`, {
+            const response = await fetch(`http://localhost:8000/api/contributor-constellation/stream?format=ndjson&repo_path=${encodeURIComponent(repoPath)}`, {
                 headers: {
                     'X-API-Key': 'test_api_key' // Replace with actual API key or authentication mechanism
-                }
+                },
+                signal: activeStream.signal,
             });
             if (!response.ok) {
                 throw new Error(`HTTP error! status: ${response.status}`);
             }
-            const data = await response.json();
-            renderConstellation(data);
+            await readFrames(response, frame => handleFrame(constellation, frame));
         } catch (error) {
+            if (error.name === 'AbortError') {
+                return;
+            }
             console.error('Error fetching constellation data:', error);
             constellationContainer.innerHTML = `<p style="color: red;">Error loading constellation: ${error.message}. Please ensure the backend is running and the repository path is valid.</p>`;
+            progressLabel.textContent = '';
         }
     });
 
-    function renderConstellation(data) {
-        constellationContainer.innerHTML = ''; // Clear previous content
+    // Reads an NDJSON response body, calling onFrame for each complete line as it arrives.
+    async function readFrames(response, onFrame) {
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffered = '';
+        for (;;) {
+            const { value, done } = await reader.read();
+            if (done) {
+                break;
+            }
+            buffered += decoder.decode(value, { stream: true });
+            const lines = buffered.split('\n');
+            buffered = lines.pop();
+            lines.filter(line => line.trim()).forEach(line => onFrame(JSON.parse(line)));
+        }
+        if (buffered.trim()) {
+            onFrame(JSON.parse(buffered));
+        }
+    }
 
+    function handleFrame(constellation, frame) {
+        switch (frame.type) {
+        case 'nodes':
+            constellation.upsertNodes(frame.nodes);
+            break;
+        case 'links':
+            constellation.addLinkWeights(frame.links);
+            break;
+        case 'progress':
+            progressLabel.textContent = frame.total
+                ? `Read ${frame.commits} of ${frame.total} commits...`
+                : 'Reading history...';
+            break;
+        case 'done':
+            // The final frame is authoritative: it replaces everything streamed so far
+            constellation.reset(frame.nodes, frame.links);
+            progressLabel.textContent = `${frame.nodes.length} contributors, ${frame.links.length} collaborations`;
+            break;
+        case 'error':
+            throw new Error(frame.detail);
+        }
+    }
+
+    // Builds the force graph once and lets streamed frames grow it in place.
+    function createConstellation() {
         const width = constellationContainer.clientWidth;
         const height = constellationContainer.clientHeight;
 
+        const nodesById = new Map();
+        const linksByKey = new Map();
+        let redrawScheduled = false;
+
         const svg = d3.select(constellationContainer).append('svg')
             .attr('width', width)
             .attr('height', height);
 
-        const simulation = d3.forceSimulation(data.nodes)
-            .force('link', d3.forceLink(data.links).id(d => d.id).distance(100))
-            .force('charge', d3.forceManyBody().strength(-300))
-            .force('center', d3.forceCenter(width / 2, height / 2));
-
-        const link = svg.append('g')
+        const linkGroup = svg.append('g')
             .attr('stroke', '#999')
-            .attr('stroke-opacity', 0.6)
-            .selectAll('line')
-            .data(data.links)
-            .join('line')
-            .attr('stroke-width', d => Math.sqrt(d.value));
+            .attr('stroke-opacity', 0.6);
 
-        const node = svg.append('g')
+        const nodeGroup = svg.append('g')
             .attr('stroke', '#fff')
-            .attr('stroke-width', 1.5)
-            .selectAll('circle')
-            .data(data.nodes)
-            .join('circle')
-            .attr('r', 10)
-            .attr('fill', 'steelblue')
-            .call(drag(simulation));
-
-        node.append('title')
-            .text(d => d.name);
-
-        const labels = svg.append('g')
-            .attr('class', 'labels')
-            .selectAll('text')
-            .data(data.nodes)
-            .enter()
-            .append('text')
-            .attr('class', 'node-label')
-            .attr('dx', 12)
-            .attr('dy', '.35em')
-            .text(d => d.name);
+            .attr('stroke-width', 1.5);
+
+        const labelGroup = svg.append('g')
+            .attr('class', 'labels');
+
+        const simulation = d3.forceSimulation()
+            .force('link', d3.forceLink().id(d => d.id).distance(100))
+            .force('charge', d3.forceManyBody().strength(-300))
+            .force('center', d3.forceCenter(width / 2, height / 2));
+
+        let link = linkGroup.selectAll('line');
+        let node = nodeGroup.selectAll('circle');
+        let labels = labelGroup.selectAll('text');
 
         simulation.on('tick', () => {
             link
@@ -86,34 +129,111 @@ document.addEventListener('DOMContentLoaded', () => {
             node
                 .attr('cx', d => d.x)
                 .attr('cy', d => d.y);
-            
+
             labels
                 .attr('x', d => d.x)
                 .attr('y', d => d.y);
         });
 
-        function drag(simulation) {
-            function dragstarted(event) {
-                if (!event.active) simulation.alphaTarget(0.3).restart();
-                event.subject.fx = event.subject.x;
-                event.subject.fy = event.subject.y;
+        // Frames can arrive faster than the browser paints; redraw at most once per animation frame.
+        function scheduleRedraw() {
+            if (!redrawScheduled) {
+                redrawScheduled = true;
+                window.requestAnimationFrame(redraw);
             }
+        }
 
-            function dragged(event) {
-                event.subject.fx = event.x;
-                event.subject.fy = event.y;
-            }
+        function redraw() {
+            redrawScheduled = false;
+            const nodes = Array.from(nodesById.values());
+            const links = Array.from(linksByKey.values());
+
+            node = node
+                .data(nodes, d => d.id)
+                .join(enter => enter.append('circle')
+                    .attr('r', 10)
+                    .attr('fill', 'steelblue')
+                    .call(drag(simulation))
+                    .call(circle => circle.append('title').text(d => d.name)));
+
+            labels = labels
+                .data(nodes, d => d.id)
+                .join('text')
+                .attr('class', 'node-label')
+                .attr('dx', 12)
+                .attr('dy', '.35em')
+                .text(d => d.name);
+
+            link = link
+                .data(links, d => d.key)
+                .join('line')
+                .attr('stroke-width', d => Math.sqrt(d.value));
+
+            simulation.nodes(nodes);
+            simulation.force('link').links(links);
+            simulation.alpha(0.3).restart();
+        }
 
-            function dragended(event) {
-                if (!event.active) simulation.alphaTarget(0);
-                event.subject.fx = null;
-                event.subject.fy = null;
-            }
+        function upsertNodes(nodes) {
+            nodes.forEach(update => {
+                const existing = nodesById.get(update.id);
+                if (existing) {
+                    existing.name = update.name;
+                    existing.commits = update.commits;
+                } else {
+                    nodesById.set(update.id, { ...update }); // Positions are added by the simulation
+                }
+            });
+            scheduleRedraw();
+        }
 
-            return d3.drag()
-                .on('start', dragstarted)
-                .on('drag', dragged)
-                .on('end', dragended);
+        function addLinkWeights(links) {
+            links.forEach(update => {
+                const key = `${update.source}\u0000${update.target}`;
+                const existing = linksByKey.get(key);
+                if (existing) {
+                    existing.value += update.value;
+                } else {
+                    linksByKey.set(key, { key, source: update.source, target: update.target, value: update.value });
+                }
+            });
+            scheduleRedraw();
         }
+
+        function reset(nodes, links) {
+            const retained = new Set(nodes.map(n => n.id));
+            Array.from(nodesById.keys())
+                .filter(id => !retained.has(id))
+                .forEach(id => nodesById.delete(id));
+            linksByKey.clear();
+            upsertNodes(nodes);
+            addLinkWeights(links);
+        }
+
+        return { upsertNodes, addLinkWeights, reset };
+    }
+
+    function drag(simulation) {
+        function dragstarted(event) {
+            if (!event.active) simulation.alphaTarget(0.3).restart();
+            event.subject.fx = event.subject.x;
+            event.subject.fy = event.subject.y;
+        }
+
+        function dragged(event) {
+            event.subject.fx = event.x;
+            event.subject.fy = event.y;
+        }
+
+        function dragended(event) {
+            if (!event.active) simulation.alphaTarget(0);
+            event.subject.fx = null;
+            event.subject.fy = null;
+        }
+
+        return d3.drag()
+            .on('start', dragstarted)
+            .on('drag', dragged)
+            .on('end', dragended);
     }
-});
\ No newline at end of file
+});
@@ -12,6 +12,8 @@ module.exports = [
                 URLSearchParams: "readonly",
                 console: "readonly",
                 alert: "readonly",
+                TextDecoder: "readonly",
+                AbortController: "readonly",
             },
         },
         rules: {
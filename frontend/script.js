@@ -103,7 +103,7 @@
             listItem.innerHTML = `
                 <h4>${collection.name}</h4>
                 <p>${collection.description || 'No description.'}</p>
-                <p>Snapshots: ${collection.snapshots.length}</p>
+                <p>Snapshots: ${collection.snapshot_count}</p>
                 <button class="view-collection-btn" data-collection-id="${collection.id}">View Collection</button>
             `;
             userCollectionsList.appendChild(listItem);
@@ -0,0 +1,34 @@
+import os
+import subprocess
+
+import pytest
+
+
+class GitRepo:
+    """A scratch repository whose commits are fully controlled (author, date, files)."""
+
+    def __init__(self, path):
+        self.path = str(path)
+        os.makedirs(self.path)
+        self.git("init", "-q", "-b", "main")
+
+    def git(self, *args, author=("Ada", "ada@example.com"), date=None):
+        env = dict(os.environ, GIT_AUTHOR_NAME=author[0], GIT_AUTHOR_EMAIL=author[1],
+                   GIT_COMMITTER_NAME=author[0], GIT_COMMITTER_EMAIL=author[1])
+        if date is not None:
+            env["GIT_AUTHOR_DATE"] = env["GIT_COMMITTER_DATE"] = f"{date} +0000"
+        result = subprocess.run(["git", "-C", self.path, *args], env=env, check=True, capture_output=True, text=True)
+        return result.stdout.strip()
+
+    def commit(self, message, files, date, author=("Ada", "ada@example.com")):
+        for name, content in files.items():
+            with open(os.path.join(self.path, name), "w") as f:
+                f.write(content)
+        self.git("add", "-A")
+        self.git("commit", "-q", "-m", message, author=author, date=date)
+        return self.git("rev-parse", "HEAD")
+
+
+@pytest.fixture
+def git_repo(tmp_path):
+    return GitRepo(tmp_path / "repo")
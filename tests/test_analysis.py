@@ -0,0 +1,14 @@
+import numpy as np
+import pytest
+
+from backend.analysis import DOWNSAMPLERS
+
+
+@pytest.mark.parametrize("method", sorted(DOWNSAMPLERS))
+@pytest.mark.parametrize("max_points", [0, 1, 2, 3, 7, 50])
+def test_downsamplers_respect_the_point_budget(method, max_points):
+    values = np.sin(np.arange(100) / 5.0) + np.arange(100) % 7
+    indices = DOWNSAMPLERS[method](values, max_points)
+    assert 1 <= len(indices) <= max(max_points, 1)
+    assert list(indices) == sorted(set(indices))
+    assert 0 <= indices[0] and indices[-1] < len(values)
@@ -0,0 +1,19 @@
+import subprocess
+
+import pytest
+
+from cli.main import iter_revisions
+
+
+def test_iter_revisions_streams_oldest_first(git_repo):
+    first = git_repo.commit("first", {"a.txt": "a"}, date="2024-01-01T00:00:00")
+    second = git_repo.commit("second", {"a.txt": "b"}, date="2024-01-02T00:00:00")
+    assert [sha for _, sha in iter_revisions(git_repo.path, "HEAD")] == [first, second]
+
+
+def test_iter_revisions_raises_when_git_fails(git_repo):
+    git_repo.commit("first", {"a.txt": "a"}, date="2024-01-01T00:00:00")
+    with pytest.raises(subprocess.CalledProcessError) as error:
+        list(iter_revisions(git_repo.path, "no-such-branch"))
+    assert error.value.returncode != 0
+    assert "no-such-branch" in error.value.stderr
@@ -0,0 +1,90 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pytest
+
+from backend import coalesce
+from backend.coalesce import COALESCE_METRIC, SingleFlight, analysis_key
+from backend.instrumentation import MetricsRegistry
+
+
+@pytest.fixture
+def counts(monkeypatch):
+    """Fresh metrics for the coalescing counter; returns a function reading (kind, outcome) -> count."""
+    registry = MetricsRegistry()
+    monkeypatch.setattr(coalesce, "metrics", registry)
+    return lambda: {dict(labels)["kind"] + "/" + dict(labels)["outcome"]: count
+                    for (name, labels), count in registry._counters.items() if name == COALESCE_METRIC}
+
+
+def run_concurrently(flight, key, function, callers=4):
+    """Starts `callers` threads calling flight.do(key, function) and waits until all of them have joined the flight."""
+    pool = ThreadPoolExecutor(max_workers=callers)
+    futures = [pool.submit(flight.do, key, function)]
+    while key not in flight._flights:
+        threading.Event().wait(0.001)
+    futures += [pool.submit(flight.do, key, function) for _ in range(callers - 1)]
+    return pool, futures
+
+
+def test_concurrent_callers_share_one_computation(counts):
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return {"answer": 42}
+
+    pool, futures = run_concurrently(flight, ("health", "repo"), compute)
+    while sum(counts().values()) < 4:
+        threading.Event().wait(0.001)
+    release.set()
+    results = [future.result(5) for future in futures]
+    pool.shutdown()
+    assert calls == [1]
+    assert all(result is results[0] for result in results)
+    assert counts() == {"health/computed": 1, "health/coalesced": 3}
+
+
+def test_an_exception_reaches_every_waiter():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def compute():
+        release.wait(5)
+        raise RuntimeError("git log failed")
+
+    pool, futures = run_concurrently(flight, ("health", "repo"), compute)
+    release.set()
+    for future in futures:
+        with pytest.raises(RuntimeError, match="git log failed"):
+            future.result(5)
+    pool.shutdown()
+    assert flight._flights == {}
+
+
+def test_keys_are_forgotten_once_computed(counts):
+    flight = SingleFlight()
+    assert flight.do(("health", "repo"), lambda: 1) == 1
+    assert flight.do(("health", "repo"), lambda: 2) == 2 # Computed again, not served from the last flight
+    assert flight._flights == {}
+
+    started = Future()
+    future, computed = flight.submit(("constellation", "repo"), lambda: started)
+    shared, coalesced = flight.submit(("constellation", "repo"), Future)
+    assert (computed, coalesced) == (True, False) and shared is future
+    started.set_result("done")
+    assert flight._flights == {}
+    assert flight.submit(("constellation", "repo"), Future)[1]
+    assert counts() == {"health/computed": 2, "constellation/computed": 2, "constellation/coalesced": 1}
+
+
+def test_analysis_key_pins_head_and_parameters(git_repo):
+    git_repo.commit("first", {"a.txt": "a"}, date="2024-01-01T00:00:00")
+    key = analysis_key("health", git_repo.path, {"window": 4})
+    assert key == analysis_key("health", git_repo.path + "/", {"window": 4})
+    assert key != analysis_key("health", git_repo.path, {"window": 8})
+    git_repo.commit("second", {"a.txt": "b"}, date="2024-01-02T00:00:00")
+    assert key != analysis_key("health", git_repo.path, {"window": 4})
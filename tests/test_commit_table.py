@@ -0,0 +1,72 @@
+import pytest
+
+from backend import commit_table
+from backend.analysis_state import state_from_table
+from backend.contributor_analysis import table_contributions
+
+
+@pytest.fixture
+def table_dirs(tmp_path, monkeypatch):
+    def use(name):
+        monkeypatch.setattr(commit_table, "TABLE_DIR", str(tmp_path / name))
+    return use
+
+
+def read_table_file(repo_path):
+    with open(commit_table.table_path(repo_path, commit_table.resolve_revision(repo_path)), "rb") as f:
+        return f.read()
+
+
+def test_extended_table_equals_cold_build(git_repo, table_dirs):
+    day = 1_700_000_000
+    git_repo.commit("initial", {"a.txt": "a\n"}, day)
+    git_repo.git("checkout", "-q", "-b", "side")
+    # An old branch: its commits predate the ones added to main afterwards
+    git_repo.commit("feat: side work", {"side.txt": "s\n"}, day + 100, author=("Bo", "bo@example.com"))
+    git_repo.commit("fix: side fix", {"side.txt": "s\nt\n"}, day + 200, author=("Bo", "bo@example.com"))
+    git_repo.git("checkout", "-q", "main")
+    git_repo.commit("main work", {"a.txt": "a\nb\n", "b.txt": "b\n"}, day + 1000)
+    git_repo.commit("more main", {"b.txt": "b\nc\n"}, day + 2000, author=("Cy", "cy@example.com"))
+
+    table_dirs("warm")
+    commit_table.get_table(git_repo.path)
+    git_repo.git("merge", "-q", "--no-ff", "-m", "merge side", "side", date=day + 3000)
+    git_repo.commit("fix: after merge", {"c.txt": "c\n"}, day + 4000, author=("Bo Bee", "bo@example.com"))
+    extended = commit_table.get_table(git_repo.path)
+    warm_bytes = read_table_file(git_repo.path)
+
+    table_dirs("cold")
+    cold = commit_table.get_table(git_repo.path)
+    assert read_table_file(git_repo.path) == warm_bytes
+
+    assert list(extended.messages()) == list(cold.messages())
+    assert state_from_table(extended) == state_from_table(cold)
+    assert table_contributions(extended)[0] == table_contributions(cold)[0]
+    assert table_contributions(extended)[0][0]["name"] == "Bo Bee"
+
+
+def test_rewritten_history_rebuilds(git_repo, table_dirs):
+    table_dirs("tables")
+    first = git_repo.commit("one", {"a.txt": "1\n"}, 1_700_000_000)
+    git_repo.commit("two", {"a.txt": "2\n"}, 1_700_000_100)
+    commit_table.get_table(git_repo.path)
+    git_repo.git("reset", "-q", "--hard", first)
+    git_repo.commit("rewritten", {"b.txt": "b\n"}, 1_700_000_200)
+
+    table = commit_table.get_table(git_repo.path)
+    assert list(table.messages()) == ["rewritten\n", "one\n"]
+    assert table["first_parent"].tolist() == [-1, 0]
+
+
+def test_linear_extension_equals_cold_build(git_repo, table_dirs):
+    git_repo.commit("one", {"a.txt": "1\n"}, 1_700_000_000)
+    table_dirs("warm")
+    commit_table.get_table(git_repo.path)
+    git_repo.commit("two", {"b.txt": "2\n"}, 1_700_000_100, author=("Bo", "bo@example.com"))
+    git_repo.commit("three", {"a.txt": "3\n", "c.txt": "3\n"}, 1_700_000_200)
+    commit_table.get_table(git_repo.path)
+    warm_bytes = read_table_file(git_repo.path)
+
+    table_dirs("cold")
+    commit_table.get_table(git_repo.path)
+    assert read_table_file(git_repo.path) == warm_bytes
@@ -0,0 +1,20 @@
+import numpy as np
+import pytest
+
+from backend.cooccurrence import top_k_mask
+
+# A star around node 0 plus one light edge between two leaves
+SOURCES = np.array([0, 0, 0, 1])
+TARGETS = np.array([1, 2, 3, 2])
+WEIGHTS = np.array([5, 3, 1, 2])
+
+
+def test_edges_survive_when_either_endpoint_ranks_them_in_its_top_k():
+    assert top_k_mask(SOURCES, TARGETS, WEIGHTS, 1).tolist() == [True, True, True, False]
+    assert top_k_mask(SOURCES, TARGETS, WEIGHTS, 3).all()
+
+
+@pytest.mark.parametrize("top_k", [0, -1])
+def test_budgets_below_one_are_rejected(top_k):
+    with pytest.raises(ValueError):
+        top_k_mask(SOURCES, TARGETS, WEIGHTS, top_k)
@@ -0,0 +1,53 @@
+import gzip
+import os
+
+import pytest
+
+from backend import glyph_cache as glyph_cache_module
+from backend.glyph_cache import GlyphCache
+
+KEY = "ab" + "0" * 62
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return GlyphCache(cache_dir=str(tmp_path / "cache"))
+
+
+def disk_files(cache):
+    return sorted(name for _, _, files in os.walk(cache.cache_dir) for name in files)
+
+
+@pytest.mark.parametrize("corrupt", [
+    lambda data: data[:len(data) // 2], # Truncated gzip stream
+    lambda data: gzip.compress(b'{"svg": '), # Valid gzip, undecodable JSON
+    lambda data: b"not gzip at all",
+])
+def test_unreadable_entries_are_discarded_as_misses(cache, corrupt):
+    cache.put(KEY, {"svg": "<svg/>" * 100})
+    path = cache._path(KEY)
+    with open(path, "rb") as f:
+        data = f.read()
+    with open(path, "wb") as f:
+        f.write(corrupt(data))
+    cache.clear_memory()
+
+    assert cache.get(KEY) is None
+    assert cache.misses == 1
+    assert not os.path.exists(path)
+
+
+def test_failed_write_leaves_no_temp_file(cache, monkeypatch):
+    def replace(src, dst):
+        raise OSError("disk full")
+    monkeypatch.setattr(glyph_cache_module.os, "replace", replace)
+    cache.put(KEY, {"svg": "<svg/>"})
+    assert disk_files(cache) == []
+    assert cache.get(KEY) == {"svg": "<svg/>"} # Still served from memory
+
+
+def test_overwriting_an_entry_does_not_double_count_disk_bytes(cache):
+    cache.put("cd" + "1" * 62, {"other": True}) # First write measures the directory
+    for size in (1000, 10, 500):
+        cache.put(KEY, {"svg": "x" * size})
+    assert cache._disk_bytes == cache._measure_disk()[1]
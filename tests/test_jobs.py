@@ -0,0 +1,140 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from backend import jobs
+from backend.jobs import CANCELLED, JobLimitExceeded, JobManager
+
+
+@pytest.fixture
+def blocking_kind(monkeypatch):
+    """A job kind that runs until the returned event is set."""
+    release = threading.Event()
+    monkeypatch.setitem(jobs.JOB_KINDS, "blocking", lambda: release.wait(10))
+    yield release
+    release.set()
+
+
+@pytest.fixture
+def manager():
+    # Threads stand in for worker processes: a running future cannot be cancelled either way
+    manager = JobManager(max_workers=2, per_user_limit=1)
+    manager._pool = ThreadPoolExecutor(max_workers=2)
+    yield manager
+    manager._pool.shutdown(wait=True)
+
+
+def wait_until(condition):
+    for _ in range(500):
+        if condition():
+            return
+        threading.Event().wait(0.01)
+    raise AssertionError("condition not reached")
+
+
+def test_cancelled_running_job_counts_until_its_worker_finishes(manager, blocking_kind):
+    async def scenario():
+        job = await manager.submit("alice", "blocking")
+        wait_until(job.future.running)
+        assert manager.cancel(job.id).status == CANCELLED
+
+        with pytest.raises(JobLimitExceeded):
+            await manager.submit("alice", "blocking")
+        await manager.submit("bob", "blocking") # Other users are unaffected
+
+        blocking_kind.set()
+        wait_until(job.future.done)
+        assert manager.get(job.id).status == CANCELLED
+        return await manager.submit("alice", "blocking")
+
+    assert asyncio.run(scenario()).user_id == "alice"
+
+
+def test_cancelled_queued_job_frees_its_slot(manager, blocking_kind):
+    async def scenario():
+        manager.per_user_limit = 3
+        running = [await manager.submit("alice", "blocking") for _ in range(2)]
+        queued = await manager.submit("alice", "blocking")
+        wait_until(lambda: all(job.future.running() for job in running))
+        manager.cancel(queued.id)
+        assert queued.future.cancelled()
+        return await manager.submit("alice", "blocking")
+
+    asyncio.run(scenario())
+
+
+def test_reserved_slots_count_against_the_user_limit(manager, blocking_kind):
+    async def scenario():
+        release = manager.reserve("alice")
+        with pytest.raises(JobLimitExceeded):
+            await manager.submit("alice", "blocking")
+        with pytest.raises(JobLimitExceeded):
+            manager.reserve("alice")
+        release()
+        release() # Releasing twice gives back a single slot
+        job = await manager.submit("alice", "blocking")
+        with pytest.raises(JobLimitExceeded):
+            manager.reserve("alice")
+        return job
+
+    asyncio.run(scenario())
+
+
+@pytest.fixture
+def coalesced_kind(monkeypatch):
+    """A coalesced job kind taking a repository path, running until the returned event is set."""
+    release = threading.Event()
+    calls = []
+
+    def shared(repo_path):
+        calls.append(repo_path)
+        release.wait(10)
+        return "result"
+    monkeypatch.setitem(jobs.JOB_KINDS, "shared", shared)
+    monkeypatch.setattr(jobs, "COALESCED_KINDS", jobs.COALESCED_KINDS | {"shared"})
+    yield release, calls
+    release.set()
+
+
+def test_cancelling_one_coalesced_job_keeps_the_shared_computation(manager, coalesced_kind, git_repo):
+    release, calls = coalesced_kind
+    git_repo.commit("first", {"a.txt": "a"}, date="2024-01-01T00:00:00")
+
+    async def scenario():
+        first = await manager.submit("alice", "shared", git_repo.path)
+        second = await manager.submit("bob", "shared", git_repo.path)
+        assert second.future is first.future and (first.coalesced, second.coalesced) == (False, True)
+        wait_until(first.future.running)
+
+        assert manager.cancel(first.id).status == CANCELLED
+        assert not first.future.cancelled()
+        release.set()
+        assert await manager.wait(second) == "result"
+        wait_until(lambda: manager.get(second.id).status == jobs.SUCCEEDED)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert calls == [git_repo.path]
+    assert (first.status, first.result) == (CANCELLED, None)
+    assert second.result == "result"
+
+
+def test_cancelling_every_coalesced_job_cancels_a_queued_computation(manager, blocking_kind, coalesced_kind, git_repo):
+    git_repo.commit("first", {"a.txt": "a"}, date="2024-01-01T00:00:00")
+
+    async def scenario():
+        manager.per_user_limit = 5
+        busy = [await manager.submit("carol", "blocking") for _ in range(2)] # Fill both workers
+        wait_until(lambda: all(job.future.running() for job in busy))
+        first = await manager.submit("alice", "shared", git_repo.path)
+        second = await manager.submit("bob", "shared", git_repo.path)
+        manager.cancel(first.id)
+        assert not first.future.cancelled() # Still wanted by bob
+        manager.cancel(second.id)
+        assert second.future.cancelled()
+        assert await manager.wait(second) is None
+
+    asyncio.run(scenario())
+    assert coalesced_kind[1] == []
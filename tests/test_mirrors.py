@@ -0,0 +1,83 @@
+import os
+import subprocess
+
+import pytest
+
+from backend.mirrors import MirrorError, MirrorManager
+from tests.conftest import GitRepo
+
+
+@pytest.fixture
+def manager(tmp_path):
+    return MirrorManager(mirror_dir=str(tmp_path / "mirrors"), fetch_interval=0)
+
+
+@pytest.mark.parametrize("url", ["--upload-pack=touch pwned", "-oProxyCommand=x"])
+def test_option_like_urls_are_rejected(manager, url, tmp_path):
+    with pytest.raises(MirrorError):
+        manager.resolve(url)
+    with pytest.raises(MirrorError):
+        manager.ensure(url)
+
+
+def mirror_refs(path):
+    result = subprocess.run(["git", "-C", path, "for-each-ref", "--format=%(refname) %(objectname)"],
+                            check=True, capture_output=True, text=True)
+    return dict(line.split() for line in result.stdout.splitlines())
+
+
+def test_file_url_is_mirrored_and_fetched_incrementally(manager, git_repo):
+    first = git_repo.commit("first", {"a.txt": "a"}, date="2024-01-01T00:00:00")
+    url = "file://" + git_repo.path
+
+    path = manager.ensure(url)
+    assert manager.resolve(url) == path
+    assert mirror_refs(path) == {"refs/heads/main": first}
+    packs_before = set(os.listdir(os.path.join(path, "objects", "pack")))
+
+    second = git_repo.commit("second", {"b.txt": "b"}, date="2024-01-02T00:00:00")
+    git_repo.git("tag", "v1")
+    assert manager.ensure(url) == path
+    assert mirror_refs(path) == {"refs/heads/main": second, "refs/tags/v1": second}
+    # The fetch adds the new objects next to the original pack instead of re-cloning
+    assert packs_before <= set(os.listdir(os.path.join(path, "objects", "pack")))
+    assert [mirror["url"] for mirror in manager.list()] == [url]
+
+
+def make_remotes(tmp_path, count):
+    urls = []
+    for i in range(count):
+        repo = GitRepo(tmp_path / f"remote{i}")
+        repo.commit(f"commit {i}", {"file.txt": str(i)}, date="2024-01-01T00:00:00")
+        urls.append("file://" + repo.path)
+    return urls
+
+
+def test_prune_evicts_least_recently_used_mirrors(manager, tmp_path):
+    manager.prune_grace = 0
+    urls = make_remotes(tmp_path, 3)
+    paths = [manager.ensure(url) for url in urls]
+    manager.disk_budget = max(mirror["size"] for mirror in manager.list())
+
+    manager.prune()
+    assert [mirror["path"] for mirror in manager.list()] == paths[-1:]
+    assert not os.path.exists(paths[0])
+
+
+def test_prune_skips_mirrors_in_use_or_recently_used(manager, tmp_path):
+    urls = make_remotes(tmp_path, 3)
+    paths = [manager.ensure(url) for url in urls]
+    manager.disk_budget = 0
+
+    manager.prune()
+    assert len(manager.list()) == 3 # All used within the grace period
+
+    manager.prune_grace = 0
+    with manager.reading(paths[0], "/not/a/mirror"):
+        manager.prune()
+        assert [mirror["path"] for mirror in manager.list()] == paths[:1]
+    manager.prune()
+    assert manager.list() == []
+    with pytest.raises(MirrorError):
+        with manager.reading(paths[0]):
+            pass
@@ -0,0 +1,29 @@
+import nltk
+import pytest
+
+from backend import nlp_analysis
+
+
+def test_missing_nltk_data_is_reported_and_retried(monkeypatch):
+    def find(resource):
+        raise LookupError(resource)
+
+    downloads = []
+    monkeypatch.setattr(nlp_analysis, "_nltk_ready", False)
+    monkeypatch.setattr(nltk.data, "find", find)
+    monkeypatch.setattr(nltk, "download", lambda package, quiet=False: downloads.append(package) or False)
+
+    for _ in range(2):
+        with pytest.raises(nlp_analysis.NLTKUnavailable):
+            nlp_analysis.ensure_nltk_resources()
+    assert not nlp_analysis._nltk_ready
+    assert downloads == ["stopwords", "stopwords"]
+
+
+def test_corpus_keywords_rank_terms_and_reject_empty_budgets():
+    messages = ["Fix parser crash", "parser speedup", "Add parser tests", "update docs"]
+    assert nlp_analysis.extract_corpus_keywords(messages, top_n=1) == ["parser"]
+    assert len(nlp_analysis.extract_corpus_keywords(messages, top_n=50)) == 8
+    for top_n in (0, -3):
+        with pytest.raises(ValueError):
+            nlp_analysis.extract_corpus_keywords(messages, top_n=top_n)
@@ -0,0 +1,125 @@
+import asyncio
+import socket
+from collections import Counter
+from types import SimpleNamespace
+
+import pytest
+
+from backend import notifications
+from backend.notifications import DigestDispatcher, SMTPConnectionPool
+from backend.storage import GlyphStore
+
+aiosmtpd_controller = pytest.importorskip("aiosmtpd.controller")
+
+
+class StandInHandler:
+    """Local SMTP stand-in: refuses `reject*` recipients, greylists `busy*` ones once, tracks concurrency."""
+
+    def __init__(self):
+        self.attempts = Counter()
+        self.delivered = []
+        self.sessions = set()
+        self.active = 0
+        self.max_active = 0
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        self.attempts[address] += 1
+        if address.startswith("reject"):
+            return "550 No such user"
+        if address.startswith("busy") and self.attempts[address] == 1:
+            return "451 Try again later"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        self.sessions.add(id(session))
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(0.05)
+        self.active -= 1
+        self.delivered.extend(envelope.rcpt_tos)
+        return "250 Message accepted"
+
+
+@pytest.fixture
+def smtp_server():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    handler = StandInHandler()
+    controller = aiosmtpd_controller.Controller(handler, hostname="127.0.0.1", port=port)
+    controller.start()
+    yield handler, {"server": "127.0.0.1", "port": port, "username": None, "password": None, "starttls": False}
+    controller.stop()
+
+
+def collection(i, email):
+    return SimpleNamespace(id=f"c{i}", user_email=email, repo_path="/repos/r")
+
+
+def test_dispatcher_bounds_sessions_retries_transient_and_reports_stats(smtp_server, monkeypatch):
+    handler, settings = smtp_server
+    monkeypatch.setenv("EMAIL_USERNAME", "glyphs@example.com")
+    monkeypatch.setattr(notifications, "render_weekly_digest", lambda email, collection_id, repo: ("<p>digest</p>", b"png"))
+    collections = [collection(i, f"user{i}@example.com") for i in range(8)]
+    collections += [collection(8, "busy@example.com"), collection(9, "reject@example.com"),
+                    SimpleNamespace(id="c10", user_email=None, repo_path="/repos/r")]
+
+    pool = SMTPConnectionPool(settings=settings, max_connections=2)
+    try:
+        stats = asyncio.run(DigestDispatcher(pool=pool, concurrency=6, retries=2, backoff=0).dispatch(collections))
+    finally:
+        pool.close()
+
+    assert stats["sent"] == 9
+    assert stats["failed"] == 1 and list(stats["errors"]) == ["c9"]
+    assert stats["skipped"] == 1
+    assert stats["retries"] == 1
+    assert stats["messages_per_second"] > 0
+    # Greylisted once, then delivered; a permanent refusal is never retried
+    assert handler.attempts["busy@example.com"] == 2
+    assert handler.attempts["reject@example.com"] == 1
+    assert sorted(handler.delivered) == sorted([f"user{i}@example.com" for i in range(8)] + ["busy@example.com"])
+    # Sends never exceed the pool, and sessions are reused (a refusal does not discard one)
+    assert handler.max_active <= 2
+    assert len(handler.sessions) <= 2
+
+
+def test_transient_errors_exhaust_retries(smtp_server, monkeypatch):
+    handler, settings = smtp_server
+    monkeypatch.setattr(StandInHandler, "handle_RCPT", _always_busy)
+    pool = SMTPConnectionPool(settings=settings, max_connections=1)
+    message = notifications.build_email("glyphs@example.com", "busy@example.com", "Digest", "<p>digest</p>")
+    try:
+        with pytest.raises(notifications.smtplib.SMTPRecipientsRefused):
+            notifications.send_message_with_retry(pool, message, retries=2, backoff=0)
+    finally:
+        pool.close()
+    assert handler.attempts["busy@example.com"] == 3
+
+
+async def _always_busy(self, server, session, envelope, address, rcpt_options):
+    self.attempts[address] += 1
+    return "451 Try again later"
+
+
+def test_digest_schedule_persists_its_last_run_across_restarts(tmp_path):
+    store = GlyphStore(str(tmp_path / "glyphs.db"))
+    batches = []
+
+    def start_process(interval):
+        """Runs the schedule as a freshly started process would, for a few polls."""
+        async def run():
+            task = asyncio.create_task(notifications.run_digest_schedule(
+                lambda: batches.append(interval) or [], interval,
+                claim_run=lambda: store.claim_schedule_run("digest-schedule", interval), poll_seconds=0.01))
+            await asyncio.sleep(0.1)
+            task.cancel()
+        asyncio.run(run())
+
+    start_process(3600)
+    assert batches == [3600] # First start sends right away instead of waiting an interval
+    start_process(3600)
+    assert batches == [3600] # A restart within the interval does not send again
+    start_process(0.05)
+    assert batches[1:2] == [0.05] # Once the interval has passed since the recorded run, it does
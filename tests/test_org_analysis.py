@@ -0,0 +1,21 @@
+import subprocess
+
+from backend import commit_table, org_analysis
+from backend.glyph_cache import GlyphCache
+
+
+def test_unresolvable_paths_are_reported_as_failed(git_repo, tmp_path, monkeypatch):
+    monkeypatch.setattr(commit_table, "TABLE_DIR", str(tmp_path / "tables"))
+    monkeypatch.setattr(org_analysis, "glyph_cache", GlyphCache(cache_dir=str(tmp_path / "cache")))
+    git_repo.commit("feat: one", {"a.txt": "a\n"}, 1_700_000_000)
+    unborn = tmp_path / "unborn"
+    unborn.mkdir()
+    subprocess.run(["git", "init", "-q", str(unborn)], check=True)
+    plain = tmp_path / "plain"
+    plain.mkdir()
+    missing = tmp_path / "missing"
+
+    result = org_analysis.analyze_organization([git_repo.path, str(unborn), str(plain), str(missing)], max_workers=1)
+    assert result["repo_count"] == 2
+    assert result["commit_count"] == 1
+    assert sorted(result["failed"]) == sorted([str(plain), str(missing)])
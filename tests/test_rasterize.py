@@ -0,0 +1,82 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from backend import rasterize
+from backend.rasterize import Rasterizer
+
+SVG = '<svg xmlns="http://www.w3.org/2000/svg" width="8" height="4"><rect width="8" height="4" fill="red"/></svg>'
+
+
+@pytest.fixture
+def renders(monkeypatch):
+    """Replaces cairosvg with a fake returning `output_width` bytes; records every render."""
+    calls = []
+
+    def svg_to_png(svg_bytes, output_width=None, output_height=None):
+        calls.append((svg_bytes, output_width))
+        return b"P" * (output_width or 10)
+    monkeypatch.setattr(rasterize, "svg_to_png", svg_to_png)
+    return calls
+
+
+def test_png_bytes_are_rendered_in_a_worker_process():
+    try:
+        import cairosvg # noqa: F401
+    except (ImportError, OSError):
+        pytest.skip("cairosvg needs the native cairo library")
+    raster = Rasterizer(max_workers=1)
+    try:
+        png = raster.rasterize(SVG, output_width=16)
+    finally:
+        raster.shutdown()
+    assert png.startswith(b"\x89PNG\r\n\x1a\n")
+    assert int.from_bytes(png[16:20], "big") == 16 # IHDR width
+
+
+def test_cache_is_an_lru_bounded_by_bytes(renders):
+    raster = Rasterizer(max_workers=0, cache_budget=100)
+    assert raster.rasterize(SVG, output_width=40) == b"P" * 40
+    raster.rasterize(SVG, output_width=30)
+    raster.rasterize(SVG, output_width=40) # Hit: now the most recently used
+    raster.rasterize(SVG, output_width=50) # 120 bytes: evicts the 30-byte entry only
+    assert raster._cache_bytes == 90
+    raster.rasterize(SVG, output_width=40)
+    raster.rasterize(SVG, output_width=30)
+    raster.rasterize(SVG, output_width=200) # Larger than the whole budget: never cached
+    raster.rasterize(SVG, output_width=200)
+    assert [width for _, width in renders] == [40, 30, 50, 30, 200, 200]
+    assert (raster.hits, raster.misses) == (2, 6)
+
+
+def test_concurrent_requests_share_one_render(monkeypatch):
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def svg_to_png(svg_bytes, output_width=None, output_height=None):
+        calls.append(output_width)
+        started.set()
+        release.wait(5)
+        return b"png"
+    monkeypatch.setattr(rasterize, "svg_to_png", svg_to_png)
+    raster = Rasterizer(max_workers=0)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        first = pool.submit(raster.rasterize, SVG, 64)
+        assert started.wait(5)
+        others = [pool.submit(raster.rasterize, SVG.encode("utf-8"), 64) for _ in range(3)]
+        release.set()
+        results = [first.result(5)] + [future.result(5) for future in others]
+    assert results == [b"png"] * 4
+    assert calls == [64]
+    assert raster._pending == {}
+
+
+def test_job_workers_render_within_their_cpu_share():
+    raster = Rasterizer(max_workers=4)
+    raster.limit_workers(1)
+    assert raster.max_workers == 0 # In-process
+    raster = Rasterizer(max_workers=4)
+    raster.limit_workers(2)
+    assert raster.max_workers == 2
@@ -0,0 +1,77 @@
+import pytest
+
+from backend import commit_table, generate_mashup_glyph, repo_profile
+from backend.glyph_cache import GlyphCache
+from backend.repo_profile import PROFILE_BINS, get_profiles
+
+DAY = 1_700_006_400 # A midnight (UTC)
+
+
+@pytest.fixture(autouse=True)
+def isolated_caches(tmp_path, monkeypatch):
+    monkeypatch.setattr(commit_table, "TABLE_DIR", str(tmp_path / "tables"))
+    cache = GlyphCache(cache_dir=str(tmp_path / "cache"))
+    monkeypatch.setattr(repo_profile, "glyph_cache", cache)
+    monkeypatch.setattr(generate_mashup_glyph, "glyph_cache", cache)
+    return cache
+
+
+@pytest.fixture
+def history(git_repo):
+    """Three commits at 09:00 on consecutive days, then a merge of a side branch a week later."""
+    for i, message in enumerate(["feat: start", "fix: typo", "docs"]):
+        git_repo.commit(message, {"a.txt": "x\n" * (i + 1)}, DAY + i * 86400 + 9 * 3600)
+    git_repo.git("checkout", "-q", "-b", "side")
+    git_repo.commit("feat: side", {"b.txt": "b\n"}, DAY + 7 * 86400 + 9 * 3600)
+    git_repo.git("checkout", "-q", "main")
+    git_repo.git("merge", "-q", "--no-ff", "-m", "merge side", "side", date=DAY + 8 * 86400 + 9 * 3600)
+    return git_repo
+
+
+def test_profiles_describe_structure_and_style(history):
+    [profile] = get_profiles([history.path], max_workers=1)
+    structure, style = profile["structure"], profile["style"]
+    assert structure["commit_count"] == 5
+    assert structure["merge_ratio"] == pytest.approx(0.2)
+    assert structure["span_days"] == pytest.approx(8.0)
+    assert len(structure["density"]) == 2 and all(len(lane) == PROFILE_BINS for lane in structure["density"])
+    assert max(max(lane) for lane in structure["density"]) == 1.0
+    assert style["hour_histogram"][9] == 1.0
+    assert style["message_mix"] == {"feature": 0.4, "fix": 0.2, "other": 0.4}
+
+
+def test_cached_profiles_are_not_extracted_again(history, monkeypatch):
+    first = get_profiles([history.path, history.path], max_workers=1)
+    assert first[0] is first[1] # Duplicates are extracted once
+
+    def extract_profile(repo_path, sha):
+        raise AssertionError("profile should come from the cache")
+    monkeypatch.setattr(repo_profile, "extract_profile", extract_profile)
+    assert get_profiles([history.path]) == first[:1]
+
+
+def test_parallel_and_in_process_extraction_agree(history, tmp_path, isolated_caches):
+    other = type(history)(tmp_path / "other")
+    other.commit("feat: other", {"c.txt": "c\n"}, DAY)
+    parallel = get_profiles([history.path, other.path], max_workers=2)
+    isolated_caches._memory.clear()
+    isolated_caches.cache_dir = str(tmp_path / "cold")
+    assert get_profiles([history.path, other.path], max_workers=1) == parallel
+
+
+def test_mashup_composes_structure_of_one_repo_with_style_of_another(history, tmp_path):
+    other = type(history)(tmp_path / "other")
+    other.commit("fix: late night", {"c.txt": "c\n"}, DAY + 23 * 3600)
+    structure, style = get_profiles([history.path, other.path], max_workers=1)
+    layout = generate_mashup_glyph.compose_mashup_layout(structure["structure"], style["style"])
+    cells = sum(1 for lane in structure["structure"]["density"] for value in lane if value > 0)
+    assert len(layout["x"]) == len(layout["radius"]) == len(layout["color"]) == cells
+    assert layout["lane_count"] == 2
+
+    output = tmp_path / "mashup.svg"
+    svg = generate_mashup_glyph.generate_mashup_glyph(history.path, other.path, str(output), max_workers=1)
+    assert svg.startswith("<svg") and output.read_text() == svg
+    output.unlink()
+    # The second call is served from the mashup cache and still writes the file
+    assert generate_mashup_glyph.generate_mashup_glyph(history.path, other.path, str(output)) == svg
+    assert output.read_text() == svg
@@ -0,0 +1,89 @@
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+from backend.models import GlyphCollection, GlyphSnapshot, ProjectGoal
+from backend.storage import SELECT_COLLECTION_GOALS, SELECT_PUBLIC_COLLECTIONS, GlyphStore
+
+
+def snapshot(timestamp):
+    return GlyphSnapshot(timestamp=timestamp, commit_hash="abc", svg_content="<svg/>")
+
+
+def test_snapshot_ranges_compare_instants_across_offsets(tmp_path):
+    store = GlyphStore(str(tmp_path / "glyphs.db"))
+    plus_five = timezone(timedelta(hours=5))
+    store.add_snapshot("c", snapshot(datetime(2024, 1, 1, 0, 0, tzinfo=plus_five))) # 2023-12-31T19:00Z
+    store.add_snapshot("c", snapshot(datetime(2023, 12, 31, 21, 0, tzinfo=timezone.utc)))
+    store.add_snapshot("c", snapshot(datetime(2023, 12, 31, 20, 30))) # Naive: UTC
+
+    since = datetime(2023, 12, 31, 20, 0, tzinfo=timezone.utc)
+    until = datetime(2024, 1, 1, 1, 0, tzinfo=timezone.utc)
+    page, total = store.list_snapshots("c", since=since, until=until)
+    assert total == 2
+    assert [s.timestamp for s in page] == [
+        datetime(2023, 12, 31, 20, 30, tzinfo=timezone.utc),
+        datetime(2023, 12, 31, 21, 0, tzinfo=timezone.utc),
+    ]
+
+    page, total = store.list_snapshots("c")
+    assert total == 3
+    assert page[0].timestamp == datetime(2023, 12, 31, 19, 0, tzinfo=timezone.utc)
+
+
+def test_existing_timestamps_are_migrated(tmp_path):
+    path = str(tmp_path / "glyphs.db")
+    GlyphStore(path).add_snapshot("c", snapshot(datetime(2024, 1, 1, 0, 0, tzinfo=timezone(timedelta(hours=5)))))
+    with sqlite3.connect(path) as connection:
+        connection.execute("UPDATE snapshots SET timestamp = '2024-01-01T00:00:00+05:00'")
+        connection.execute("PRAGMA user_version = 0")
+    connection.close()
+
+    page, _ = GlyphStore(path).list_snapshots("c", until=datetime(2023, 12, 31, 20, 0, tzinfo=timezone.utc))
+    assert [s.timestamp for s in page] == [datetime(2023, 12, 31, 19, 0, tzinfo=timezone.utc)]
+
+
+def test_lease_has_one_holder_until_it_expires(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("backend.storage.time.time", lambda: now[0])
+    path = str(tmp_path / "glyphs.db")
+    first, second = GlyphStore(path), GlyphStore(path) # Two worker processes sharing the file
+    assert first.acquire_lease("digest-schedule", "worker-1", ttl=60)
+    assert not second.acquire_lease("digest-schedule", "worker-2", ttl=60)
+    now[0] += 30
+    assert first.acquire_lease("digest-schedule", "worker-1", ttl=60) # Renewed until 1090
+    now[0] += 45
+    assert not second.acquire_lease("digest-schedule", "worker-2", ttl=60)
+    now[0] += 20
+    assert second.acquire_lease("digest-schedule", "worker-2", ttl=60)
+    assert not first.acquire_lease("digest-schedule", "worker-1", ttl=60)
+
+
+def test_schedule_runs_are_claimed_once_per_interval(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("backend.storage.time.time", lambda: now[0])
+    path = str(tmp_path / "glyphs.db")
+    first, second = GlyphStore(path), GlyphStore(path)
+    assert first.claim_schedule_run("digest-schedule", 600) # Never run: due right away
+    assert not second.claim_schedule_run("digest-schedule", 600)
+    now[0] += 599
+    assert not first.claim_schedule_run("digest-schedule", 600)
+    now[0] += 1
+    assert second.claim_schedule_run("digest-schedule", 600)
+    assert not first.claim_schedule_run("digest-schedule", 600)
+
+
+def test_public_collections_and_collection_goals_are_indexed_lookups(tmp_path):
+    store = GlyphStore(str(tmp_path / "glyphs.db"))
+    now = datetime(2024, 1, 1)
+    for i, is_public in enumerate([True, False, True]):
+        store.save_collection(GlyphCollection(id=f"c{i}", user_id="alice", name=f"c{i}", created_at=now, is_public=is_public))
+        store.save_goal(ProjectGoal(id=f"g{i}", collection_id="c0" if i < 2 else "c2", user_id="alice", name="goal",
+                                    created_at=now, updated_at=now))
+
+    assert sorted(c.id for c in store.list_public_collections()) == ["c0", "c2"]
+    assert sorted(g.id for g in store.list_goals("c0")) == ["g0", "g1"]
+    connection = store._connection()
+    for sql, params, index in [(SELECT_PUBLIC_COLLECTIONS, (), "idx_collections_is_public"),
+                               (SELECT_COLLECTION_GOALS, ("c0",), "idx_goals_collection_id")]:
+        plan = " ".join(row[-1] for row in connection.execute(f"EXPLAIN QUERY PLAN {sql}", params))
+        assert index in plan